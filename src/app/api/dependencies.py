@@ -1,6 +1,8 @@
-from typing import Annotated, Any, cast
+import math
+from collections.abc import AsyncGenerator, Callable, Coroutine
+from typing import Annotated, Any
 
-from fastapi import Depends, HTTPException, Request
+from fastapi import Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
@@ -8,17 +10,20 @@ from ..core.db.database import async_get_db
 from ..core.exceptions.http_exceptions import ForbiddenException, RateLimitException, UnauthorizedException
 from ..core.logger import logging
 from ..core.security import TokenType, oauth2_scheme, verify_token
+from ..core.utils.permissions import get_permissions
+from ..core.utils.principals import get_principal
 from ..core.utils.rate_limit import rate_limiter
-from ..crud.crud_rate_limit import crud_rate_limits
-from ..crud.crud_tier import crud_tiers
-from ..crud.crud_users import crud_users
-from ..schemas.rate_limit import RateLimitRead, sanitize_path
-from ..schemas.tier import TierRead
+from ..schemas.rate_limit import sanitize_path
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_LIMIT = settings.DEFAULT_RATE_LIMIT_LIMIT
 DEFAULT_PERIOD = settings.DEFAULT_RATE_LIMIT_PERIOD
+COMPANY_LIMIT = settings.COMPANY_RATE_LIMIT_LIMIT
+COMPANY_PERIOD = settings.COMPANY_RATE_LIMIT_PERIOD
+CONCURRENCY_LIMIT_PER_USER = settings.CONCURRENCY_LIMIT_PER_USER
+CONCURRENCY_LIMIT_PER_COMPANY = settings.CONCURRENCY_LIMIT_PER_COMPANY
+CONCURRENCY_SLOT_TIMEOUT = settings.CONCURRENCY_SLOT_TIMEOUT
 
 
 async def get_current_user(
@@ -28,13 +33,9 @@ async def get_current_user(
     if token_data is None:
         raise UnauthorizedException("User not authenticated.")
 
-    if "@" in token_data.username_or_email:
-        user = await crud_users.get(db=db, email=token_data.username_or_email, is_deleted=False)
-    else:
-        user = await crud_users.get(db=db, username=token_data.username_or_email, is_deleted=False)
-
-    if user:
-        return cast(dict[str, Any], user)
+    principal = await get_principal(token_data.username_or_email, db)
+    if principal:
+        return principal
 
     raise UnauthorizedException("User not authenticated.")
 
@@ -49,10 +50,6 @@ async def get_optional_user(request: Request, db: AsyncSession = Depends(async_g
         if token_type.lower() != "bearer" or not token_value:
             return None
 
-        token_data = await verify_token(token_value, TokenType.ACCESS, db)
-        if token_data is None:
-            return None
-
         return await get_current_user(token_value, db=db)
 
     except HTTPException as http_exc:
@@ -72,8 +69,44 @@ async def get_current_superuser(current_user: Annotated[dict, Depends(get_curren
     return current_user
 
 
+def require_permission(resource: str) -> Callable[..., Coroutine[Any, Any, dict]]:
+    """Build a dependency allowing only users granted the named resource, and returning the current user.
+
+    Superusers are always allowed. Other users need the resource, or one of its ancestors, to be granted both to one
+    of their roles and to their company. Permissions are compiled once per user into a bitset, so the check itself
+    costs a dictionary lookup and a shift.
+
+    Parameters
+    ----------
+    resource: str
+        The name of the resource, as stored in `Resource.name`.
+
+    Returns
+    -------
+    Callable[..., Coroutine[Any, Any, dict]]
+        The dependency, e.g. `dependencies=[Depends(require_permission("equipment"))]`.
+    """
+
+    async def permission_dependency(
+        current_user: Annotated[dict, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(async_get_db)]
+    ) -> dict:
+        if current_user["is_superuser"]:
+            return current_user
+
+        index, permissions = await get_permissions(current_user, db)
+        if not index.allows(permissions, resource):
+            raise ForbiddenException("You do not have enough privileges.")
+
+        return current_user
+
+    return permission_dependency
+
+
 async def rate_limiter_dependency(
-    request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], user: dict | None = Depends(get_optional_user)
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+    user: dict | None = Depends(get_optional_user),
 ) -> None:
     if hasattr(request.app.state, "initialization_complete"):
         await request.app.state.initialization_complete.wait()
@@ -81,16 +114,15 @@ async def rate_limiter_dependency(
     path = sanitize_path(request.url.path)
     if user:
         user_id = user["id"]
-        tier = await crud_tiers.get(db, id=user["tier_id"], schema_to_select=TierRead)
-        if tier:
-            tier = cast(TierRead, tier)
-            rate_limit = await crud_rate_limits.get(db=db, tier_id=tier.id, path=path, schema_to_select=RateLimitRead)
+        rules = await rate_limiter.get_rules(db)
+        tier_name = rules.tiers.get(user["tier_id"])
+        if tier_name is not None:
+            rate_limit = rules.limits.get((user["tier_id"], path))
             if rate_limit:
-                rate_limit = cast(RateLimitRead, rate_limit)
-                limit, period = rate_limit.limit, rate_limit.period
+                limit, period = rate_limit
             else:
                 logger.warning(
-                    f"User {user_id} with tier '{tier.name}' has no specific rate limit for path '{path}'. \
+                    f"User {user_id} with tier '{tier_name}' has no specific rate limit for path '{path}'. \
                         Applying default rate limit."
                 )
                 limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
@@ -101,6 +133,59 @@ async def rate_limiter_dependency(
         user_id = request.client.host if request.client else "unknown"
         limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
 
-    is_limited = await rate_limiter.is_rate_limited(db=db, user_id=user_id, path=path, limit=limit, period=period)
-    if is_limited:
-        raise RateLimitException("Rate limit exceeded.")
+    result = await rate_limiter.check(user_id=user_id, path=path, limit=limit, period=period)
+    if user and COMPANY_LIMIT > 0 and not result.limited:
+        company_result = await rate_limiter.check(
+            user_id=f"company_{user['company_id']}", path="all", limit=COMPANY_LIMIT, period=COMPANY_PERIOD
+        )
+        if company_result.limited or company_result.remaining < result.remaining:
+            result = company_result
+
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if result.limited:
+        exception = RateLimitException("Rate limit exceeded.")
+        exception.headers = {**headers, "Retry-After": str(math.ceil(result.retry_after))}
+        raise exception
+
+    response.headers.update(headers)
+
+
+async def concurrency_limiter_dependency(
+    request: Request, user: dict | None = Depends(get_optional_user)
+) -> AsyncGenerator[None, None]:
+    """Cap the requests in flight per user, or client address for anonymous requests, and per company.
+
+    Unlike `rate_limiter_dependency`, which counts requests per period, slots are held for the duration of the
+    request and released once it is handled, so a few slow requests are enough to reach the limit. Requests beyond
+    it are rejected with a 429 before running any query.
+    """
+    if user:
+        slots = [
+            (f"user:{user['id']}", CONCURRENCY_LIMIT_PER_USER),
+            (f"company:{user['company_id']}", CONCURRENCY_LIMIT_PER_COMPANY),
+        ]
+    else:
+        slots = [(f"user:{request.client.host if request.client else 'unknown'}", CONCURRENCY_LIMIT_PER_USER)]
+
+    acquired: list[tuple[str, str]] = []
+    try:
+        for key, limit in slots:
+            if limit <= 0:
+                continue
+
+            token = await rate_limiter.acquire_slot(key, limit, CONCURRENCY_SLOT_TIMEOUT)
+            if token is None:
+                exception = RateLimitException("Too many concurrent requests.")
+                exception.headers = {"Retry-After": "1"}
+                raise exception
+            acquired.append((key, token))
+
+        yield
+
+    finally:
+        for key, token in acquired:
+            await rate_limiter.release_slot(key, token)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from ...core.config import settings
+from ..dependencies import concurrency_limiter_dependency
 from .login import router as login_router
 from .logout import router as logout_router
+from .metrics import router as metrics_router
 from .posts import router as posts_router
 from .rate_limits import router as rate_limits_router
 from .tasks import router as tasks_router
@@ -13,7 +16,9 @@ from .collect import router as collect_router
 from .equipment import router as equipment_router
 from .permission import router as permission_router
 
-router = APIRouter(prefix="/v1")
+# Resolving the concurrency limits costs a user lookup, so requests only pay for it when a limit is set.
+concurrency_limited = settings.CONCURRENCY_LIMIT_PER_USER > 0 or settings.CONCURRENCY_LIMIT_PER_COMPANY > 0
+router = APIRouter(prefix="/v1", dependencies=[Depends(concurrency_limiter_dependency)] if concurrency_limited else [])
 router.include_router(login_router)
 router.include_router(logout_router)
 router.include_router(users_router)
@@ -21,6 +26,7 @@ router.include_router(posts_router)
 router.include_router(tasks_router)
 router.include_router(tiers_router)
 router.include_router(rate_limits_router)
+router.include_router(metrics_router)
 
 router.include_router(base_router)
 router.include_router(collect_router)
@@ -7,6 +7,9 @@ from sqlalchemy.orm import selectinload
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
+from ....core.utils.permissions import invalidate_permissions
+from ....core.utils.principals import invalidate_principals
 from ....crud.base.crud_companies import crud_companies
 from ....schemas.base.company import CompanyCreate, CompanyCreateInternal, CompanyRead, CompanyReadJoined, CompanyUpdate, CompanyTreeNode
 from ....models.base.company import Company
@@ -16,6 +19,7 @@ router = APIRouter(tags=["companies"])
 
 
 @router.post("/company", status_code=201)
+@invalidate_cache(tags=["company"])
 async def write_company(
     request: Request, company: CompanyCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> CompanyRead:
@@ -44,6 +48,7 @@ async def write_company(
 
 # unpaginated response for companies
 @router.get("/companies", response_model=dict[str, List[CompanyRead]])
+@cache(key_prefix="companies", tags=["company"], include_query_params=True, raw_response=True, warm=True)
 async def read_companies(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[CompanyRead]:
@@ -69,6 +74,7 @@ async def read_company(request: Request, id: int, db: Annotated[AsyncSession, De
 
 
 @router.patch("/company/{id}")
+@invalidate_cache(tags=["company"])
 async def patch_company(
     request: Request, id: int, values: CompanyUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -88,21 +94,27 @@ async def patch_company(
         await db.commit()
         # await db.refresh(db_company)
 
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "Company updated"}
 
 
 @router.delete("/company/{id}")
+@invalidate_cache(tags=["company"])
 async def erase_company(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_company = await crud_companies.get(db=db, id=id, schema_to_select=CompanyRead)
     if db_company is None:
         raise NotFoundException("Company not found")
 
     await crud_companies.delete(db=db, id=id)
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "Company deleted"}
 
 
 # Hierarchical tree structure for companies
 @router.get("/companies/tree", response_model=dict[str, List[CompanyTreeNode]])
+@cache(key_prefix="companies_tree", tags=["company"], include_query_params=True, raw_response=True, warm=True)
 async def read_companies_tree(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[CompanyTreeNode]:
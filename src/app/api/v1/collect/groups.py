@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_groups import crud_groups
 from ....schemas.collect.group import GroupCreate, GroupCreateInternal, GroupRead, GroupUpdate
 
@@ -12,6 +13,7 @@ router = APIRouter(tags=["groups"])
 
 
 @router.post("/group", status_code=201)
+@invalidate_cache(tags=["group"])
 async def write_group(
     request: Request, group: GroupCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> GroupRead:
@@ -36,7 +38,9 @@ async def write_group(
 
 # unpaginated response for groups
 @router.get("/groups", response_model=dict[str, List[GroupRead]])
+@cache(key_prefix="groups", include_query_params=True, tags=["group"], raw_response=True, warm=True)
 async def read_groups(
+    request: Request,
     db: Annotated[AsyncSession, Depends(async_get_db)],
     name: str = Query("")
 ) -> dict[str, List[GroupRead]]:
@@ -60,6 +64,7 @@ async def read_group(request: Request, id: int, db: Annotated[AsyncSession, Depe
 
 
 @router.patch("/group/{id}")
+@invalidate_cache(tags=["group"])
 async def patch_group(
     request: Request, id: int, values: GroupUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -80,6 +85,7 @@ async def patch_group(
 
 
 @router.delete("/group/{id}")
+@invalidate_cache(tags=["group"])
 async def erase_group(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_group = await crud_groups.get(db=db, id=id, schema_to_select=GroupRead)
     if db_group is None:
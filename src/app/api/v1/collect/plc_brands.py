@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_plc_brands import crud_plc_brands
 from ....schemas.collect.plc_brand import PlcBrandCreate, PlcBrandCreateInternal, PlcBrandRead, PlcBrandUpdate
 
@@ -12,6 +13,7 @@ router = APIRouter(tags=["plc_brands"])
 
 
 @router.post("/plc-brand", status_code=201)
+@invalidate_cache(tags=["plc_brand"])
 async def write_plc_brand(
     request: Request, plc_brand: PlcBrandCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> PlcBrandRead:
@@ -36,6 +38,7 @@ async def write_plc_brand(
 
 # unpaginated response for plc_brands
 @router.get("/plc-brands", response_model=dict[str, List[PlcBrandRead]])
+@cache(key_prefix="plc_brands", tags=["plc_brand"], include_query_params=True, raw_response=True, warm=True)
 async def read_plc_brands(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[PlcBrandRead]:
@@ -55,6 +58,7 @@ async def read_plc_brand(request: Request, id: int, db: Annotated[AsyncSession,
 
 
 @router.patch("/plc-brand/{id}")
+@invalidate_cache(tags=["plc_brand"])
 async def patch_plc_brand(
     request: Request, id: int, values: PlcBrandUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -75,6 +79,7 @@ async def patch_plc_brand(
 
 
 @router.delete("/plc-brand/{id}")
+@invalidate_cache(tags=["plc_brand"])
 async def erase_plc_brand(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_plc_brand = await crud_plc_brands.get(db=db, id=id, schema_to_select=PlcBrandRead)
     if db_plc_brand is None:
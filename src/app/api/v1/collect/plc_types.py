@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_plc_types import crud_plc_types
 from ....crud.collect.crud_plc_brands import crud_plc_brands
 from ....schemas.collect.plc_type import PlcTypeCreate, PlcTypeCreateInternal, PlcTypeRead, PlcTypeUpdate
@@ -14,6 +15,7 @@ router = APIRouter(tags=["plc_types"])
 
 
 @router.post("/plc-type", status_code=201)
+@invalidate_cache(tags=["plc_type"])
 async def write_plc_type(
     request: Request, plc_type: PlcTypeCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> PlcTypeRead:
@@ -32,6 +34,7 @@ async def write_plc_type(
 
 # unpaginated response for plc_types
 @router.get("/plc-types", response_model=dict[str, List[PlcTypeRead]])
+@cache(key_prefix="plc_types", include_query_params=True, tags=["plc_type"], raw_response=True, warm=True)
 async def read_plc_types(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[PlcTypeRead]:
@@ -51,6 +54,7 @@ async def read_plc_type(request: Request, id: int, db: Annotated[AsyncSession, D
 
 
 @router.patch("/plc-type/{id}")
+@invalidate_cache(tags=["plc_type"])
 async def patch_plc_type(
     request: Request, id: int, values: PlcTypeUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -63,6 +67,7 @@ async def patch_plc_type(
 
 
 @router.delete("/plc-type/{id}")
+@invalidate_cache(tags=["plc_type"])
 async def erase_plc_type(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_plc_type = await crud_plc_types.get(db=db, id=id, schema_to_select=PlcTypeRead)
     if db_plc_type is None:
@@ -74,6 +79,13 @@ async def erase_plc_type(request: Request, id: int, db: Annotated[AsyncSession,
 
 # Hierarchical tree structure for companies
 @router.get("/plc-types/tree", response_model=dict[str, List[PlcTreeNode]])
+@cache(
+    key_prefix="plc_types_tree",
+    tags=["plc_brand", "plc_type"],
+    include_query_params=True,
+    raw_response=True,
+    warm=True,
+)
 async def read_companies_tree(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[PlcTreeNode]:
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_smart_hardware_types import crud_smart_hardware_types
 from ....schemas.collect.smart_hardware_type import SmartHardwareTypeCreate, SmartHardwareTypeCreateInternal, SmartHardwareTypeRead, SmartHardwareTypeUpdate
 
@@ -12,6 +13,7 @@ router = APIRouter(tags=["smart_hardware_types"])
 
 
 @router.post("/smart-hardware-type", status_code=201)
+@invalidate_cache(tags=["smart_hardware_type"])
 async def write_smart_hardware_type(
     request: Request, smart_hardware_type: SmartHardwareTypeCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> SmartHardwareTypeRead:
@@ -36,6 +38,13 @@ async def write_smart_hardware_type(
 
 # unpaginated response for smart_hardware_types
 @router.get("/smart-hardware-types", response_model=dict[str, List[SmartHardwareTypeRead]])
+@cache(
+    key_prefix="smart_hardware_types",
+    tags=["smart_hardware_type"],
+    include_query_params=True,
+    raw_response=True,
+    warm=True,
+)
 async def read_smart_hardware_types(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, List[SmartHardwareTypeRead]]:
@@ -55,6 +64,7 @@ async def read_smart_hardware_type(request: Request, id: int, db: Annotated[Asyn
 
 
 @router.patch("/smart-hardware-type/{id}")
+@invalidate_cache(tags=["smart_hardware_type"])
 async def patch_smart_hardware_type(
     request: Request, id: int, values: SmartHardwareTypeUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -75,6 +85,7 @@ async def patch_smart_hardware_type(
 
 
 @router.delete("/smart-hardware-type/{id}")
+@invalidate_cache(tags=["smart_hardware_type"])
 async def erase_smart_hardware_type(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_smart_hardware_type = await crud_smart_hardware_types.get(db=db, id=id, schema_to_select=SmartHardwareTypeRead)
     if db_smart_hardware_type is None:
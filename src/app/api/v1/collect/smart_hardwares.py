@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_smart_hardwares import crud_smart_hardwares
 from ....crud.collect.crud_connections import crud_connections
 from ....crud.collect.crud_template_connections import crud_template_connections
@@ -20,6 +21,7 @@ router = APIRouter(tags=["smart_hardwares"])
 
 
 @router.post("/smart-hardware", status_code=201)
+@invalidate_cache(tags=["smart_hardware"])
 async def write_smart_hardware(
     request: Request, smart_hardware: SmartHardwareCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> SmartHardwareReadJoined:
@@ -74,6 +76,13 @@ async def read_smart_hardwares(
 
 
 @router.get("/smart-hardware/{id}", response_model=SmartHardwareReadJoined)
+@cache(
+    key_prefix="smart_hardware",
+    resource_id_name="id",
+    expiration=60,
+    tags=["smart_hardware", "company"],
+    raw_response=True,
+)
 async def read_smart_hardware(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> SmartHardwareReadJoined:
     db_smart_hardware = await crud_smart_hardwares.get_joined(
         db=db,
@@ -91,6 +100,7 @@ async def read_smart_hardware(request: Request, id: int, db: Annotated[AsyncSess
 
 
 @router.patch("/smart-hardware/{id}")
+@invalidate_cache(tags=["smart_hardware"])
 async def patch_smart_hardware(
     request: Request, id: int, values: SmartHardwareUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -111,6 +121,7 @@ async def patch_smart_hardware(
 
 
 @router.post("/smart-hardware/select-template/{id}")
+@invalidate_cache(tags=["smart_hardware"])
 async def select_template(
     request: Request, id: int, values: SmartHardwareSelectTemplate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -145,6 +156,7 @@ async def select_template(
 
 
 @router.delete("/smart-hardware/{id}")
+@invalidate_cache(tags=["smart_hardware"])
 async def erase_smart_hardware(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_smart_hardware = await crud_smart_hardwares.get(db=db, id=id, schema_to_select=SmartHardwareReadJoined)
     if db_smart_hardware is None:
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_template_connections import crud_template_connections
 from ....schemas.collect.template_connection import TemplateConnectionCreate, TemplateConnectionCreateInternal, TemplateConnectionReadJoined, TemplateConnectionUpdate
 from ....schemas.collect.plc_type import PlcTypeRead
@@ -14,6 +15,7 @@ router = APIRouter(tags=["template-connections"])
 
 
 @router.post("/template-connection", status_code=201)
+@invalidate_cache(tags=["template_connection"])
 async def write_connection(
     request: Request, connection: TemplateConnectionCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> TemplateConnectionReadJoined:
@@ -45,7 +47,16 @@ async def write_connection(
 
 # unpaginated response for connections
 @router.get("/template-connections", response_model=dict[str, List[TemplateConnectionReadJoined]])
+@cache(
+    key_prefix="template_connections",
+    include_query_params=True,
+    expiration=300,
+    tags=["template_connection", "plc_type"],
+    raw_response=True,
+    compress=True,
+)
 async def read_connections(
+    request: Request,
     db: Annotated[AsyncSession, Depends(async_get_db)],
     template_id: int = Query(None)
 ) -> dict[str, List[TemplateConnectionReadJoined]]:
@@ -90,6 +101,7 @@ async def read_connection(request: Request, id: int, db: Annotated[AsyncSession,
 
 
 @router.patch("/template-connection/{id}")
+@invalidate_cache(tags=["template_connection"])
 async def patch_connection(
     request: Request, id: int, values: TemplateConnectionUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -110,6 +122,7 @@ async def patch_connection(
 
 
 @router.delete("/template-connection/{id}")
+@invalidate_cache(tags=["template_connection"])
 async def erase_connection(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_connection = await crud_template_connections.get(db=db, id=id, schema_to_select=TemplateConnectionReadJoined)
     if db_connection is None:
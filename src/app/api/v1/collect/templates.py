@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException, BadRequestException
+from ....core.utils.cache import cache, invalidate_cache
 from ....crud.collect.crud_templates import crud_templates
 from ....crud.collect.crud_template_connections import crud_template_connections
 from ....schemas.collect.template import TemplateCreate, TemplateCreateInternal, TemplateRead, TemplateReadJoined, TemplateUpdate, TemplateCopy, TemplateCopyInternal
@@ -17,6 +18,7 @@ router = APIRouter(tags=["templates"])
 
 
 @router.post("/template", status_code=201)
+@invalidate_cache(tags=["template"])
 async def write_template(
     request: Request, template: TemplateCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> TemplateReadJoined:
@@ -116,6 +118,13 @@ async def read_templates(
 
 
 @router.get("/template/{id}", response_model=TemplateReadJoined)
+@cache(
+    key_prefix="template",
+    resource_id_name="id",
+    expiration=300,
+    tags=["template", "smart_hardware_type"],
+    raw_response=True,
+)
 async def read_template(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> TemplateReadJoined:
     db_template = await crud_templates.get_joined(
         db=db,
@@ -133,6 +142,7 @@ async def read_template(request: Request, id: int, db: Annotated[AsyncSession, D
 
 
 @router.patch("/template/{id}")
+@invalidate_cache(tags=["template"])
 async def patch_template(
     request: Request, id: int, values: TemplateUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -153,6 +163,7 @@ async def patch_template(
 
 
 @router.post("/template/{id}/copy")
+@invalidate_cache(tags=["template"])
 async def copy_template(
     request: Request, id: int, template: TemplateCopy, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -178,6 +189,7 @@ async def copy_template(
 
 
 @router.delete("/template/{id}")
+@invalidate_cache(tags=["template"])
 async def erase_template(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_template = await crud_templates.get(db=db, id=id, schema_to_select=TemplateRead)
     if db_template is None:
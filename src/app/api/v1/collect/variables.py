@@ -2,12 +2,15 @@ from typing import Annotated, Any, cast
 from datetime import datetime, UTC
 
 from fastapi import APIRouter, Depends, Request, Query, Path
-from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
+from fastcrud.paginated import PaginatedListResponse, compute_offset
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException, BadRequestException
+from ....core.schemas import CountModePaginatedListResponse, CursorPaginatedListResponse
+from ....core.utils.cache import cache, invalidate_cache
+from ....core.utils.pagination import CountMode, count_mode_limit, count_mode_response, paginate_by_cursor
 from ....crud.collect.crud_variables import crud_variables
 from ....schemas.collect.variable import VariableCreate, VariableCreateInternal, VariableRead, VariableUpdate
 from ....schemas.collect.group import GroupRead
@@ -18,6 +21,7 @@ router = APIRouter(tags=["variables"])
 
 
 @router.post("/variable", status_code=201)
+@invalidate_cache(tags=["variable"])
 async def write_variable(
     request: Request, variable: VariableCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> VariableRead:
@@ -48,49 +52,77 @@ async def write_variable(
 
 
 # paginated response for variables
-@router.get("/variables", response_model=PaginatedListResponse[VariableRead])
+@router.get(
+    "/variables",
+    response_model=PaginatedListResponse[VariableRead]
+    | CountModePaginatedListResponse[VariableRead]
+    | CursorPaginatedListResponse[VariableRead],
+)
+@cache(
+    key_prefix="variables",
+    include_query_params=True,
+    expiration=300,
+    tags=["variable", "group"],
+    raw_response=True,
+    compress=True,
+)
 async def read_variables(
+    request: Request,
     db: Annotated[AsyncSession, Depends(async_get_db)],
     name: str = Query(""),
     connection_id: int | None = Query(None),
     group_id: int | None = Query(None),
-    page: int | None = Query(1),
-    items_per_page: int | None = Query(10)
+    page: int = Query(1),
+    items_per_page: int = Query(10),
+    cursor: str | None = Query(None, description="Paginate by cursor instead of page, empty for the first page."),
+    count_mode: CountMode = Query(CountMode.EXACT, description="How to count the variables: exact, estimated or none."),
 ) -> dict:
-
+    filters: dict[str, Any] = {"name__contains": name, "connection_id": connection_id, "is_deleted": False}
     if group_id:
-        variables_data = await crud_variables.get_multi_joined(
-            db=db,
-            join_model=Group,
-            join_schema_to_select=GroupRead,
-            nest_joins=True,
-            schema_to_select=VariableRead,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            name__contains=name,
-            group_id=group_id,
-            connection_id = connection_id,
-            is_deleted=False,
-        )
-    else:
-        variables_data = await crud_variables.get_multi_joined(
-            db=db,
-            join_model=Group,
-            join_schema_to_select=GroupRead,
-            nest_joins=True,
-            schema_to_select=VariableRead,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            name__contains=name,
-            connection_id = connection_id,
-            is_deleted=False,
+        filters["group_id"] = group_id
+
+    if cursor is not None:
+
+        async def fetch(ids: list[int]) -> dict[str, Any]:
+            return await crud_variables.get_multi_joined(
+                db=db,
+                join_model=Group,
+                join_schema_to_select=GroupRead,
+                nest_joins=True,
+                schema_to_select=VariableRead,
+                limit=None,
+                return_total_count=False,
+                id__in=ids,
+            )
+
+        # Sorted by (name, id), matching the ix_variable_connection_id_name_id index.
+        return await paginate_by_cursor(
+            crud_variables, db, cursor, items_per_page, sort_column="name", fetch=fetch, **filters
         )
 
-    response: dict[str, Any] = paginated_response(crud_data=variables_data, page=page, items_per_page=items_per_page)
-    return response
+    variables_data = await crud_variables.get_multi_joined(
+        db=db,
+        join_model=Group,
+        join_schema_to_select=GroupRead,
+        nest_joins=True,
+        schema_to_select=VariableRead,
+        offset=compute_offset(page, items_per_page),
+        limit=count_mode_limit(items_per_page, count_mode),
+        return_total_count=count_mode == CountMode.EXACT,
+        **filters,
+    )
+
+    return await count_mode_response(crud_variables, db, variables_data, page, items_per_page, count_mode, **filters)
 
 
 @router.get("/variable/{id}", response_model=VariableRead)
+@cache(
+    key_prefix="variable",
+    resource_id_name="id",
+    expiration=300,
+    tags=["variable", "group"],
+    raw_response=True,
+)
 async def read_variable(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> VariableRead:
     db_variable = await crud_variables.get_joined(
         db=db,
@@ -108,6 +140,7 @@ async def read_variable(request: Request, id: int, db: Annotated[AsyncSession, D
 
 
 @router.patch("/variable/{id}")
+@invalidate_cache(tags=["variable"])
 async def patch_variable(
     request: Request, id: int, values: VariableUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -128,6 +161,7 @@ async def patch_variable(
 
 
 @router.delete("/variable/{id}")
+@invalidate_cache(tags=["variable"])
 async def erase_variable(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_variable = await crud_variables.get(db=db, id=id, schema_to_select=VariableRead)
     if db_variable is None:
@@ -137,6 +171,7 @@ async def erase_variable(request: Request, id: int, db: Annotated[AsyncSession,
     return {"message": "Variable deleted"}
 
 @router.delete("/variables/connection/{connection_id}")
+@invalidate_cache(tags=["variable"])
 async def delete_variables(
     db: Annotated[AsyncSession, Depends(async_get_db)], 
     connection_id: int = Path(..., gt=0),
@@ -2,11 +2,14 @@ from typing import Annotated, Any, cast
 
 from fastapi import APIRouter, Depends, Request, Query
 from fastcrud import JoinConfig
-from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
+from fastcrud.paginated import PaginatedListResponse, compute_offset
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.db.database import async_get_db
+from ....core.db.database import async_get_db, async_get_db_readonly
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.schemas import CountModePaginatedListResponse
+from ....core.utils.cache import cache, invalidate_cache
+from ....core.utils.pagination import CountMode, count_mode_limit, count_mode_response
 from ....crud.equipment.crud_devices import crud_devices
 from ....schemas.equipment.device import DeviceCreate, DeviceCreateInternal, DeviceRead, DeviceUpdate
 from ....schemas.equipment.product import ProductRead
@@ -19,6 +22,7 @@ router = APIRouter(tags=["devices"])
 
 
 @router.post("/device", status_code=201)
+@invalidate_cache(tags=["device"])
 async def write_device(
     request: Request, device: DeviceCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> DeviceRead:
@@ -61,67 +65,53 @@ async def write_device(
 
 
 # paginated response for devices
-@router.get("/devices", response_model=PaginatedListResponse[DeviceRead])
+@router.get("/devices", response_model=PaginatedListResponse[DeviceRead] | CountModePaginatedListResponse[DeviceRead])
 async def read_devices(
-    db: Annotated[AsyncSession, Depends(async_get_db)],
+    db: Annotated[AsyncSession, Depends(async_get_db_readonly)],
     name: str = Query(""),
     product_id: int | None = Query(None),
-    page: int | None = Query(1),
-    items_per_page: int | None = Query(10)
+    page: int = Query(1),
+    items_per_page: int = Query(10),
+    count_mode: CountMode = Query(CountMode.EXACT, description="How to count the devices: exact, estimated or none."),
 ) -> dict:
+    filters: dict[str, Any] = {"name__contains": name, "is_deleted": False}
     if product_id:
-        devices_data = await crud_devices.get_multi_joined(
-            db=db,
-            joins_config=[
-                JoinConfig(
-                    model=Product,
-                    join_schema_to_select=ProductRead,
-                    join_on=Device.product_id == Product.id,
-                    join_prefix="product_"
-                ),
-                JoinConfig(
-                    model=Company,
-                    join_schema_to_select=CompanyRead,
-                    join_on=Device.company_id == Company.id,
-                    join_prefix="company_"
-                ),
-            ],
-            nest_joins=True,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            name__contains=name,
-            product_id=product_id,
-            is_deleted=False
-        )
-    else:
-        devices_data = await crud_devices.get_multi_joined(
-            db=db,
-            joins_config=[
-                JoinConfig(
-                    model=Product,
-                    join_schema_to_select=ProductRead,
-                    join_on=Device.product_id == Product.id,
-                    join_prefix="product_"
-                ),
-                JoinConfig(
-                    model=Company,
-                    join_schema_to_select=CompanyRead,
-                    join_on=Device.company_id == Company.id,
-                    join_prefix="company_"
-                ),
-            ],
-            nest_joins=True,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            name__contains=name,
-            is_deleted=False
-        )
-
-    response: dict[str, Any] = paginated_response(crud_data=devices_data, page=page, items_per_page=items_per_page)
-    return response
+        filters["product_id"] = product_id
+
+    devices_data = await crud_devices.get_multi_joined(
+        db=db,
+        joins_config=[
+            JoinConfig(
+                model=Product,
+                join_schema_to_select=ProductRead,
+                join_on=Device.product_id == Product.id,
+                join_prefix="product_"
+            ),
+            JoinConfig(
+                model=Company,
+                join_schema_to_select=CompanyRead,
+                join_on=Device.company_id == Company.id,
+                join_prefix="company_"
+            ),
+        ],
+        nest_joins=True,
+        offset=compute_offset(page, items_per_page),
+        limit=count_mode_limit(items_per_page, count_mode),
+        return_total_count=count_mode == CountMode.EXACT,
+        **filters,
+    )
+
+    return await count_mode_response(crud_devices, db, devices_data, page, items_per_page, count_mode, **filters)
 
 
 @router.get("/device/{id}", response_model=DeviceRead)
+@cache(
+    key_prefix="device",
+    resource_id_name="id",
+    expiration=300,
+    tags=["device", "product", "company"],
+    raw_response=True,
+)
 async def read_device(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> DeviceRead:
     db_device = await crud_devices.get_joined(
         db=db,
@@ -151,6 +141,7 @@ async def read_device(request: Request, id: int, db: Annotated[AsyncSession, Dep
 
 
 @router.patch("/device/{id}")
+@invalidate_cache(tags=["device"])
 async def patch_device(
     request: Request, id: int, values: DeviceUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -171,6 +162,7 @@ async def patch_device(
 
 
 @router.delete("/device/{id}")
+@invalidate_cache(tags=["device"])
 async def erase_device(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_device = await crud_devices.get(db=db, id=id, schema_to_select=DeviceRead)
     if db_device is None:
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import invalidate_cache
 from ....crud.equipment.crud_products import crud_products
 from ....schemas.equipment.product import ProductCreate, ProductCreateInternal, ProductRead, ProductReadJoined, ProductUpdate
 from ....schemas.equipment.product_group import ProductGroupRead
@@ -15,6 +16,7 @@ router = APIRouter(tags=["products"])
 
 
 @router.post("/product", status_code=201)
+@invalidate_cache(tags=["product"])
 async def write_product(
     request: Request, product: ProductCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> ProductReadJoined:
@@ -85,6 +87,7 @@ async def read_product(request: Request, id: int, db: Annotated[AsyncSession, De
 
 
 @router.patch("/product/{id}")
+@invalidate_cache(tags=["product"])
 async def patch_product(
     request: Request, id: int, values: ProductUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -105,6 +108,7 @@ async def patch_product(
 
 
 @router.delete("/product/{id}")
+@invalidate_cache(tags=["product"])
 async def erase_product(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_product = await crud_products.get(db=db, id=id, schema_to_select=ProductRead)
     if db_product is None:
@@ -17,6 +17,7 @@ from ...core.security import (
     create_refresh_token,
     verify_token,
 )
+from ...middleware.client_cache_middleware import cache_control
 
 router = APIRouter(tags=["login"])
 
@@ -27,6 +28,7 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login", response_model=Token)
+@cache_control("no-store")
 async def login_for_access_token(
     response: Response,
     login_data: LoginRequest,
@@ -50,6 +52,7 @@ async def login_for_access_token(
 
 
 @router.post("/refresh")
+@cache_control("no-store")
 async def refresh_access_token(request: Request, db: AsyncSession = Depends(async_get_db)) -> dict[str, str]:
     refresh_token = request.cookies.get("refresh_token")
     if not refresh_token:
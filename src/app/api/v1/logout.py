@@ -7,11 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import UnauthorizedException
 from ...core.security import blacklist_tokens, oauth2_scheme
+from ...middleware.client_cache_middleware import cache_control
 
 router = APIRouter(tags=["login"])
 
 
 @router.post("/logout")
+@cache_control("no-store")
 async def logout(
     response: Response,
     access_token: str = Depends(oauth2_scheme),
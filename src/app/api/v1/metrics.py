@@ -0,0 +1,29 @@
+import os
+from typing import Any
+
+from fastapi import APIRouter, Depends, Request
+
+from ...api.dependencies import get_current_superuser
+from ...core.db.database import get_pool_stats
+from ...core.utils.cache import get_cache_stats
+from ...core.utils.password_hashing import get_password_hashing_stats
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics/password-hashing", dependencies=[Depends(get_current_superuser)])
+async def read_password_hashing_metrics(request: Request) -> dict[str, Any]:
+    """Thread pool load of the password hashing of the worker serving the request: its queue, rejections and timings."""
+    return {"pid": os.getpid(), **get_password_hashing_stats()}
+
+
+@router.get("/metrics/database", dependencies=[Depends(get_current_superuser)])
+async def read_database_metrics(request: Request) -> dict[str, Any]:
+    """Database connections of the worker serving the request, on the primary and each replica, and checkout waits."""
+    return {"pid": os.getpid(), **get_pool_stats()}
+
+
+@router.get("/metrics/cache", dependencies=[Depends(get_current_superuser)])
+async def read_cache_metrics(request: Request) -> dict[str, Any]:
+    """Hits, misses and fills per cache `key_prefix` as seen by the worker serving the request, with Redis latency."""
+    return {"pid": os.getpid(), **get_cache_stats()}
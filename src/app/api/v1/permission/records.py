@@ -1,11 +1,13 @@
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, Request, Query
-from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
+from fastcrud.paginated import PaginatedListResponse, compute_offset
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.db.database import async_get_db
+from ....core.db.database import async_get_db, async_get_db_readonly
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.schemas import CountModePaginatedListResponse, CursorPaginatedListResponse
+from ....core.utils.pagination import CountMode, count_mode_limit, count_mode_response, paginate_by_cursor
 from ....crud.permission.crud_records import crud_records
 from ....schemas.permission.record import RecordCreate, RecordCreateInternal, RecordRead, RecordUpdate
 from ....schemas.base.company import CompanyRead
@@ -37,36 +39,48 @@ async def write_record(
 
 
 # paginated response for records
-@router.get("/records", response_model=PaginatedListResponse[RecordRead])
+@router.get(
+    "/records",
+    response_model=PaginatedListResponse[RecordRead]
+    | CountModePaginatedListResponse[RecordRead]
+    | CursorPaginatedListResponse[RecordRead],
+)
 async def read_records(
-    db: Annotated[AsyncSession, Depends(async_get_db)],
+    db: Annotated[AsyncSession, Depends(async_get_db_readonly)],
     keyword: str = Query(""),
     license_id: int | None = None,
-    page: int | None = Query(1),
-    items_per_page: int | None = Query(10)
+    page: int = Query(1),
+    items_per_page: int = Query(10),
+    cursor: str | None = Query(None, description="Paginate by cursor instead of page, empty for the first page."),
+    count_mode: CountMode = Query(CountMode.EXACT, description="How to count the records: exact, estimated or none."),
 ) -> dict:
+    filters: dict[str, Any] = {"content__contains": keyword, "is_deleted": False}
     if license_id:
-        records_data = await crud_records.get_multi(
-            db=db,
+        filters["license_id"] = license_id
+
+    if cursor is not None:
+        # Newest first, sorted by (created_at, id), matching the ix_record_created_at_id indexes.
+        return await paginate_by_cursor(
+            crud_records,
+            db,
+            cursor,
+            items_per_page,
+            sort_column="created_at",
+            descending=True,
             schema_to_select=RecordRead,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            license_id=license_id,
-            content__contains=keyword,
-            is_deleted=False,
-        )
-    else:
-        records_data = await crud_records.get_multi(
-            db=db,
-            schema_to_select=RecordRead,
-            offset=compute_offset(page, items_per_page),
-            limit=items_per_page,
-            content__contains=keyword,
-            is_deleted=False,
+            **filters,
         )
 
-    response: dict[str, Any] = paginated_response(crud_data=records_data, page=page, items_per_page=items_per_page)
-    return response
+    records_data = await crud_records.get_multi(
+        db=db,
+        schema_to_select=RecordRead,
+        offset=compute_offset(page, items_per_page),
+        limit=count_mode_limit(items_per_page, count_mode),
+        return_total_count=count_mode == CountMode.EXACT,
+        **filters,
+    )
+
+    return await count_mode_response(crud_records, db, records_data, page, items_per_page, count_mode, **filters)
 
 
 @router.get("/record/{id}", response_model=RecordRead)
@@ -5,6 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.cache import cache, invalidate_cache
+from ....core.utils.permissions import invalidate_permissions
 from ....crud.permission.crud_resources import crud_resources
 from ....schemas.permission.resource import ResourceCreate, ResourceCreateInternal, ResourceRead, ResourceUpdate, ResourceTreeNode
 
@@ -12,6 +14,7 @@ router = APIRouter(tags=["resources"])
 
 
 @router.post("/resource", status_code=201)
+@invalidate_cache(tags=["resource"])
 async def write_resource(
     request: Request, resource: ResourceCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> ResourceRead:
@@ -31,11 +34,13 @@ async def write_resource(
     if resource_read is None:
         raise NotFoundException("Created resource not found")
 
+    await invalidate_permissions()
     return cast(ResourceRead, resource_read)
 
 
 # unpaginated response for resources
 @router.get("/resources", response_model=dict[str, List[ResourceRead]])
+@cache(key_prefix="resources", tags=["resource"], include_query_params=True, raw_response=True, warm=True)
 async def read_resources(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[ResourceRead]:
@@ -55,6 +60,7 @@ async def read_resource(request: Request, id: int, db: Annotated[AsyncSession, D
 
 
 @router.patch("/resource/{id}")
+@invalidate_cache(tags=["resource"])
 async def patch_resource(
     request: Request, id: int, values: ResourceUpdate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -71,21 +77,31 @@ async def patch_resource(
                 raise DuplicateValueException("Resource Name not available")
 
     await crud_resources.update(db=db, object=values, id=id)
+    await invalidate_permissions()
     return {"message": "Resource updated"}
 
 
 @router.delete("/resource/{id}")
+@invalidate_cache(tags=["resource"])
 async def erase_resource(request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict[str, str]:
     db_resource = await crud_resources.get(db=db, id=id, schema_to_select=ResourceRead)
     if db_resource is None:
         raise NotFoundException("Resource not found")
 
     await crud_resources.delete(db=db, id=id)
+    await invalidate_permissions()
     return {"message": "Resource deleted"}
 
 
 # Hierarchical tree structure for resources
 @router.get("/resources/tree", response_model=dict[str, List[ResourceTreeNode]])
+@cache(
+    key_prefix="resources_tree",
+    tags=["resource"],
+    include_query_params=True,
+    raw_response=True,
+    warm=True,
+)
 async def read_resources_tree(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> List[ResourceTreeNode]:
@@ -8,6 +8,8 @@ from sqlalchemy.orm import selectinload
 
 from ....core.db.database import async_get_db
 from ....core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ....core.utils.permissions import invalidate_permissions
+from ....core.utils.principals import invalidate_principals
 from ....crud.permission.crud_roles import crud_roles
 from ....schemas.permission.role import RoleCreate, RoleCreateInternal, RoleRead, RoleReadJoined, RoleUpdate
 from ....schemas.base.company import CompanyRead
@@ -135,6 +137,8 @@ async def patch_role(
         await db.commit()
         # await db.refresh(db_role)
 
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "Role updated"}
 
 
@@ -145,4 +149,6 @@ async def erase_role(request: Request, id: int, db: Annotated[AsyncSession, Depe
         raise NotFoundException("Role not found")
 
     await crud_roles.delete(db=db, id=id)
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "Role deleted"}
@@ -1,16 +1,21 @@
 from typing import Annotated, Any, cast
 
 from fastapi import APIRouter, Depends, Request, Query
-from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
+from fastcrud.paginated import PaginatedListResponse, compute_offset
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from ...api.dependencies import get_current_superuser, get_current_user
-from ...core.db.database import async_get_db
+from ...core.db.database import async_get_db, async_get_db_readonly
 from ...core.exceptions.http_exceptions import DuplicateValueException, ForbiddenException, NotFoundException
-from ...core.security import blacklist_token, get_password_hash, oauth2_scheme
+from ...core.schemas import CountModePaginatedListResponse
+from ...core.security import blacklist_token, hash_password, oauth2_scheme
+from ...core.utils.pagination import CountMode, count_mode_limit, count_mode_response
+from ...core.utils.permissions import invalidate_permissions
+from ...core.utils.principals import invalidate_principals
 from ...crud.crud_users import crud_users
+from ...middleware.client_cache_middleware import cache_control
 from ...schemas.user import UserCreate, UserCreateInternal, UserRead, UserReadJoined, UserUpdate
 from ...models.permission.role import Role
 from ...models.user import User
@@ -39,7 +44,7 @@ async def write_user(
 
     roles = user_internal_dict.pop("roles", [])
     user_internal_dict["update_user"] = None
-    user_internal_dict["hashed_password"] = get_password_hash(password=user_internal_dict["password"])
+    user_internal_dict["hashed_password"] = await hash_password(password=user_internal_dict["password"])
     del user_internal_dict["password"]
 
     user_internal = UserCreateInternal(**user_internal_dict)
@@ -60,52 +65,53 @@ async def write_user(
     return cast(UserRead, created_user)
 
 
-@router.get("/users", response_model=PaginatedListResponse[UserReadJoined])
+@router.get(
+    "/users", response_model=PaginatedListResponse[UserReadJoined] | CountModePaginatedListResponse[UserReadJoined]
+)
 async def read_users(
-    db: Annotated[AsyncSession, Depends(async_get_db)],
+    db: Annotated[AsyncSession, Depends(async_get_db_readonly)],
     name: str = Query(""),
     company_id: int | None = Query(None),
-    page: int | None = Query(1),
-    items_per_page: int | None = Query(10)
+    page: int = Query(1),
+    items_per_page: int = Query(10),
+    count_mode: CountMode = Query(CountMode.EXACT, description="How to count the users: exact, estimated or none."),
 ) -> dict:
+    filters: dict[str, Any] = {"is_deleted": False, "name__contains": name}
+    conditions = [User.is_deleted == False, User.name.contains(name)]
     if company_id:
-        result = await db.execute(
-            select(User)
-            .options(
-                selectinload(User.roles),
-                selectinload(User.company)
-            )
-            .offset(compute_offset(page, items_per_page))
-            .limit(items_per_page)
-            .where(User.is_deleted == False, User.name.contains(name), User.company_id == company_id)
-        )
-        total_count = await crud_users.count(db=db, is_deleted=False, name__contains=name, company_id=company_id)
-    else:
-        result = await db.execute(
-            select(User)
-            .options(
-                selectinload(User.roles),
-                selectinload(User.company)
-            )
-            .offset(compute_offset(page, items_per_page))
-            .limit(items_per_page)
-            .where(User.is_deleted == False, User.name.contains(name))
+        filters["company_id"] = company_id
+        conditions.append(User.company_id == company_id)
+
+    result = await db.execute(
+        select(User)
+        .options(
+            selectinload(User.roles),
+            selectinload(User.company)
         )
-        total_count = await crud_users.count(db=db, is_deleted=False, name__contains=name)
-
-    users = result.scalars().all()
+        .offset(compute_offset(page, items_per_page))
+        .limit(count_mode_limit(items_per_page, count_mode))
+        .where(*conditions)
+    )
 
-    users_data = {}
-    users_data["data"] = users
-    users_data["total_count"] = total_count
+    users_data: dict[str, Any] = {"data": result.scalars().all()}
+    if count_mode == CountMode.EXACT:
+        users_data["total_count"] = await crud_users.count(db=db, **filters)
 
-    response: dict[str, Any] = paginated_response(crud_data=users_data, page=page, items_per_page=items_per_page)
-    return response
+    return await count_mode_response(crud_users, db, users_data, page, items_per_page, count_mode, **filters)
 
 
 @router.get("/user/me/", response_model=UserRead)
-async def read_users_me(request: Request, current_user: Annotated[dict, Depends(get_current_user)]) -> dict:
-    return current_user
+@cache_control("no-store")
+async def read_users_me(
+    request: Request,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+) -> UserRead:
+    db_user = await crud_users.get(db=db, id=current_user["id"], is_deleted=False, schema_to_select=UserRead)
+    if db_user is None:
+        raise NotFoundException("User not found")
+
+    return cast(UserRead, db_user)
 
 
 @router.get("/user/{username}", response_model=UserRead)
@@ -161,6 +167,8 @@ async def patch_user(
         await db.commit()
         # await db.refresh(db_user)
 
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "User updated"}
 
 
@@ -182,6 +190,8 @@ async def erase_user(
     db_user.roles.clear()  # Clear existing roles
     await crud_users.delete(db=db, id=id)
     # await blacklist_token(token=token, db=db)
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "User deleted"}
 
 
@@ -199,4 +209,6 @@ async def erase_db_user(
 
     await crud_users.db_delete(db=db, id=id)
     await blacklist_token(token=token, db=db)
+    await invalidate_principals()
+    await invalidate_permissions()
     return {"message": "User deleted from the database"}
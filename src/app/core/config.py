@@ -24,10 +24,30 @@ class CryptSettings(BaseSettings):
     ALGORITHM: str = config("ALGORITHM", default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30)
     REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", default=7)
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = config("TOKEN_BLACKLIST_BLOOM_CAPACITY", default=100000)
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = config("TOKEN_BLACKLIST_BLOOM_ERROR_RATE", default=0.001)
+    PRINCIPAL_CACHE_TTL: int = config("PRINCIPAL_CACHE_TTL", default=30)
+    PRINCIPAL_CACHE_MAX_SIZE: int = config("PRINCIPAL_CACHE_MAX_SIZE", default=10000)
+    PERMISSION_CACHE_TTL: int = config("PERMISSION_CACHE_TTL", default=300)
+    PERMISSION_CACHE_MAX_SIZE: int = config("PERMISSION_CACHE_MAX_SIZE", default=10000)
+    PASSWORD_HASH_WORKERS: int = config("PASSWORD_HASH_WORKERS", default=4)
+    PASSWORD_HASH_MAX_QUEUE: int = config("PASSWORD_HASH_MAX_QUEUE", default=100)
 
 
 class DatabaseSettings(BaseSettings):
-    pass
+    DATABASE_POOL_SIZE: int = config("DATABASE_POOL_SIZE", default=5)
+    DATABASE_MAX_OVERFLOW: int = config("DATABASE_MAX_OVERFLOW", default=10)
+    DATABASE_POOL_TIMEOUT: float = config("DATABASE_POOL_TIMEOUT", default=30)
+    DATABASE_POOL_RECYCLE: int = config("DATABASE_POOL_RECYCLE", default=1800)
+    DATABASE_POOL_PRE_PING: bool = config("DATABASE_POOL_PRE_PING", default=True)
+    DATABASE_POOL_PREWARM: int = config("DATABASE_POOL_PREWARM", default=5)
+    DATABASE_CONNECT_TIMEOUT: float = config("DATABASE_CONNECT_TIMEOUT", default=10)
+    DATABASE_STATEMENT_CACHE_SIZE: int = config("DATABASE_STATEMENT_CACHE_SIZE", default=100)
+    DATABASE_REPLICA_URIS: str = config("DATABASE_REPLICA_URIS", default="")
+    DATABASE_REPLICA_MAX_LAG: float = config("DATABASE_REPLICA_MAX_LAG", default=5)
+    DATABASE_REPLICA_CHECK_INTERVAL: float = config("DATABASE_REPLICA_CHECK_INTERVAL", default=5)
+    DATABASE_READ_YOUR_WRITES_WINDOW: int = config("DATABASE_READ_YOUR_WRITES_WINDOW", default=10)
+    PAGINATION_COUNT_CAP: int = config("PAGINATION_COUNT_CAP", default=10000)
 
 
 class SQLiteSettings(DatabaseSettings):
@@ -74,10 +94,17 @@ class RedisCacheSettings(BaseSettings):
     REDIS_CACHE_HOST: str = config("REDIS_CACHE_HOST", default="localhost")
     REDIS_CACHE_PORT: int = config("REDIS_CACHE_PORT", default=6379)
     REDIS_CACHE_URL: str = f"redis://{REDIS_CACHE_HOST}:{REDIS_CACHE_PORT}"
+    REDIS_CACHE_LOCAL_ENABLED: bool = config("REDIS_CACHE_LOCAL_ENABLED", default=False)
+    REDIS_CACHE_LOCAL_MAX_SIZE: int = config("REDIS_CACHE_LOCAL_MAX_SIZE", default=1024)
+    REDIS_CACHE_LOCAL_TTL: int = config("REDIS_CACHE_LOCAL_TTL", default=5)
+    REDIS_CACHE_WARM_ON_STARTUP: bool = config("REDIS_CACHE_WARM_ON_STARTUP", default=False)
+    REDIS_CACHE_TRACKING_ENABLED: bool = config("REDIS_CACHE_TRACKING_ENABLED", default=False)
+    REDIS_CACHE_TRACKING_BCAST: bool = config("REDIS_CACHE_TRACKING_BCAST", default=False)
+    REDIS_CACHE_TRACKING_PREFIXES: str = config("REDIS_CACHE_TRACKING_PREFIXES", default="")
 
 
 class ClientSideCacheSettings(BaseSettings):
-    CLIENT_CACHE_MAX_AGE: int = config("CLIENT_CACHE_MAX_AGE", default=60)
+    CLIENT_CACHE_MAX_AGE: int = config("CLIENT_CACHE_MAX_AGE", default=0)
 
 
 class RedisQueueSettings(BaseSettings):
@@ -85,15 +112,41 @@ class RedisQueueSettings(BaseSettings):
     REDIS_QUEUE_PORT: int = config("REDIS_QUEUE_PORT", default=6379)
 
 
+class RateLimitAlgorithm(Enum):
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_LOG = "sliding_log"
+    GCRA = "gcra"
+
+
+class RateLimitFailureMode(Enum):
+    FAIL_OPEN = "fail_open"
+    LOCAL = "local"
+
+
 class RedisRateLimiterSettings(BaseSettings):
     REDIS_RATE_LIMIT_HOST: str = config("REDIS_RATE_LIMIT_HOST", default="localhost")
     REDIS_RATE_LIMIT_PORT: int = config("REDIS_RATE_LIMIT_PORT", default=6379)
     REDIS_RATE_LIMIT_URL: str = f"redis://{REDIS_RATE_LIMIT_HOST}:{REDIS_RATE_LIMIT_PORT}"
+    RATE_LIMIT_ALGORITHM: RateLimitAlgorithm = config("RATE_LIMIT_ALGORITHM", default=RateLimitAlgorithm.FIXED_WINDOW)
+    RATE_LIMIT_APPROXIMATE: bool = config("RATE_LIMIT_APPROXIMATE", default=False)
+    RATE_LIMIT_APPROXIMATE_ERROR: float = config("RATE_LIMIT_APPROXIMATE_ERROR", default=0.1)
+    RATE_LIMIT_SYNC_INTERVAL_MS: int = config("RATE_LIMIT_SYNC_INTERVAL_MS", default=100)
+    RATE_LIMIT_REDIS_TIMEOUT_MS: int = config("RATE_LIMIT_REDIS_TIMEOUT_MS", default=250)
+    RATE_LIMIT_FAILURE_MODE: RateLimitFailureMode = config(
+        "RATE_LIMIT_FAILURE_MODE", default=RateLimitFailureMode.LOCAL
+    )
+    RATE_LIMIT_BREAKER_THRESHOLD: int = config("RATE_LIMIT_BREAKER_THRESHOLD", default=5)
+    RATE_LIMIT_BREAKER_RECOVERY: int = config("RATE_LIMIT_BREAKER_RECOVERY", default=30)
 
 
 class DefaultRateLimitSettings(BaseSettings):
     DEFAULT_RATE_LIMIT_LIMIT: int = config("DEFAULT_RATE_LIMIT_LIMIT", default=10)
     DEFAULT_RATE_LIMIT_PERIOD: int = config("DEFAULT_RATE_LIMIT_PERIOD", default=3600)
+    COMPANY_RATE_LIMIT_LIMIT: int = config("COMPANY_RATE_LIMIT_LIMIT", default=0)
+    COMPANY_RATE_LIMIT_PERIOD: int = config("COMPANY_RATE_LIMIT_PERIOD", default=3600)
+    CONCURRENCY_LIMIT_PER_USER: int = config("CONCURRENCY_LIMIT_PER_USER", default=0)
+    CONCURRENCY_LIMIT_PER_COMPANY: int = config("CONCURRENCY_LIMIT_PER_COMPANY", default=0)
+    CONCURRENCY_SLOT_TIMEOUT: int = config("CONCURRENCY_SLOT_TIMEOUT", default=60)
 
 
 class CRUDAdminSettings(BaseSettings):
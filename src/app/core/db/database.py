@@ -1,10 +1,17 @@
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
 
+from fastapi import Request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 from ..config import settings
+from ..utils.metrics import Histogram
+from .replicas import ReplicaSet
 
 
 class Base(DeclarativeBase, MappedAsDataclass):
@@ -15,11 +22,113 @@ DATABASE_URI = settings.POSTGRES_URI
 DATABASE_PREFIX = settings.POSTGRES_ASYNC_PREFIX
 DATABASE_URL = f"{DATABASE_PREFIX}{DATABASE_URI}"
 
-async_engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+pool_wait_time = Histogram(POOL_WAIT_BUCKETS)
+pool_timeouts = 0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool recording how long each checkout waits, including the time to open a new connection."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        global pool_timeouts
+
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts += 1
+            raise
+        finally:
+            pool_wait_time.observe(time.perf_counter() - start)
+
+
+connect_args: dict[str, Any] = {}
+if "asyncpg" in DATABASE_PREFIX:
+    connect_args = {
+        "timeout": settings.DATABASE_CONNECT_TIMEOUT,
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+    }
+
+engine_kwargs: dict[str, Any] = {
+    "echo": False,
+    "future": True,
+    "poolclass": InstrumentedQueuePool,
+    "pool_size": settings.DATABASE_POOL_SIZE,
+    "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+    "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    "connect_args": connect_args,
+}
+
+async_engine = create_async_engine(DATABASE_URL, **engine_kwargs)
 
 local_session = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
 
+REPLICA_URLS = [f"{DATABASE_PREFIX}{uri.strip()}" for uri in settings.DATABASE_REPLICA_URIS.split(",") if uri.strip()]
+READ_PRIMARY_COOKIE = "read_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+replicas = ReplicaSet(REPLICA_URLS, max_lag=settings.DATABASE_REPLICA_MAX_LAG, **engine_kwargs)
+
 
 async def async_get_db() -> AsyncGenerator[AsyncSession, None]:
     async with local_session() as db:
         yield db
+
+
+async def async_get_db_readonly(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Yield a session on a read replica, for endpoints that only read.
+
+    The primary is used instead when no replica lags less than `DATABASE_REPLICA_MAX_LAG` seconds behind it, for
+    requests that are not reads, and for `DATABASE_READ_YOUR_WRITES_WINDOW` seconds after the client wrote, as marked
+    by the `READ_PRIMARY_COOKIE` cookie that `ReadYourWritesMiddleware` sets, so clients always see their own writes.
+
+    Endpoints cached with `cache` must use `async_get_db` instead: an entry filled from a lagging replica right after
+    a write's invalidation would be served to every client until it expires, and cache hits never reach this
+    dependency to honor the cookie.
+    """
+    session = local_session
+    if request.method in SAFE_METHODS and READ_PRIMARY_COOKIE not in request.cookies:
+        session = replicas.choose() or local_session
+
+    async with session() as db:
+        yield db
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Return the connection pool statistics of this worker.
+
+    Returns
+    -------
+    Dict[str, Any]
+        - "size" and "max_overflow": the configured number of connections kept open, and opened on top of them.
+        - "checked_out": connections currently used by requests, and "idle" those waiting in the pool.
+        - "overflow": connections currently open on top of "size", negative while the pool is not full yet.
+        - "timeouts": number of checkouts that gave up after `DATABASE_POOL_TIMEOUT` seconds.
+        - "wait_time": cumulative histogram, in seconds, of the time checkouts waited for a connection, replicas
+          included.
+        - "replicas": for each replica, its host, "checked_out" and "idle" connections, and its last measured "lag"
+          in seconds, None if it could not be measured.
+    """
+    pool = async_engine.pool
+    return {
+        "size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
+        "idle": pool.checkedin(),  # type: ignore[attr-defined]
+        "overflow": pool.overflow(),  # type: ignore[attr-defined]
+        "timeouts": pool_timeouts,
+        "wait_time": pool_wait_time.snapshot(),
+        "replicas": [
+            {
+                "host": engine.url.host,
+                "checked_out": engine.pool.checkedout(),  # type: ignore[attr-defined]
+                "idle": engine.pool.checkedin(),  # type: ignore[attr-defined]
+                "lag": lag,
+            }
+            for engine, lag in zip(replicas.engines, replicas.lags)
+        ],
+    }
@@ -0,0 +1,86 @@
+import asyncio
+from itertools import count
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when everything received was replayed. On a server that is not a
+# replica both sides are NULL, which also reads as 0.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """Read replicas, load balanced round robin among those lagging less than `max_lag` behind the primary.
+
+    Replication lag is measured by `check_lag`, which `run_lag_checks` calls periodically. A replica is only used once
+    it was measured, and stops being used as soon as it lags too much or cannot be reached, so reads fall back to the
+    primary when no replica is fresh enough.
+
+    Parameters
+    ----------
+    urls: list[str]
+        Database URLs of the replicas.
+    max_lag: float
+        Replication lag (in seconds) above which a replica is not used.
+    **engine_kwargs: Any
+        Keyword arguments for `create_async_engine`, usually the primary's pool settings.
+    """
+
+    def __init__(self, urls: list[str], max_lag: float = 5, **engine_kwargs: Any) -> None:
+        self.max_lag = max_lag
+        self.engines: list[AsyncEngine] = [create_async_engine(url, **engine_kwargs) for url in urls]
+        self.sessions = [
+            async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False) for engine in self.engines
+        ]
+        self.lags: list[float | None] = [None] * len(self.engines)
+        self.lag_checker: asyncio.Task | None = None
+        self._next = count()
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def choose(self) -> async_sessionmaker[AsyncSession] | None:
+        """Return the session factory of the next replica fresh enough to serve reads, or None if there is none."""
+        healthy = [index for index, lag in enumerate(self.lags) if lag is not None and lag <= self.max_lag]
+        if not healthy:
+            return None
+
+        return self.sessions[healthy[next(self._next) % len(healthy)]]
+
+    async def check_lag(self) -> None:
+        """Measure the replication lag of every replica. Replicas that cannot be reached are marked unusable."""
+        await asyncio.gather(*(self._check_replica(index) for index in range(len(self.engines))))
+
+    async def _check_replica(self, index: int) -> None:
+        engine = self.engines[index]
+        try:
+            async with engine.connect() as conn:
+                lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar_one())
+        except Exception as e:
+            if self.lags[index] is not None:
+                logger.warning(f"Replica {engine.url.host} is unreachable, reading from the primary: {e}")
+            self.lags[index] = None
+            return
+
+        if lag > self.max_lag and (self.lags[index] or 0) <= self.max_lag:
+            logger.warning(f"Replica {engine.url.host} lags {lag:.1f}s behind the primary, reading from others.")
+        self.lags[index] = lag
+
+    async def run_lag_checks(self, interval: float) -> None:
+        """Check the replication lag every `interval` seconds, for the lifetime of the worker."""
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
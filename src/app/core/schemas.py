@@ -2,6 +2,8 @@ import uuid as uuid_pkg
 from datetime import UTC, datetime
 from typing import Any
 
+from fastcrud.paginated import ListResponse
+from fastcrud.paginated.schemas import SchemaType
 from pydantic import BaseModel, Field, field_serializer
 
 
@@ -72,3 +74,17 @@ class TokenBlacklistCreate(TokenBlacklistBase):
 
 class TokenBlacklistUpdate(TokenBlacklistBase):
     pass
+
+
+class CursorPaginatedListResponse(ListResponse[SchemaType]):
+    items_per_page: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+class CountModePaginatedListResponse(ListResponse[SchemaType]):
+    total_count: int | None = None
+    total_count_capped: bool = False
+    has_more: bool
+    page: int | None = None
+    items_per_page: int | None = None
@@ -12,6 +12,7 @@ from ..crud.crud_users import crud_users
 from .config import settings
 from .db.crud_token_blacklist import crud_token_blacklist
 from .schemas import TokenBlacklistCreate, TokenData
+from .utils import blacklist, password_hashing
 
 SECRET_KEY: SecretStr = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -27,11 +28,20 @@ class TokenType(str, Enum):
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    correct_password: bool = await password_hashing.run(
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
     return correct_password
 
 
+async def hash_password(password: str) -> str:
+    hashed_password: bytes = await password_hashing.run(bcrypt.hashpw, password.encode(), bcrypt.gensalt())
+    return hashed_password.decode()
+
+
 def get_password_hash(password: str) -> str:
+    """Hash a password in the calling thread. Request handlers must use `hash_password`, which does not block the
+    event loop."""
     hashed_password: str = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
     return hashed_password
 
@@ -91,7 +101,7 @@ async def verify_token(token: str, expected_token_type: TokenType, db: AsyncSess
     TokenData | None
         TokenData instance if the token is valid, None otherwise.
     """
-    is_blacklisted = await crud_token_blacklist.exists(db, token=token)
+    is_blacklisted = await blacklist.contains(token, db)
     if is_blacklisted:
         return None
 
@@ -122,11 +132,7 @@ async def blacklist_tokens(access_token: str, refresh_token: str, db: AsyncSessi
         Database session for performing database operations.
     """
     for token in [access_token, refresh_token]:
-        payload = jwt.decode(token, SECRET_KEY.get_secret_value(), algorithms=[ALGORITHM])
-        exp_timestamp = payload.get("exp")
-        if exp_timestamp is not None:
-            expires_at = datetime.fromtimestamp(exp_timestamp)
-            await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+        await blacklist_token(token, db)
 
 
 async def blacklist_token(token: str, db: AsyncSession) -> None:
@@ -134,4 +140,7 @@ async def blacklist_token(token: str, db: AsyncSession) -> None:
     exp_timestamp = payload.get("exp")
     if exp_timestamp is not None:
         expires_at = datetime.fromtimestamp(exp_timestamp)
-        await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+        # A retry after the announcement failed finds the token already stored.
+        if not await crud_token_blacklist.exists(db, token=token):
+            await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+        await blacklist.add(token, exp_timestamp)
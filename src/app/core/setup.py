@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import AsyncGenerator, Callable
 from contextlib import _AsyncGeneratorContextManager, asynccontextmanager
 from typing import Any
@@ -15,6 +16,7 @@ from fastapi.openapi.utils import get_openapi
 from ..api.dependencies import get_current_superuser
 from ..core.utils.rate_limit import rate_limiter
 from ..middleware.client_cache_middleware import ClientCacheMiddleware
+from ..middleware.read_your_writes_middleware import ReadYourWritesMiddleware
 from ..models import *  # noqa: F403
 from .config import (
     AppSettings,
@@ -27,9 +29,13 @@ from .config import (
     RedisRateLimiterSettings,
     settings,
 )
-from .db.database import Base
+from .db.database import Base, replicas
 from .db.database import async_engine as engine
-from .utils import cache, queue
+from .logger import logging
+from .utils import blacklist, cache, permissions, principals, queue
+from .utils.pubsub import cancel_task
+
+logger = logging.getLogger(__name__)
 
 
 # -------------- database --------------
@@ -38,13 +44,99 @@ async def create_tables() -> None:
         await conn.run_sync(Base.metadata.create_all)
 
 
+async def warm_database_pool(size: int) -> None:
+    """Open `size` connections at once and return them to the pool, so the first requests do not pay for them.
+
+    The pool keeps at most `DATABASE_POOL_SIZE` idle connections, so warming more would close the extra ones.
+    A database that cannot be reached is only logged, since requests will open connections on demand anyway.
+    """
+    size = min(size, settings.DATABASE_POOL_SIZE)
+    if size <= 0:
+        return
+
+    connections = [engine.connect() for _ in range(size)]
+    results = await asyncio.gather(*(connection.start() for connection in connections), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for connection, result in zip(connections, results):
+        if not isinstance(result, BaseException):
+            await connection.close()
+
+    if errors:
+        logger.warning(f"Could not warm {len(errors)} of {size} database connections: {errors[0]}")
+
+
+async def start_replica_lag_checks() -> None:
+    if len(replicas) == 0:
+        return
+
+    await replicas.check_lag()
+    replicas.lag_checker = asyncio.create_task(replicas.run_lag_checks(settings.DATABASE_REPLICA_CHECK_INTERVAL))
+
+
+async def close_replicas() -> None:
+    await cancel_task(replicas.lag_checker)
+    replicas.lag_checker = None
+
+    await replicas.dispose()
+
+
 # -------------- cache --------------
 async def create_redis_cache_pool() -> None:
-    cache.pool = redis.ConnectionPool.from_url(settings.REDIS_CACHE_URL)
+    if settings.REDIS_CACHE_TRACKING_ENABLED:
+        prefixes = [prefix.strip() for prefix in settings.REDIS_CACHE_TRACKING_PREFIXES.split(",") if prefix.strip()]
+        cache.pool = cache.TrackingConnectionPool.from_url(
+            settings.REDIS_CACHE_URL,
+            redis_connect_func=cache.tracking_connect_func(
+                bcast=settings.REDIS_CACHE_TRACKING_BCAST, prefixes=prefixes
+            ),
+        )
+    else:
+        cache.pool = redis.ConnectionPool.from_url(settings.REDIS_CACHE_URL)
     cache.client = redis.Redis.from_pool(cache.pool)  # type: ignore
 
+    if settings.REDIS_CACHE_LOCAL_ENABLED or settings.REDIS_CACHE_TRACKING_ENABLED:
+        cache.local_cache = cache.LocalCache(
+            max_size=settings.REDIS_CACHE_LOCAL_MAX_SIZE, ttl=settings.REDIS_CACHE_LOCAL_TTL
+        )
+
+    if settings.REDIS_CACHE_TRACKING_ENABLED:
+        cache.tracking_enabled = True
+        cache.tracking_bcast = settings.REDIS_CACHE_TRACKING_BCAST
+        cache.invalidation_listener = asyncio.create_task(cache.listen_for_tracked_invalidations())
+    elif settings.REDIS_CACHE_LOCAL_ENABLED:
+        cache.invalidation_listener = asyncio.create_task(cache.listen_for_invalidations())
+
+
+async def start_auth_listeners() -> None:
+    blacklist.client = cache.client
+    blacklist.listener = asyncio.create_task(blacklist.listen_for_blacklisted_tokens())
+    principals.client = cache.client
+    principals.listener = asyncio.create_task(principals.listen_for_invalidations())
+    permissions.client = cache.client
+    permissions.listener = asyncio.create_task(permissions.listen_for_invalidations())
+
 
 async def close_redis_cache_pool() -> None:
+    await cancel_task(blacklist.listener)
+    blacklist.listener = None
+    blacklist.client = None
+    blacklist.bloom_filter = None
+
+    await cancel_task(principals.listener)
+    principals.listener = None
+    principals.client = None
+    principals.clear_principals()
+
+    await cancel_task(permissions.listener)
+    permissions.listener = None
+    permissions.client = None
+    permissions.clear_permissions()
+
+    await cancel_task(cache.invalidation_listener)
+    cache.invalidation_listener = None
+    cache.local_cache = None
+    cache.tracking_enabled = False
+    cache.tracking_bcast = False
     if cache.client is not None:
         await cache.client.aclose()  # type: ignore
 
@@ -61,12 +153,40 @@ async def close_redis_queue_pool() -> None:
 
 # -------------- rate limit --------------
 async def create_redis_rate_limit_pool() -> None:
-    rate_limiter.initialize(settings.REDIS_RATE_LIMIT_URL)  # type: ignore
+    rate_limiter.initialize(
+        settings.REDIS_RATE_LIMIT_URL,  # type: ignore
+        algorithm=settings.RATE_LIMIT_ALGORITHM,  # type: ignore
+        approximate=settings.RATE_LIMIT_APPROXIMATE,  # type: ignore
+        approximate_error=settings.RATE_LIMIT_APPROXIMATE_ERROR,  # type: ignore
+        failure_mode=settings.RATE_LIMIT_FAILURE_MODE,  # type: ignore
+        timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_MS / 1000,  # type: ignore
+        breaker_threshold=settings.RATE_LIMIT_BREAKER_THRESHOLD,  # type: ignore
+        breaker_recovery=settings.RATE_LIMIT_BREAKER_RECOVERY,  # type: ignore
+    )
+    rate_limiter.rules_listener = asyncio.create_task(rate_limiter.listen_for_rule_invalidations())
+    if settings.RATE_LIMIT_APPROXIMATE:  # type: ignore
+        rate_limiter.sync_task = asyncio.create_task(
+            rate_limiter.run_sync(settings.RATE_LIMIT_SYNC_INTERVAL_MS / 1000)  # type: ignore
+        )
 
 
 async def close_redis_rate_limit_pool() -> None:
+    await cancel_task(rate_limiter.rules_listener)
+    rate_limiter.rules_listener = None
+    rate_limiter.clear_rules()
+
+    if rate_limiter.sync_task is not None:
+        await cancel_task(rate_limiter.sync_task)
+        rate_limiter.sync_task = None
+
+        try:
+            await rate_limiter.sync()
+        except Exception as e:
+            logger.warning(f"Could not flush local rate limit counters on shutdown: {e}")
     if rate_limiter.client is not None:
         await rate_limiter.client.aclose()  # type: ignore
+    if rate_limiter.pubsub_client is not None:
+        await rate_limiter.pubsub_client.aclose()  # type: ignore
 
 
 # -------------- application --------------
@@ -99,6 +219,10 @@ def lifespan_factory(
         await set_threadpool_tokens()
 
         try:
+            if isinstance(settings, DatabaseSettings):
+                await warm_database_pool(settings.DATABASE_POOL_PREWARM)
+                await start_replica_lag_checks()
+
             if isinstance(settings, RedisCacheSettings):
                 await create_redis_cache_pool()
 
@@ -111,11 +235,20 @@ def lifespan_factory(
             if create_tables_on_start:
                 await create_tables()
 
+            if isinstance(settings, RedisCacheSettings):
+                await start_auth_listeners()
+
+            if isinstance(settings, RedisCacheSettings) and settings.REDIS_CACHE_WARM_ON_STARTUP:
+                await cache.warm_cache(app.routes)
+
             initialization_complete.set()
 
             yield
 
         finally:
+            if isinstance(settings, DatabaseSettings):
+                await close_replicas()
+
             if isinstance(settings, RedisCacheSettings):
                 await close_redis_cache_pool()
 
@@ -159,8 +292,11 @@ def create_application(
         It determines the configuration applied:
 
         - AppSettings: Configures basic app metadata like name, description, contact, and license info.
-        - DatabaseSettings: Adds event handlers for initializing database tables during startup.
-        - RedisCacheSettings: Sets up event handlers for creating and closing a Redis cache pool.
+        - DatabaseSettings: Adds event handlers for initializing database tables and warming the connection pool
+          during startup, and for checking the lag of read replicas when `DATABASE_REPLICA_URIS` is set, along with
+          a middleware pinning the reads of clients that just wrote to the primary.
+        - RedisCacheSettings: Sets up event handlers for creating and closing a Redis cache pool, and for warming
+          the cache on startup when `REDIS_CACHE_WARM_ON_STARTUP` is set.
         - ClientSideCacheSettings: Integrates middleware for client-side caching.
         - RedisQueueSettings: Sets up event handlers for creating and closing a Redis queue pool.
         - RedisRateLimiterSettings: Sets up event handlers for creating and closing a Redis rate limiter pool.
@@ -218,6 +354,9 @@ def create_application(
     if isinstance(settings, ClientSideCacheSettings):
         application.add_middleware(ClientCacheMiddleware, max_age=settings.CLIENT_CACHE_MAX_AGE)
 
+    if isinstance(settings, DatabaseSettings) and settings.DATABASE_REPLICA_URIS:
+        application.add_middleware(ReadYourWritesMiddleware, window=settings.DATABASE_READ_YOUR_WRITES_WINDOW)
+
     if isinstance(settings, EnvironmentSettings):
         if settings.ENVIRONMENT != EnvironmentOption.PRODUCTION:
             docs_router = APIRouter()
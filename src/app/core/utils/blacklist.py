@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db.crud_token_blacklist import crud_token_blacklist
+from ..db.database import local_session
+from ..db.token_blacklist import TokenBlacklist
+from ..logger import logging
+from .bloom_filter import BloomFilter
+from .pubsub import listen
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_KEY_PREFIX = "blacklist:token:"
+BLACKLIST_CHANNEL = "blacklist:tokens"
+
+client: Redis | None = None
+bloom_filter: BloomFilter | None = None
+listener: asyncio.Task | None = None
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def add(token: str, expires_at: float) -> None:
+    """Store a blacklisted token in Redis until it expires, and announce it to the Bloom filter of every worker.
+
+    The token must already be stored in the database, which remains the source of truth.
+
+    Parameters
+    ----------
+    token: str
+        The blacklisted token.
+    expires_at: float
+        The token's expiration, as a UNIX timestamp.
+
+    Raises
+    ------
+    RedisError
+        If the token could not be announced. Other workers' Bloom filters would keep ruling it out, so the caller
+        must fail and let the client retry.
+    """
+    token_hash = hash_token(token)
+    if bloom_filter is not None:
+        bloom_filter.add(token_hash)
+
+    ttl = int(expires_at - time.time()) + 1
+    if client is None or ttl <= 0:
+        return
+
+    await client.set(f"{BLACKLIST_KEY_PREFIX}{token_hash}", 1, ex=ttl)
+    await client.publish(BLACKLIST_CHANNEL, token_hash)
+
+
+async def contains(token: str, db: AsyncSession) -> bool:
+    """Check whether a token was blacklisted.
+
+    The Bloom filter answers for tokens that were never blacklisted, which is almost every token, without any I/O.
+    Tokens it may contain are looked up in Redis, then in the database in case the Redis key was lost or evicted.
+    Until the filter is loaded, or while its subscription is down, every lookup goes to Redis and the database.
+
+    Parameters
+    ----------
+    token: str
+        The token to check.
+    db: AsyncSession
+        Database session, only used when the filter and Redis cannot rule the token out.
+
+    Returns
+    -------
+    bool
+        True if the token was blacklisted.
+    """
+    token_hash = hash_token(token)
+    if bloom_filter is not None and token_hash not in bloom_filter:
+        return False
+
+    if client is not None:
+        try:
+            if await client.exists(f"{BLACKLIST_KEY_PREFIX}{token_hash}"):
+                return True
+        except RedisError as e:
+            logger.warning(f"Error checking blacklisted token in Redis: {e}")
+
+    return bool(await crud_token_blacklist.exists(db, token=token))
+
+
+async def load_bloom_filter() -> None:
+    """Build the Bloom filter from the tokens of the database that have not expired yet.
+
+    The filter is sized for twice as many tokens, and at least `TOKEN_BLACKLIST_BLOOM_CAPACITY`. It is rebuilt once
+    it holds more, which also drops the tokens that expired since.
+    """
+    global bloom_filter
+
+    async with local_session() as db:
+        # Expirations are stored as naive local times, see `blacklist_token`.
+        result = await db.execute(select(TokenBlacklist.token).where(TokenBlacklist.expires_at > datetime.now()))
+        tokens = result.scalars().all()
+
+    capacity = max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, 2 * len(tokens))
+    new_filter = BloomFilter(capacity=capacity, error_rate=settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+    for token in tokens:
+        new_filter.add(hash_token(token))
+    bloom_filter = new_filter
+
+
+async def _add_announced_token(data: bytes | str) -> None:
+    if bloom_filter is None:
+        return
+
+    bloom_filter.add(data.decode() if isinstance(data, bytes) else data)
+    if bloom_filter.count > bloom_filter.capacity:
+        await load_bloom_filter()
+
+
+def _drop_bloom_filter() -> None:
+    global bloom_filter
+
+    bloom_filter = None
+
+
+async def listen_for_blacklisted_tokens() -> None:
+    """Keep the Bloom filter of this worker in sync with the tokens blacklisted by every worker.
+
+    The filter is built from the database once subscribed, so no token is missed in between. While the subscription
+    is down, the filter is dropped, and lookups fall back to Redis and the database until it is rebuilt.
+    """
+    if client is None:
+        raise RedisError("Redis client is not initialized.")
+
+    await listen(client, BLACKLIST_CHANNEL, _add_announced_token, _drop_bloom_filter, on_subscribe=load_bloom_filter)
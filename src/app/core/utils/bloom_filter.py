@@ -0,0 +1,46 @@
+import hashlib
+import math
+from collections.abc import Iterator
+
+
+class BloomFilter:
+    """Probabilistic set answering "definitely not in the set" without false negatives.
+
+    Membership tests may return false positives, at a rate close to `error_rate` as long as no more than `capacity`
+    items were added. Items cannot be removed, so a filter holding expired items must be rebuilt.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of items the filter is sized for.
+    error_rate: float
+        Rate of false positives once `capacity` items were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions derived from two independent 64 bit hashes.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        """Add an item, counting it only if it was not present, so adding the same item twice counts it once."""
+        added = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
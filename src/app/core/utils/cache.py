@@ -1,17 +1,161 @@
+import asyncio
+import fnmatch
 import functools
+import gzip
+import hashlib
 import json
 import re
-from collections.abc import Callable
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Any
+from urllib.parse import urlencode
 
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, serialize_response
 from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.connection import AbstractConnection
+from redis.exceptions import NoScriptError, RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..db.database import async_get_db, local_session
 from ..exceptions.cache_exceptions import CacheIdentificationInferenceError, InvalidRequestError, MissingClientError
+from ..logger import logging
+from .etag import compute_etag, etag_matches
+from .metrics import Histogram
+from .pubsub import listen
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+TRACKING_CHANNEL = "__redis__:invalidate"
+TAG_KEY_PREFIX = "cache:tag:"
+LOCK_KEY_PREFIX = "cache:lock:"
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+COMPRESSION_MIN_SIZE = 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+# KEYS[1] is the cache key and KEYS[2..] the tag sets it is registered under, ARGV[1] the entry and ARGV[2] its
+# expiration. Tag sets must outlive their longest-lived member, so their TTL is only ever extended.
+_FILL_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if redis.call('TTL', KEYS[i]) < tonumber(ARGV[2]) then
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+end
+"""
+
+# KEYS are the cache keys to delete followed by the tag sets to invalidate, ARGV[1] the number of cache keys and
+# ARGV[2] the channel to announce the deleted keys on, or an empty string. The members of the tag sets are read
+# beforehand and passed as cache keys, so the script only touches declared keys. They are removed from the tag sets
+# rather than deleting the sets, which keeps keys tagged in between for the next invalidation.
+_INVALIDATE_SCRIPT = """
+local count = tonumber(ARGV[1])
+local deleted = {}
+for i = 1, count do
+    deleted[i] = KEYS[i]
+end
+for i = 1, count, 5000 do
+    local last = math.min(i + 4999, count)
+    redis.call('DEL', unpack(KEYS, i, last))
+    for j = count + 1, #KEYS do
+        redis.call('SREM', KEYS[j], unpack(KEYS, i, last))
+    end
+end
+if ARGV[2] ~= '' and count > 0 then
+    redis.call('PUBLISH', ARGV[2], cjson.encode({keys = deleted}))
+end
+return deleted
+"""
+
+# KEYS[1] is the lock and ARGV[1] the token of its owner. The lock is only released by its owner.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
+local_cache: "LocalCache | None" = None
+invalidation_listener: asyncio.Task | None = None
+tracking_enabled: bool = False
+tracking_bcast: bool = False
+tracking_client_id: int | None = None
+
+_script_shas: dict[str, str] = {}
+_in_flight: dict[str, asyncio.Future] = {}
+_refreshing: set[str] = set()
+_background_tasks: set[asyncio.Task] = set()
+coalesced_requests: dict[str, Counter[str]] = {"local": Counter(), "remote": Counter()}
+cache_events: defaultdict[str, Counter[str]] = defaultdict(Counter)
+redis_latency: dict[str, Histogram] = {"get": Histogram(), "set": Histogram()}
+_warmers: dict[Callable, Callable[..., Awaitable[Any]]] = {}
+
+
+class LocalCache:
+    """Bounded, per-process LRU cache sitting in front of Redis.
+
+    Entries expire after their own TTL and the least recently used entry is evicted once `max_size` is reached.
+    Coherence across workers is kept by `listen_for_invalidations`, which evicts keys written or invalidated by
+    any other worker.
+
+    Parameters
+    ----------
+    max_size: int
+        Maximum number of entries kept in memory.
+    ttl: int
+        Default time to live, in seconds, for entries stored without an explicit TTL.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 5) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def delete_pattern(self, pattern: str) -> None:
+        for key in fnmatch.filter(list(self._entries), pattern):
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 
 def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
@@ -142,6 +286,79 @@ def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, An
     return formatted_extra
 
 
+def _format_tags(tags: list[str], kwargs: dict[str, Any]) -> list[str]:
+    """Format tag templates using keyword arguments and turn them into the Redis keys of their tag sets.
+
+    Parameters
+    ----------
+    tags: List[str]
+        Tag templates, e.g. "{username}_posts" or "template:{id}".
+    kwargs: Dict[str, Any]
+        A dictionary of keyword arguments.
+
+    Returns
+    -------
+    List[str]: The Redis keys of the tag sets.
+    """
+    return [f"{TAG_KEY_PREFIX}{_format_prefix(tag, kwargs)}" for tag in tags]
+
+
+async def _eval_script(script: str, keys: list[str], args: list[Any]) -> Any:
+    """Run a Lua script by its SHA1 digest, sending its source only if Redis does not know it yet."""
+    if client is None:
+        raise MissingClientError
+
+    sha = _script_shas.get(script)
+    if sha is None:
+        sha = _script_shas[script] = hashlib.sha1(script.encode()).hexdigest()
+
+    try:
+        return await client.evalsha(sha, len(keys), *keys, *args)  # type: ignore
+    except NoScriptError:
+        return await client.eval(script, len(keys), *keys, *args)  # type: ignore
+
+
+async def _invalidate(keys: list[str], tag_keys: list[str]) -> list[str]:
+    """Delete cache keys and every key registered under the given tag sets, in two round trips.
+
+    This costs O(keys in the tags) and never scans the keyspace. The tag sets are read first, then their members are
+    deleted by a script along with `keys`. When the local cache is enabled, the deleted keys are evicted from it and
+    announced to every other worker by the same script.
+
+    The script touches the cache keys and the tag sets together, as does the one filling tagged entries, so with
+    Redis Cluster they must hash to the same slot; tags are meant for a standalone Redis or a primary with replicas.
+
+    Parameters
+    ----------
+    keys: List[str]
+        Exact cache keys to delete.
+    tag_keys: List[str]
+        The Redis keys of the tag sets to invalidate.
+
+    Returns
+    -------
+    List[str]: The cache keys that were deleted.
+    """
+    if client is None:
+        raise MissingClientError
+
+    if tag_keys:
+        async with client.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+        tagged = (key.decode() if isinstance(key, bytes) else key for tag in members for key in tag)
+        keys = list(dict.fromkeys([*keys, *tagged]))
+
+    channel = INVALIDATION_CHANNEL if local_cache is not None and not tracking_enabled else ""
+    deleted = await _eval_script(_INVALIDATE_SCRIPT, [*keys, *tag_keys], [len(keys), channel])
+    deleted = [key.decode() if isinstance(key, bytes) else key for key in deleted]
+    if local_cache is not None:
+        local_cache.delete(*deleted)
+
+    return deleted
+
+
 async def _delete_keys_by_pattern(pattern: str) -> None:
     """Delete keys from Redis that match a given pattern using the SCAN command.
 
@@ -181,6 +398,525 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
             await client.delete(*keys)
 
 
+def _set_local(cache_key: str, data: Any, local_expiration: int | None, expiration: int) -> None:
+    """Store data in the local cache, if enabled, with a TTL capped by the Redis expiration.
+
+    With client tracking, nothing is stored while the invalidation connection is down, since the entry could not be
+    invalidated.
+    """
+    if local_cache is None or (tracking_enabled and tracking_client_id is None):
+        return
+
+    ttl = local_cache.ttl if local_expiration is None else local_expiration
+    local_cache.set(cache_key, data, min(ttl, expiration))
+
+
+def _decode_json(cached_data: bytes) -> Any:
+    """Decode a cached entry, decompressing it first if it was stored compressed."""
+    if cached_data.startswith(GZIP_MAGIC):
+        cached_data = gzip.decompress(cached_data)
+    return json.loads(cached_data)
+
+
+def _decode_raw(cached_data: bytes) -> bytes:
+    """Keep a cached entry as the stored response body."""
+    return cached_data
+
+
+async def _serialize_result(request: Request, result: Any, raw_response: bool, compress: bool) -> tuple[bytes, Any]:
+    """Serialize an endpoint result into the bytes stored in Redis.
+
+    In raw mode the result is validated and serialized once through the route's `response_model`, exactly as FastAPI
+    would, and the final response body is what gets stored.
+
+    Returns
+    -------
+    Tuple[bytes, Any]: The stored bytes and the value handed back to the decorator, i.e. what `_decode_json` or
+    `_decode_raw` would return for these bytes.
+    """
+    if raw_response:
+        route = request.scope.get("route")
+        if isinstance(route, APIRoute) and route.response_field is not None:
+            content = await serialize_response(
+                field=route.response_field,
+                response_content=result,
+                include=route.response_model_include,
+                exclude=route.response_model_exclude,
+                by_alias=route.response_model_by_alias,
+                exclude_unset=route.response_model_exclude_unset,
+                exclude_defaults=route.response_model_exclude_defaults,
+                exclude_none=route.response_model_exclude_none,
+            )
+        else:
+            content = jsonable_encoder(result)
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    else:
+        content = jsonable_encoder(result)
+        body = json.dumps(content).encode("utf-8")
+
+    if compress and len(body) >= COMPRESSION_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=6)
+
+    return body, body if raw_response else content
+
+
+def _raw_response(request: Request, body: bytes) -> Response:
+    """Build a response straight from a stored body, skipping response model validation and serialization.
+
+    Compressed bodies are sent as is to clients accepting gzip, and decompressed for the others. The response carries
+    a strong ETag of the stored body, and a request whose `If-None-Match` matches it gets an empty 304 instead.
+    """
+    route = request.scope.get("route")
+    status_code = getattr(route, "status_code", None) or 200
+    headers = {}
+    suffix = ""
+    decompress = False
+    if body.startswith(GZIP_MAGIC):
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            suffix = "-gzip"
+        else:
+            decompress = True
+
+    headers["ETag"] = compute_etag(body, suffix)
+    if status_code == 200 and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+
+    if decompress:
+        body = gzip.decompress(body)
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def _get_cached(
+    cache_key: str, local_expiration: int | None, expiration: int, decode: Callable[[bytes], Any] = _decode_json
+) -> Any | None:
+    """Read a cached entry from the local cache, then from Redis.
+
+    Returns
+    -------
+    Any | None: The decoded entry, or None on a miss.
+    """
+    if client is None:
+        raise MissingClientError
+
+    if local_cache is not None:
+        local_data = local_cache.get(cache_key)
+        if local_data is not None:
+            return local_data
+
+    with redis_latency["get"].time():
+        cached_data = await client.get(cache_key)
+    if not cached_data:
+        return None
+
+    data = decode(cached_data)
+    _set_local(cache_key, data, local_expiration, expiration)
+    return data
+
+
+async def _set_cached(
+    cache_key: str,
+    body: bytes,
+    data: Any,
+    expiration: int,
+    tag_keys: list[str],
+    local_expiration: int | None,
+    overwrite: bool = False,
+) -> None:
+    """Store a serialized entry in Redis and its tags in a single round trip, and its decoded `data` locally.
+
+    With client tracking outside of broadcasting mode, Redis only announces changes to keys a connection read, so the
+    entry is only cached locally once it is read back from Redis. Entries that may replace an existing one, like
+    refreshes and warm ups, set `overwrite` so the other workers evict their local copy.
+    """
+    if client is None:
+        raise MissingClientError
+
+    with redis_latency["set"].time():
+        if tag_keys:
+            await _eval_script(_FILL_SCRIPT, [cache_key, *tag_keys], [body, expiration])
+        else:
+            await client.set(cache_key, body, ex=expiration)
+
+    # With client tracking, Redis announces the change itself.
+    if overwrite and local_cache is not None and not tracking_enabled:
+        await client.publish(INVALIDATION_CHANNEL, json.dumps({"keys": [cache_key]}))
+
+    if not tracking_enabled or tracking_bcast:
+        _set_local(cache_key, data, local_expiration, expiration)
+
+
+async def _single_flight(
+    key_prefix: str,
+    cache_key: str,
+    fill: Callable[[], Awaitable[Any]],
+    local_expiration: int | None,
+    expiration: int,
+    decode: Callable[[bytes], Any] = _decode_json,
+) -> Any:
+    """Run `fill` once for all concurrent misses of `cache_key` in this worker.
+
+    Other requests missing the same key while the computation is running await its result. If the computation
+    fails, they get the same exception; if it is cancelled, they compute the entry themselves.
+    """
+    in_flight = _in_flight.get(cache_key)
+    if in_flight is not None:
+        coalesced_requests["local"][key_prefix] += 1
+        try:
+            return await asyncio.shield(in_flight)
+        except asyncio.CancelledError:
+            if not in_flight.cancelled():
+                raise
+            return await fill()
+
+    future = asyncio.get_running_loop().create_future()
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _in_flight[cache_key] = future
+    try:
+        data = await _locked_fill(key_prefix, cache_key, fill, local_expiration, expiration, decode)
+        future.set_result(data)
+        return data
+
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+
+    except Exception as e:
+        future.set_exception(e)
+        raise
+
+    finally:
+        del _in_flight[cache_key]
+
+
+async def _locked_fill(
+    key_prefix: str,
+    cache_key: str,
+    fill: Callable[[], Awaitable[Any]],
+    local_expiration: int | None,
+    expiration: int,
+    decode: Callable[[bytes], Any] = _decode_json,
+) -> Any:
+    """Run `fill` under a short Redis lock so only one worker computes a missing entry.
+
+    Workers that do not get the lock poll the cache until the owner stores the entry. If the owner releases the
+    lock without storing it, or the lock times out, they compute the entry themselves.
+    """
+    if client is None:
+        raise MissingClientError
+
+    lock_key = f"{LOCK_KEY_PREFIX}{cache_key}"
+    token = uuid.uuid4().hex
+    if await client.set(lock_key, token, nx=True, ex=SINGLE_FLIGHT_LOCK_TIMEOUT):
+        try:
+            return await fill()
+        finally:
+            await _eval_script(_RELEASE_LOCK_SCRIPT, [lock_key], [token])
+
+    coalesced_requests["remote"][key_prefix] += 1
+    deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        cached_data = await _get_cached(cache_key, local_expiration, expiration, decode)
+        if cached_data is not None:
+            return cached_data
+
+        if not await client.exists(lock_key):
+            break
+
+    return await fill()
+
+
+async def _get_cached_with_age(
+    cache_key: str,
+    local_expiration: int | None,
+    expiration: int,
+    soft_expiration: int,
+    decode: Callable[[bytes], Any] = _decode_json,
+) -> tuple[Any | None, bool]:
+    """Read a cached entry along with whether it is past its soft expiration.
+
+    The entry's age is derived from the remaining TTL of its key, read in the same round trip as the entry.
+
+    Returns
+    -------
+    Tuple[Any | None, bool]: The decoded entry, or None on a miss, and whether it is stale.
+    """
+    if client is None:
+        raise MissingClientError
+
+    if local_cache is not None:
+        local_data = local_cache.get(cache_key)
+        if local_data is not None:
+            return local_data, False
+
+    with redis_latency["get"].time():
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get(cache_key)
+            pipe.ttl(cache_key)
+            cached_data, ttl = await pipe.execute()
+
+    if not cached_data:
+        return None, False
+
+    data = decode(cached_data)
+    fresh_for = ttl - (expiration - soft_expiration) if ttl >= 0 else expiration
+    if fresh_for <= 0:
+        return data, True
+
+    _set_local(cache_key, data, local_expiration, fresh_for)
+    return data, False
+
+
+@asynccontextmanager
+async def _fresh_sessions(kwargs: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+    """Copy endpoint arguments, replacing database sessions with new ones.
+
+    Background refreshes outlive the request, whose session is closed once the response is sent.
+    """
+    async with AsyncExitStack() as stack:
+        yield {
+            name: await stack.enter_async_context(local_session()) if isinstance(value, AsyncSession) else value
+            for name, value in kwargs.items()
+        }
+
+
+def _schedule_refresh(cache_key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+    """Refresh a stale entry in the background, unless this worker is already refreshing it."""
+    if cache_key in _refreshing:
+        return
+
+    _refreshing.add(cache_key)
+    task = asyncio.create_task(_refresh(cache_key, refresh))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _refresh(cache_key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+    """Run `refresh` under the entry's Redis lock, so only one worker refreshes it."""
+    if client is None:
+        raise MissingClientError
+
+    lock_key = f"{LOCK_KEY_PREFIX}{cache_key}"
+    token = uuid.uuid4().hex
+    try:
+        if not await client.set(lock_key, token, nx=True, ex=SINGLE_FLIGHT_LOCK_TIMEOUT):
+            return
+
+        try:
+            await refresh()
+        finally:
+            await _eval_script(_RELEASE_LOCK_SCRIPT, [lock_key], [token])
+
+    except Exception as e:
+        logger.exception(f"Error refreshing stale cache entry {cache_key}: {e}")
+
+    finally:
+        _refreshing.discard(cache_key)
+
+
+async def _publish_invalidation(patterns: list[str]) -> None:
+    """Evict keys matching patterns from the local cache of this worker and notify every other worker to do the same.
+
+    Parameters
+    ----------
+    patterns: List[str]
+        Glob-style patterns of cache keys that were invalidated.
+    """
+    if local_cache is None:
+        return
+
+    for pattern in patterns:
+        local_cache.delete_pattern(pattern)
+
+    if tracking_enabled:
+        return
+
+    if client is None:
+        raise MissingClientError
+
+    await client.publish(INVALIDATION_CHANNEL, json.dumps({"keys": [], "patterns": patterns}))
+
+
+def _handle_invalidation_message(data: bytes | str) -> None:
+    if local_cache is None:
+        return
+
+    try:
+        message = json.loads(data)
+    except ValueError:
+        logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+        return
+
+    local_cache.delete(*message.get("keys", []))
+    for pattern in message.get("patterns", []):
+        local_cache.delete_pattern(pattern)
+
+
+def _clear_local_cache() -> None:
+    if local_cache is not None:
+        local_cache.clear()
+
+
+async def listen_for_invalidations() -> None:
+    """Evict the keys announced on the invalidation channel from the local cache of this worker."""
+    if client is None:
+        raise MissingClientError
+
+    await listen(client, INVALIDATION_CHANNEL, _handle_invalidation_message, _clear_local_cache)
+
+
+def tracking_connect_func(bcast: bool = False, prefixes: list[str] | None = None) -> Callable:
+    """Build a connection callback enabling Redis client tracking on every connection of the cache pool.
+
+    Invalidations are redirected to the connection held by `listen_for_tracked_invalidations`, so a single
+    connection per worker receives them whichever pooled connection read the key. Connections opened while it is
+    down are not tracked; a `TrackingConnectionPool` resets them once it is back.
+
+    Parameters
+    ----------
+    bcast: bool, default False
+        Whether to use broadcasting mode, where Redis announces every change to a key matching `prefixes` instead of
+        remembering which keys each connection read.
+    prefixes: List[str] | None, optional
+        Key prefixes to broadcast, e.g. the `key_prefix` of hot endpoints. Only used with `bcast`; all keys are
+        broadcast when omitted.
+
+    Returns
+    -------
+    Callable
+        A coroutine to pass to the connection pool as `redis_connect_func`.
+    """
+
+    async def on_connect(connection: AbstractConnection) -> None:
+        await connection.on_connect()
+        connection.tracking_client_id = tracking_client_id  # type: ignore[attr-defined]
+        if tracking_client_id is None:
+            return
+
+        args: list[Any] = ["CLIENT", "TRACKING", "ON", "REDIRECT", tracking_client_id, "NOLOOP"]
+        if bcast:
+            args.append("BCAST")
+            for prefix in prefixes or []:
+                args.extend(["PREFIX", prefix])
+
+        await connection.send_command(*args)
+        response = await connection.read_response()
+        if response not in (b"OK", "OK"):
+            raise RedisError(f"Could not enable client tracking: {response!r}")
+
+    return on_connect
+
+
+class TrackingConnectionPool(ConnectionPool):
+    """Connection pool reconnecting, when they are checked out, connections not tracked for the current invalidation
+    connection, so no connection stays untracked after `listen_for_tracked_invalidations` reconnects.
+
+    Meant to be used with the `redis_connect_func` built by `tracking_connect_func`, which only runs on connect and
+    so cannot check connections that are already connected. Overrides `ConnectionPool.ensure_connection`, which
+    `get_connection` calls on every checkout since redis-py 5.0.1, the lowest version supported.
+    """
+
+    async def ensure_connection(self, connection: AbstractConnection) -> None:
+        if connection.is_connected and getattr(connection, "tracking_client_id", None) != tracking_client_id:
+            await connection.disconnect()
+        await super().ensure_connection(connection)  # type: ignore[misc]  # types-redis predates `ensure_connection`
+
+
+def _handle_tracking_message(message: list[Any]) -> None:
+    if local_cache is None or message[0] not in (b"message", "message"):
+        return
+
+    keys = message[2]
+    if keys is None:
+        local_cache.clear()
+    else:
+        local_cache.delete(*(key.decode() if isinstance(key, bytes) else key for key in keys))
+
+
+async def listen_for_tracked_invalidations() -> None:
+    """Receive Redis client tracking invalidations and evict the announced keys from the local cache.
+
+    This replaces `listen_for_invalidations` when client tracking is enabled: Redis itself announces every change to
+    a key this worker read, including writes made outside the application and expirations. Meant to run as a
+    background task for the lifetime of the worker. If the connection is lost, the local cache is cleared and pooled
+    connections are reset once it is back, so they are tracked again with the new redirection: idle ones right away,
+    and those in use when they are next checked out, so in-flight commands are not interrupted.
+    """
+    global tracking_client_id
+
+    if pool is None:
+        raise MissingClientError
+
+    while True:
+        connection = pool.make_connection()
+        try:
+            await connection.connect()
+            await connection.send_command("CLIENT", "ID")
+            client_id = await connection.read_response()
+            await connection.send_command("SUBSCRIBE", TRACKING_CHANNEL)
+            await connection.read_response()
+
+            tracking_client_id = client_id
+            await pool.disconnect(inuse_connections=False)
+            while True:
+                _handle_tracking_message(await connection.read_response())
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.warning(f"Cache tracking connection lost, clearing local cache: {e}")
+
+        finally:
+            tracking_client_id = None
+            if local_cache is not None:
+                local_cache.clear()
+            await connection.disconnect()
+
+        await asyncio.sleep(1)
+
+
+def get_cache_stats() -> dict[str, Any]:
+    """Return this worker's cache statistics.
+
+    Events are counted per `key_prefix` template, unformatted, so every user's "{username}_posts" entries add up
+    to a single line. Invalidations made by `invalidate_cache` are counted per tag, under "cache:tag:<tag>".
+
+    Returns
+    -------
+    Dict[str, Any]
+        - "prefixes": hits, misses, hit ratio, fills, serialized bytes, invalidations, invalidated keys and
+          coalesced waits, per `key_prefix`.
+        - "redis_latency": cumulative histograms, in seconds, of the Redis reads and writes made by the decorator.
+        - "local_cache_size": number of entries in the in-process cache, or None if it is disabled.
+    """
+    prefixes: dict[str, dict[str, Any]] = {}
+    for key_prefix in {*cache_events, *coalesced_requests["local"], *coalesced_requests["remote"]}:
+        events = cache_events.get(key_prefix, Counter())
+        lookups = events["hits"] + events["misses"]
+        prefixes[key_prefix] = {
+            "hits": events["hits"],
+            "misses": events["misses"],
+            "hit_ratio": events["hits"] / lookups if lookups else None,
+            "fills": events["fills"],
+            "serialized_bytes": events["serialized_bytes"],
+            "invalidations": events["invalidations"],
+            "invalidated_keys": events["invalidated_keys"],
+            "coalesced_local": coalesced_requests["local"][key_prefix],
+            "coalesced_remote": coalesced_requests["remote"][key_prefix],
+        }
+
+    return {
+        "prefixes": prefixes,
+        "redis_latency": {operation: histogram.snapshot() for operation, histogram in redis_latency.items()},
+        "local_cache_size": len(local_cache) if local_cache is not None else None,
+    }
+
+
 def cache(
     key_prefix: str,
     resource_id_name: Any = None,
@@ -188,6 +924,15 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    local_expiration: int | None = None,
+    tags: list[str] | None = None,
+    tags_to_invalidate: list[str] | None = None,
+    single_flight: bool = False,
+    soft_expiration: int | None = None,
+    raw_response: bool = False,
+    compress: bool = False,
+    include_query_params: bool = False,
+    warm: bool = False,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -213,6 +958,35 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    local_expiration: int | None, optional
+        Time to live, in seconds, of the entry in the in-process cache, when it is enabled. Defaults to the
+        `REDIS_CACHE_LOCAL_TTL` setting and is always capped by `expiration`. Pass 0 to bypass the in-process cache.
+    tags: List[str] | None, optional
+        Templates of the tags the cached entry is registered under on GET requests, e.g. "{username}_posts".
+        Placeholders are formatted with the function's arguments, like `key_prefix`.
+    tags_to_invalidate: List[str] | None, optional
+        Templates of the tags whose entries are invalidated when the decorated function is called with a method
+        other than GET. This is the preferred alternative to `pattern_to_invalidate_extra`.
+    single_flight: bool, default False
+        Whether concurrent cache misses for the same key should wait for a single computation instead of each
+        running the endpoint. Misses are coalesced within the worker, and across workers through a short Redis lock.
+    soft_expiration: int | None, optional
+        Time, in seconds, after which a cached entry is considered stale. Stale entries are still served until
+        `expiration`, the hard TTL, while a single background task refreshes them. Must be lower than `expiration`.
+    raw_response: bool, default False
+        Whether to store the final serialized response body and return it directly as a `Response` on hits, skipping
+        JSON decoding and response model validation. On misses, the result is validated once through the route's
+        `response_model`.
+    compress: bool, default False
+        Whether to gzip entries of at least `COMPRESSION_MIN_SIZE` bytes before storing them. With `raw_response`,
+        compressed entries are sent as is to clients accepting gzip.
+    include_query_params: bool, default False
+        Whether to add the request's query parameters, sorted, to the cache key, so each combination of filters and
+        pages is cached separately. When set, `resource_id_name` may be omitted for collection endpoints, which have
+        no resource ID.
+    warm: bool, default False
+        Whether `warm_cache` should preload the entry on application startup. Only endpoints without path
+        parameters can be warmed; the entry is computed with the default value of each query parameter.
 
     Returns
     -------
@@ -275,59 +1049,238 @@ def cache(
       the cache for user-specific item lists, while `pattern_to_invalidate_extra` allows bulk invalidation of all keys
       matching the pattern 'user_*_items:*', covering all users.
 
+    The list invalidation can also be expressed with tags, without scanning the keyspace:
+
+    ```python
+    @app.get("/users/{user_id}/items")
+    @cache(key_prefix="user_items", resource_id_name="user_id", tags=["user_{user_id}_items"])
+    async def read_user_items(request: Request, user_id: int): ...
+
+
+    @app.put("/items/{item_id}")
+    @cache(key_prefix="item_data", resource_id_name="item_id", tags_to_invalidate=["user_{user_id}_items"])
+    async def update_item(request: Request, item_id: int, data: dict, user_id: int): ...
+    ```
+
     Note
     ----
     - resource_id_type is used only if resource_id is not passed.
     - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
-    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
-      consider the potential impact on Redis performance.
+    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets, since it scans the whole
+      keyspace. Prefer registering entries with `tags` and invalidating them with `tags_to_invalidate`, which only
+      touches the keys registered under each tag.
+    - With `raw_response`, the response's status code is the route's `status_code` and its media type is always
+      "application/json". Endpoints returning a custom response class should not use it.
+      Responses carry an ETag computed from the stored body, so conditional requests matching it get a 304 straight
+      from the cache, without querying, serializing, decompressing or sending the body.
+    - With `soft_expiration`, an entry is recomputed synchronously only once it is past `expiration`. The background
+      refresh runs with its own database sessions, since the request's session is closed once the response is sent.
+    - With `single_flight`, coalesced requests are counted per `key_prefix` in `coalesced_requests`, split into
+      "local" (waited on a computation in the same worker) and "remote" (waited on another worker).
+    - Hits, misses, fills, serialized bytes and invalidations are counted per `key_prefix` and reported, with
+      Redis latency histograms, by `get_cache_stats`.
+    - When `REDIS_CACHE_LOCAL_ENABLED` is set, GET requests are first served from a per-worker LRU cache. Writes
+      and invalidations are broadcast to every worker, so a stale local entry lives at most until the broadcast is
+      received, and never longer than its local TTL.
+    - When `REDIS_CACHE_TRACKING_ENABLED` is set, the local cache is kept coherent by Redis client tracking instead,
+      which also covers keys changed outside the application. Outside of broadcasting mode, entries are only cached
+      locally once read back from Redis, since Redis does not track the keys a connection only wrote.
     """
+    if soft_expiration is not None and soft_expiration >= expiration:
+        raise ValueError("soft_expiration must be lower than expiration.")
 
     def wrapper(func: Callable) -> Callable:
+        def build_cache_key(request: Request, kwargs: dict[str, Any]) -> str:
+            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
+            if resource_id_name:
+                cache_key = f"{formatted_key_prefix}:{kwargs[resource_id_name]}"
+            elif include_query_params:
+                cache_key = formatted_key_prefix
+            else:
+                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
+                cache_key = f"{formatted_key_prefix}:{resource_id}"
+
+            if include_query_params:
+                cache_key = f"{cache_key}?{urlencode(sorted(request.query_params.multi_items()))}"
+            return cache_key
+
         @functools.wraps(func)
         async def inner(request: Request, *args: Any, **kwargs: Any) -> Any:
             if client is None:
                 raise MissingClientError
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
-            else:
-                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
+            cache_key = build_cache_key(request, kwargs)
 
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
             if request.method == "GET":
-                if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+                if (
+                    to_invalidate_extra is not None
+                    or pattern_to_invalidate_extra is not None
+                    or tags_to_invalidate is not None
+                ):
                     raise InvalidRequestError
 
-                cached_data = await client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data.decode())
+                tag_keys = _format_tags(tags, kwargs) if tags is not None else []
+                decode = _decode_raw if raw_response else _decode_json
+
+                async def store(result: Any, overwrite: bool = False) -> Any:
+                    body, data = await _serialize_result(request, result, raw_response, compress)
+                    await _set_cached(cache_key, body, data, expiration, tag_keys, local_expiration, overwrite)
+                    cache_events[key_prefix].update(fills=1, serialized_bytes=len(body))
+                    return data
+
+                async def fill() -> Any:
+                    return await store(await func(request, *args, **kwargs))
+
+                async def refresh() -> Any:
+                    async with _fresh_sessions(kwargs) as refresh_kwargs:
+                        return await store(await func(request, *args, **refresh_kwargs), overwrite=True)
+
+                def render(data: Any) -> Any:
+                    return _raw_response(request, data) if raw_response else data
+
+                if soft_expiration is None:
+                    cached_data = await _get_cached(cache_key, local_expiration, expiration, decode)
+                else:
+                    cached_data, is_stale = await _get_cached_with_age(
+                        cache_key, local_expiration, expiration, soft_expiration, decode
+                    )
+                    if is_stale:
+                        _schedule_refresh(cache_key, refresh)
+
+                if cached_data is not None:
+                    cache_events[key_prefix]["hits"] += 1
+                    return render(cached_data)
+
+                cache_events[key_prefix]["misses"] += 1
+                if single_flight:
+                    return render(
+                        await _single_flight(key_prefix, cache_key, fill, local_expiration, expiration, decode)
+                    )
+
+                return render(await fill())
 
             result = await func(request, *args, **kwargs)
 
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
+            invalidated_keys = [cache_key]
+            if to_invalidate_extra is not None:
+                formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
+                invalidated_keys.extend(f"{prefix}:{id}" for prefix, id in formatted_extra.items())
 
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
+            tag_keys = _format_tags(tags_to_invalidate, kwargs) if tags_to_invalidate is not None else []
+            deleted_keys = await _invalidate(invalidated_keys, tag_keys)
+            cache_events[key_prefix].update(invalidations=1, invalidated_keys=len(deleted_keys))
 
-                return json.loads(serialized_data)
+            if pattern_to_invalidate_extra is not None:
+                patterns = [_format_prefix(pattern, kwargs) + "*" for pattern in pattern_to_invalidate_extra]
+                for pattern in patterns:
+                    await _delete_keys_by_pattern(pattern)
+                await _publish_invalidation(patterns)
 
-            else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
+            return result
+
+        async def warm_up(request: Request, **kwargs: Any) -> None:
+            cache_key = build_cache_key(request, kwargs)
+            tag_keys = _format_tags(tags, kwargs) if tags is not None else []
+            body, data = await _serialize_result(request, await func(request, **kwargs), raw_response, compress)
+            await _set_cached(cache_key, body, data, expiration, tag_keys, local_expiration, overwrite=True)
+            cache_events[key_prefix].update(fills=1, serialized_bytes=len(body))
+
+        if warm:
+            _warmers[inner] = warm_up
+
+        return inner
+
+    return wrapper
+
+
+async def warm_cache(routes: list[Any]) -> None:
+    """Preload the entries of every route whose endpoint is cached with `warm=True`.
+
+    Entries are recomputed even if they are already cached, so a deploy never keeps serving bodies rendered by the
+    previous version. Each endpoint gets its own database session. Failures are logged and do not prevent the
+    application from starting: the entry is simply filled by the first request instead.
+
+    Parameters
+    ----------
+    routes: List[Any]
+        The application's routes, usually `app.routes`.
+    """
+    if client is None:
+        raise MissingClientError
+
+    for route in routes:
+        if not isinstance(route, APIRoute) or route.endpoint not in _warmers:
+            continue
+
+        dependant = route.dependant
+        if dependant.path_params or any(dependency.call is not async_get_db for dependency in dependant.dependencies):
+            logger.warning(
+                f"Cannot warm {route.path}: only endpoints without path parameters or other dependencies can be warmed."
+            )
+            continue
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": route.path,
+            "query_string": b"",
+            "headers": [],
+            "route": route,
+        }
+        kwargs = {param.name: param.default for param in dependant.query_params if not param.required}
+        try:
+            async with AsyncExitStack() as stack:
+                for dependency in dependant.dependencies:
+                    kwargs[dependency.name] = await stack.enter_async_context(local_session())  # type: ignore[index]
+                await _warmers[route.endpoint](Request(scope), **kwargs)
+        except Exception as e:
+            logger.exception(f"Error warming cache for {route.path}: {e}")
+
+
+def invalidate_cache(tags: list[str]) -> Callable:
+    """Invalidate tagged cache entries after the decorated write endpoint succeeds.
+
+    This is the counterpart of `cache(tags=...)` for endpoints that write but have no cached resource of their own,
+    such as creations.
+
+    Parameters
+    ----------
+    tags: List[str]
+        Templates of the tags to invalidate, formatted with the function's arguments.
+
+    Returns
+    -------
+    Callable
+        A decorator function that can be applied to FastAPI endpoint functions.
+
+    Example usage
+    -------------
+
+    ```python
+    @router.get("/variables")
+    @cache(key_prefix="variables", include_query_params=True, tags=["variable", "group"])
+    async def read_variables(request: Request, db: AsyncSession, page: int = 1): ...
+
+
+    @router.patch("/group/{id}")
+    @invalidate_cache(tags=["group"])
+    async def patch_group(request: Request, id: int, values: GroupUpdate, db: AsyncSession): ...
+    ```
+
+    Here updating a group also invalidates every cached variable read, since variables are read joined with their
+    group.
+    """
+
+    def wrapper(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def inner(*args: Any, **kwargs: Any) -> Any:
+            if client is None:
+                raise MissingClientError
 
+            result = await func(*args, **kwargs)
+            deleted_keys = await _invalidate([], _format_tags(tags, kwargs))
+            for tag in tags:
+                cache_events[f"{TAG_KEY_PREFIX}{tag}"].update(invalidations=1, invalidated_keys=len(deleted_keys))
             return result
 
         return inner
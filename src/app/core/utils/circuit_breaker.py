@@ -0,0 +1,54 @@
+import time
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while, instead of making every caller wait for it to fail.
+
+    The breaker is closed while calls succeed. After `failure_threshold` consecutive failures it opens, and
+    `allow_request` returns False for `recovery_timeout` seconds. Then a single trial call is let through: the breaker
+    closes if it succeeds, and opens again otherwise.
+
+    State is kept in process memory, so each worker has its own breaker.
+
+    Parameters
+    ----------
+    failure_threshold: int
+        Number of consecutive failures opening the breaker.
+    recovery_timeout: float
+        Duration (in seconds) the breaker stays open before a trial call.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow_request(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        if self._trial_running or time.monotonic() - self.opened_at < self.recovery_timeout:
+            return False
+
+        self._trial_running = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Count a failed call, returning True if it opened the breaker."""
+        self.failures += 1
+        was_open = self.opened_at is not None
+        if was_open or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+        return not was_open and self.opened_at is not None
@@ -0,0 +1,31 @@
+import hashlib
+
+
+def compute_etag(body: bytes, suffix: str = "") -> str:
+    """Compute a strong entity tag for a response body.
+
+    Parameters
+    ----------
+    body: bytes
+        The exact bytes sent to the client.
+    suffix: str, optional
+        Appended to the hash to tell apart representations derived from the same bytes, e.g. "-gzip".
+
+    Returns
+    -------
+    str
+        The quoted entity tag, ready to be sent in an `ETag` header.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}{suffix}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an `If-None-Match` header against an entity tag, using the weak comparison RFC 9110 requires."""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag for candidate in if_none_match.split(","))
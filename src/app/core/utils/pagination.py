@@ -0,0 +1,217 @@
+import base64
+import binascii
+import json
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, cast
+
+from fastcrud import FastCRUD
+from fastcrud.paginated import compute_offset, paginated_response
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..exceptions.http_exceptions import BadRequestException
+
+
+class CountMode(StrEnum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+def encode_cursor(direction: str, sort_value: Any, id: int) -> str:
+    """Encode a position in a listing as an opaque, URL safe cursor."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+
+    payload = json.dumps([direction, sort_value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_type: type) -> tuple[str, Any, int]:
+    """Decode a cursor made by `encode_cursor`, raising a 400 error if it was tampered with."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, sort_value, id = json.loads(payload)
+        if sort_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        if direction not in ("next", "prev") or not isinstance(sort_value, sort_type) or not isinstance(id, int):
+            raise ValueError
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise BadRequestException("Invalid cursor.") from e
+
+    return direction, sort_value, id
+
+
+async def paginate_by_cursor(
+    crud: FastCRUD,
+    db: AsyncSession,
+    cursor: str,
+    items_per_page: int,
+    sort_column: str,
+    descending: bool = False,
+    fetch: Callable[[list[int]], Awaitable[dict[str, Any]]] | None = None,
+    schema_to_select: type | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Return a page of a listing sorted by `(sort_column, id)`, located by cursor instead of by offset.
+
+    The page is found by comparing `(sort_column, id)` with the cursor's values, so with an index on the filtered
+    columns followed by `sort_column` and `id`, every page costs the same, however deep it is. The page's ids are
+    selected first, then its rows are fetched by id, which lets `fetch` add joins.
+
+    Parameters
+    ----------
+    crud: FastCRUD
+        The CRUD object of the listed model, which must have an integer `id`.
+    db: AsyncSession
+        Database session.
+    cursor: str
+        A `next_cursor` or `prev_cursor` of a previous page, or an empty string for the first page.
+    items_per_page: int
+        Number of items per page.
+    sort_column: str
+        The column sorting the listing. It must not be nullable.
+    descending: bool
+        Whether the listing is sorted in descending order.
+    fetch: Callable[[list[int]], Awaitable[dict[str, Any]]] | None
+        Fetches the rows of the given ids, returning them under "data" in any order. Defaults to `crud.get_multi`.
+    schema_to_select: type | None
+        Schema of the rows fetched by the default `fetch`.
+    **kwargs: Any
+        Filters of the listing, as accepted by `crud.get_multi`.
+
+    Returns
+    -------
+    dict[str, Any]
+        The page's rows under "data", with "items_per_page", and the "next_cursor" and "prev_cursor" of the adjacent
+        pages, None when there is no such page.
+
+    Raises
+    ------
+    BadRequestException
+        If the cursor is invalid.
+    """
+    sort = getattr(crud.model, sort_column)
+    key = crud.model.id
+
+    forward, values = True, None
+    if cursor:
+        direction, sort_value, id = decode_cursor(cursor, sort.type.python_type)
+        forward, values = direction == "next", (sort_value, id)
+
+    ascending = forward != descending
+    stmt = (await crud.select(**kwargs)).with_only_columns(sort, key)
+    if values is not None:
+        position, bound = tuple_(sort, key), tuple_(literal(values[0], sort.type), literal(values[1], key.type))
+        stmt = stmt.where(position > bound if ascending else position < bound)
+    order = (sort.asc(), key.asc()) if ascending else (sort.desc(), key.desc())
+    rows = list((await db.execute(stmt.order_by(*order).limit(items_per_page + 1))).all())
+
+    more = len(rows) > items_per_page
+    rows = rows[:items_per_page]
+    if not forward:
+        rows.reverse()
+
+    ids = [row[1] for row in rows]
+    if fetch is None:
+        data = await crud.get_multi(
+            db=db, schema_to_select=schema_to_select, limit=None, return_total_count=False, id__in=ids
+        )
+    else:
+        data = await fetch(ids)
+    items = {item["id"]: item for item in cast(list[dict[str, Any]], data["data"])}
+
+    has_next = more if forward else bool(rows)
+    has_prev = (values is not None and bool(rows)) if forward else more
+    return {
+        "data": [items[id] for id in ids if id in items],
+        "items_per_page": items_per_page,
+        "next_cursor": encode_cursor("next", *rows[-1]) if has_next else None,
+        "prev_cursor": encode_cursor("prev", *rows[0]) if has_prev else None,
+    }
+
+
+def count_mode_limit(items_per_page: int, count_mode: CountMode) -> int:
+    """Return how many rows to fetch for a page, one more than the page when `has_more` is not derived from a count."""
+    return items_per_page if count_mode == CountMode.EXACT else items_per_page + 1
+
+
+async def count_up_to(crud: FastCRUD, db: AsyncSession, cap: int, **kwargs: Any) -> int:
+    """Count the rows matching the filters, stopping after `cap + 1` of them so the cost stays bounded."""
+    rows = (await crud.select(**kwargs)).with_only_columns(crud.model.id).limit(cap + 1)
+    count: int = (await db.execute(select(func.count()).select_from(rows.subquery()))).scalar_one()
+    return count
+
+
+async def count_mode_response(
+    crud: FastCRUD,
+    db: AsyncSession,
+    crud_data: dict[str, Any],
+    page: int,
+    items_per_page: int,
+    count_mode: CountMode,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Build a paginated response, counting the listing's rows only as precisely as the client asked for.
+
+    - `exact` counts every matching row, as `paginated_response` does.
+    - `estimated` counts at most `PAGINATION_COUNT_CAP` rows. Beyond that, "total_count" is a lower bound and
+      "total_count_capped" is True, for clients to show e.g. "10,000+".
+    - `none` skips counting, "total_count" is None. "has_more" tells infinite scroll clients whether to keep loading.
+
+    Parameters
+    ----------
+    crud: FastCRUD
+        The CRUD object of the listed model, used for the capped count.
+    db: AsyncSession
+        Database session.
+    crud_data: dict[str, Any]
+        The page's rows under "data", fetched with `limit=count_mode_limit(items_per_page, count_mode)` and, for
+        `exact` only, "total_count".
+    page: int
+        The page number.
+    items_per_page: int
+        Number of items per page.
+    count_mode: CountMode
+        How to count the listing's rows.
+    **kwargs: Any
+        Filters of the listing, as accepted by `crud.get_multi`, used for the capped count.
+
+    Returns
+    -------
+    dict[str, Any]
+        The paginated response. Unless counting exactly, "total_count" may be None, and "total_count_capped" tells
+        whether it is a lower bound.
+    """
+    if count_mode == CountMode.EXACT:
+        response: dict[str, Any] = paginated_response(crud_data=crud_data, page=page, items_per_page=items_per_page)
+        return response
+
+    items = crud_data["data"]
+    has_more = len(items) > items_per_page
+    items = items[:items_per_page]
+
+    total_count, capped = None, False
+    if count_mode == CountMode.ESTIMATED:
+        seen = compute_offset(page, items_per_page) + len(items)
+        if items and not has_more:
+            # The last page tells the exact count.
+            total_count = seen
+        else:
+            cap = settings.PAGINATION_COUNT_CAP
+            count = await count_up_to(crud, db, cap, **kwargs)
+            capped = count > cap
+            # A page read past the cap still proves that more rows exist.
+            total_count = max(min(count, cap), seen + has_more if items else 0)
+
+    return {
+        "data": items,
+        "total_count": total_count,
+        "total_count_capped": capped,
+        "has_more": has_more,
+        "page": page,
+        "items_per_page": items_per_page,
+    }
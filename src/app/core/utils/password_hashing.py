@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from ..config import settings
+from ..exceptions.http_exceptions import CustomException
+from .metrics import Histogram
+
+T = TypeVar("T")
+
+PASSWORD_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# bcrypt releases the GIL while hashing, so threads run in parallel on separate cores. The semaphore admits as many
+# calls as there are threads, so callers wait here, where they can be counted, rather than in the executor's queue.
+executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hashing")
+_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+queue_depth = 0
+max_queue_depth = 0
+rejected = 0
+wait_time = Histogram(PASSWORD_HASH_BUCKETS)
+run_time = Histogram(PASSWORD_HASH_BUCKETS)
+
+
+async def run(func: Callable[..., T], *args: Any) -> T:
+    """Run a password hashing function in the bounded thread pool, so it never blocks the event loop.
+
+    At most `PASSWORD_HASH_WORKERS` calls run at the same time; the others wait in line. Once
+    `PASSWORD_HASH_MAX_QUEUE` calls are waiting, new ones are rejected with a 503, so a burst of logins is shed
+    instead of making every caller wait for minutes.
+
+    Parameters
+    ----------
+    func: Callable[..., T]
+        The blocking function, e.g. `bcrypt.checkpw`.
+    *args: Any
+        The function's arguments.
+
+    Returns
+    -------
+    T
+        The function's result.
+
+    Raises
+    ------
+    CustomException
+        With status 503, if too many calls are already waiting.
+    """
+    global queue_depth, max_queue_depth, rejected
+
+    if settings.PASSWORD_HASH_MAX_QUEUE and queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        rejected += 1
+        raise CustomException(status_code=503, detail="Too many password checks in progress, please retry later.")
+
+    queue_depth += 1
+    max_queue_depth = max(max_queue_depth, queue_depth)
+    enqueued_at = time.perf_counter()
+    try:
+        await _slots.acquire()
+    finally:
+        queue_depth -= 1
+    wait_time.observe(time.perf_counter() - enqueued_at)
+
+    try:
+        with run_time.time():
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        _slots.release()
+
+
+def get_password_hashing_stats() -> dict[str, Any]:
+    """Return this worker's password hashing statistics.
+
+    Returns
+    -------
+    Dict[str, Any]
+        - "workers": number of threads hashing passwords.
+        - "queue_depth": number of calls currently waiting for a thread, and "max_queue_depth" the highest seen.
+        - "rejected": number of calls rejected because too many were waiting.
+        - "wait_time" and "run_time": cumulative histograms, in seconds, of the time calls waited for a thread and
+          then ran.
+    """
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "queue_depth": queue_depth,
+        "max_queue_depth": max_queue_depth,
+        "rejected": rejected,
+        "wait_time": wait_time.snapshot(),
+        "run_time": run_time.snapshot(),
+    }
@@ -0,0 +1,176 @@
+import asyncio
+from collections.abc import Iterable
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.base.company import Company
+from ...models.permission.resource import Resource, company_resource, role_resource
+from ..config import settings
+from ..logger import logging
+from .cache import LocalCache
+from .pubsub import listen
+
+logger = logging.getLogger(__name__)
+
+PERMISSION_INVALIDATION_CHANNEL = "permissions:invalidate"
+
+client: Redis | None = None
+listener: asyncio.Task | None = None
+resource_index: "ResourceIndex | None" = None
+local_cache = LocalCache(max_size=settings.PERMISSION_CACHE_MAX_SIZE, ttl=settings.PERMISSION_CACHE_TTL)
+_generation = 0
+
+
+class ResourceIndex:
+    """Bit position of every resource, and the resources each one grants through `Resource.parent_id`.
+
+    Effective permissions are stored as a Python int used as a bitset, bit `positions[name]` being set when the
+    resource is granted. Granting a resource grants its whole subtree, so `subtrees[id]` holds the bits of the
+    resource and all its descendants.
+
+    Parameters
+    ----------
+    resources: Iterable[tuple[int, str, int | None]]
+        The id, name and parent id of every resource that is not deleted.
+    """
+
+    def __init__(self, resources: Iterable[tuple[int, str, int | None]]) -> None:
+        resources = sorted(resources)
+        parents = {id: parent_id for id, _, parent_id in resources}
+        self.positions: dict[str, int] = {name: position for position, (_, name, _) in enumerate(resources)}
+        self.subtrees: dict[int, int] = dict.fromkeys(parents, 0)
+
+        for position, (resource_id, _, _) in enumerate(resources):
+            bit = 1 << position
+            seen = set()
+            # Resources whose parent is deleted are roots; the seen set guards against cycles in the tree.
+            id: int | None = resource_id
+            while id is not None and id in self.subtrees and id not in seen:
+                seen.add(id)
+                self.subtrees[id] |= bit
+                id = parents[id]
+
+    def expand(self, resource_ids: Iterable[int]) -> int:
+        """Return the bitset of the given resources and all their descendants."""
+        permissions = 0
+        for resource_id in resource_ids:
+            permissions |= self.subtrees.get(resource_id, 0)
+        return permissions
+
+    def allows(self, permissions: int, name: str) -> bool:
+        """Check in constant time whether a bitset grants the named resource. Unknown resources are denied."""
+        position = self.positions.get(name)
+        return position is not None and bool(permissions >> position & 1)
+
+
+async def get_resource_index(db: AsyncSession) -> ResourceIndex:
+    """Return the resource index, building it from the database on first use or after an invalidation.
+
+    Parameters
+    ----------
+    db: AsyncSession
+        Database session, only used when the index must be built.
+
+    Returns
+    -------
+    ResourceIndex
+        The index of every resource that is not deleted.
+    """
+    global resource_index
+
+    if resource_index is not None:
+        return resource_index
+
+    generation = _generation
+    result = await db.execute(
+        select(Resource.id, Resource.name, Resource.parent_id).where(Resource.is_deleted.is_(False))
+    )
+    index = ResourceIndex(result.tuples().all())
+
+    # An index read while it was being invalidated may be stale, so it is only used for this request.
+    if generation == _generation:
+        resource_index = index
+    return index
+
+
+async def get_permissions(principal: dict[str, Any], db: AsyncSession) -> tuple[ResourceIndex, int]:
+    """Return the effective permissions of a user, from this worker's memory when possible.
+
+    A user may access the resources granted to one of their roles that are also granted to their company, each grant
+    covering the resource's descendants. The resulting bitset is kept for `PERMISSION_CACHE_TTL` seconds, or until
+    `invalidate_permissions` is called by any worker.
+
+    Parameters
+    ----------
+    principal: dict[str, Any]
+        The user, as returned by `get_principal`.
+    db: AsyncSession
+        Database session, only used on a cache miss.
+
+    Returns
+    -------
+    tuple[ResourceIndex, int]
+        The resource index and the user's permissions, to be checked with `ResourceIndex.allows`.
+    """
+    generation = _generation
+    index = await get_resource_index(db)
+    key = str(principal["id"])
+    permissions = local_cache.get(key)
+    if permissions is not None:
+        return index, permissions
+
+    permissions = 0
+    if principal["role_ids"] and principal["company_id"] is not None:
+        result = await db.execute(
+            select(role_resource.c.resource_id).where(role_resource.c.role_id.in_(principal["role_ids"]))
+        )
+        role_permissions = index.expand(result.scalars().all())
+
+        result = await db.execute(
+            select(company_resource.c.resource_id)
+            .join(Company, Company.id == company_resource.c.company_id)
+            .where(company_resource.c.company_id == principal["company_id"], Company.is_deleted.is_(False))
+        )
+        permissions = role_permissions & index.expand(result.scalars().all())
+
+    if generation == _generation:
+        local_cache.set(key, permissions)
+    return index, permissions
+
+
+def clear_permissions() -> None:
+    """Drop the resource index and every user's permissions from the memory of this worker."""
+    global resource_index, _generation
+
+    resource_index = None
+    local_cache.clear()
+    _generation += 1
+
+
+async def invalidate_permissions() -> None:
+    """Drop the permissions from the memory of this worker and notify every other worker to do the same.
+
+    Must be called after any write to resources, roles, companies, or the roles of a user. Bit positions depend on
+    the set of resources, so the index and all the bitsets are dropped together. If the announcement fails, other
+    workers keep their permissions until their subscription is lost or `PERMISSION_CACHE_TTL` expires.
+    """
+    clear_permissions()
+    if client is None:
+        return
+
+    try:
+        await client.publish(PERMISSION_INVALIDATION_CHANNEL, "")
+    except RedisError as e:
+        logger.warning(f"Error announcing permission invalidation: {e}")
+
+
+async def listen_for_invalidations() -> None:
+    """Drop the resource index and the bitsets of this worker when any worker calls `invalidate_permissions`."""
+    if client is None:
+        raise RuntimeError("Redis client is not initialized.")
+
+    await listen(client, PERMISSION_INVALIDATION_CHANNEL, lambda _: clear_permissions(), clear_permissions)
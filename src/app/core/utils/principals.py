@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.permission.role import Role, user_role
+from ...models.user import User
+from ..config import settings
+from ..logger import logging
+from .cache import LocalCache
+from .pubsub import listen
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_INVALIDATION_CHANNEL = "principals:invalidate"
+
+client: Redis | None = None
+listener: asyncio.Task | None = None
+local_cache = LocalCache(max_size=settings.PRINCIPAL_CACHE_MAX_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+_generation = 0
+
+
+async def get_principal(subject: str, db: AsyncSession) -> dict[str, Any] | None:
+    """Return the identity of an authenticated user, from this worker's memory when possible.
+
+    The principal only holds what authorization needs: "id", "username", "email", "company_id", "is_superuser",
+    "tier_id" and "role_ids", the ids of the user's roles that are not deleted. It is kept for
+    `PRINCIPAL_CACHE_TTL` seconds, or until `invalidate_principals` is called by any worker.
+
+    Parameters
+    ----------
+    subject: str
+        The token's subject, a username or an email address.
+    db: AsyncSession
+        Database session, only used on a cache miss.
+
+    Returns
+    -------
+    dict[str, Any] | None
+        The principal, or None if no user that is not deleted matches the subject.
+    """
+    principal: dict[str, Any] | None = local_cache.get(subject)
+    if principal is not None:
+        return principal
+
+    generation = _generation
+    column = User.email if "@" in subject else User.username
+    result = await db.execute(
+        select(User.id, User.username, User.email, User.company_id, User.is_superuser).where(
+            column == subject, User.is_deleted.is_(False)
+        )
+    )
+    user = result.first()
+    if user is None:
+        return None
+
+    result = await db.execute(
+        select(user_role.c.role_id)
+        .join(Role, Role.id == user_role.c.role_id)
+        .where(user_role.c.user_id == user.id, Role.is_deleted.is_(False))
+    )
+    principal = {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "company_id": user.company_id,
+        "is_superuser": user.is_superuser,
+        # Users have no tier in this schema yet, so rate limiting applies the default limits.
+        "tier_id": None,
+        "role_ids": sorted(result.scalars().all()),
+    }
+
+    # A principal read while it was being invalidated may be stale, so it is only used for this request.
+    if generation == _generation:
+        local_cache.set(subject, principal)
+    return principal
+
+
+def clear_principals() -> None:
+    """Drop every principal from the memory of this worker."""
+    global _generation
+
+    local_cache.clear()
+    _generation += 1
+
+
+async def invalidate_principals() -> None:
+    """Drop every principal from the memory of this worker and notify every other worker to do the same.
+
+    Must be called after any write to users, their roles or their company. Principals are small and cheap to reload,
+    so all of them are dropped rather than tracking which ones a write affects. If the announcement fails, other
+    workers keep their principals until their subscription is lost or `PRINCIPAL_CACHE_TTL` expires.
+    """
+    clear_principals()
+    if client is None:
+        return
+
+    try:
+        await client.publish(PRINCIPAL_INVALIDATION_CHANNEL, "")
+    except RedisError as e:
+        logger.warning(f"Error announcing principal invalidation: {e}")
+
+
+async def listen_for_invalidations() -> None:
+    """Drop the principals of this worker when any worker writes users, roles or companies, or the news may be lost."""
+    if client is None:
+        raise RuntimeError("Redis client is not initialized.")
+
+    await listen(client, PRINCIPAL_INVALIDATION_CHANNEL, lambda _: clear_principals(), clear_principals)
@@ -0,0 +1,79 @@
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from redis.asyncio import Redis
+
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1
+
+
+async def _call(callback: Callable[..., Awaitable[None] | None], *args: Any) -> None:
+    result = callback(*args)
+    if inspect.isawaitable(result):
+        await result
+
+
+async def listen(
+    client: Redis,
+    channel: str,
+    on_message: Callable[[Any], Awaitable[None] | None],
+    on_reset: Callable[[], Awaitable[None] | None],
+    on_subscribe: Callable[[], Awaitable[None] | None] | None = None,
+) -> None:
+    """Subscribe to a channel and pass every message's data to `on_message`, resubscribing whenever it is lost.
+
+    Meant to run as a background task for the lifetime of the worker, to keep state held in its memory in sync with
+    the other workers. Messages published while the subscription is down are lost, so `on_reset` is called as soon as
+    it is, to stop relying on that state until `on_subscribe`, if given, rebuilds it once subscribed again.
+
+    Parameters
+    ----------
+    client: Redis
+        The Redis client to subscribe with. It must not have a read timeout, since the subscription waits for messages.
+    channel: str
+        The channel to subscribe to.
+    on_message: Callable[[Any], Awaitable[None] | None]
+        Called with the data of every message, a string or bytes depending on the client.
+    on_reset: Callable[[], Awaitable[None] | None]
+        Called when the subscription is lost.
+    on_subscribe: Callable[[], Awaitable[None] | None] | None, optional
+        Called once subscribed, before any message is handled. If it fails, the subscription is reset too.
+    """
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            if on_subscribe is not None:
+                await _call(on_subscribe)
+
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    await _call(on_message, message["data"])
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.warning(f"Subscription to {channel} lost, resetting the state it keeps in sync: {e}")
+            await _call(on_reset)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+        finally:
+            await pubsub.aclose()  # type: ignore
+
+
+async def cancel_task(task: asyncio.Task | None) -> None:
+    """Cancel a background task and wait for it to finish, doing nothing if it is None."""
+    if task is None:
+        return
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -1,31 +1,222 @@
-from datetime import UTC, datetime
-from typing import Optional
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import Counter
+from typing import Any, Optional
 
 from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import NoScriptError, RedisError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.logger import logging
-from ...schemas.rate_limit import sanitize_path
+from ...models.rate_limit import RateLimit
+from ...models.tier import Tier
+from ...schemas.rate_limit import RateLimitResult, sanitize_path
+from ..config import RateLimitAlgorithm, RateLimitFailureMode
+from .circuit_breaker import CircuitBreaker
+from .pubsub import listen
 
 logger = logging.getLogger(__name__)
 
+RULES_INVALIDATION_CHANNEL = "ratelimit:rules:invalidate"
+LOCAL_SLOT = ""
+
+# Every script takes the counter as KEYS[1], the limit as ARGV[1] and the period in milliseconds as ARGV[2], reads the
+# clock from Redis so all workers agree on it, and returns {allowed, remaining, reset after, retry after}, durations
+# in milliseconds. Keys always get a TTL in the same call, so a dying worker can never leave one behind.
+
+# Window starting with its first request. A counter left without TTL by an older version is given one.
+_FIXED_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local count = redis.call('INCR', KEYS[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    ttl = tonumber(ARGV[2])
+    redis.call('PEXPIRE', KEYS[1], ttl)
+end
+if count > limit then
+    return {0, 0, ttl, ttl}
+end
+return {1, limit - count, ttl, 0}
+"""
+
+# Sorted set of the timestamps, in microseconds, of the requests allowed during the last period. ARGV[3] makes the
+# member unique. Rejected requests are not logged, so a client retrying too early is not locked out for longer.
+_SLIDING_LOG_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2]) * 1000
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - period)
+local count = redis.call('ZCARD', KEYS[1])
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, now .. ':' .. ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    count = count + 1
+    allowed = 1
+end
+local oldest = tonumber(redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')[2])
+local newest = tonumber(redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')[2])
+local reset_after = math.ceil((newest + period - now) / 1000)
+if allowed == 0 then
+    return {0, 0, reset_after, math.ceil((oldest + period - now) / 1000)}
+end
+return {1, limit - count, reset_after, 0}
+"""
+
+# Generic cell rate algorithm: the key holds the theoretical arrival time (TAT), in microseconds, of the next request
+# if requests were evenly spaced by period / limit. A request is allowed unless the TAT is more than one period ahead,
+# so bursts of up to `limit` requests are allowed while the long-run rate never exceeds limit / period.
+_GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2]) * 1000
+local interval = math.floor(period / limit)
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, 0, math.ceil((tat - now) / 1000), math.ceil((allow_at - now) / 1000)}
+end
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {1, math.floor((now - allow_at) / interval), math.ceil((new_tat - now) / 1000), 0}
+"""
+
+# Flushes the requests counted locally by a worker, in fixed windows compatible with _FIXED_WINDOW_SCRIPT. ARGV holds
+# the period in milliseconds and the number of requests of each key, in the order of KEYS. Returns the global count
+# and remaining time to live of each key.
+_SYNC_SCRIPT = """
+local result = {}
+for i = 1, #KEYS do
+    local count = redis.call('INCRBY', KEYS[i], ARGV[i * 2])
+    local ttl = redis.call('PTTL', KEYS[i])
+    if ttl < 0 then
+        ttl = tonumber(ARGV[i * 2 - 1])
+        redis.call('PEXPIRE', KEYS[i], ttl)
+    end
+    result[i] = {count, ttl}
+end
+return result
+"""
+
+# Takes a concurrency slot: KEYS[1] is a sorted set of the requests in flight, scored by start time in milliseconds,
+# ARGV[1] the number of slots, ARGV[2] the time after which a slot is considered leaked, in milliseconds, and ARGV[3]
+# the request's token. Returns 1 if the slot was taken, 0 if none is free.
+_ACQUIRE_SLOT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_SCRIPTS = {
+    RateLimitAlgorithm.FIXED_WINDOW: _FIXED_WINDOW_SCRIPT,
+    RateLimitAlgorithm.SLIDING_LOG: _SLIDING_LOG_SCRIPT,
+    RateLimitAlgorithm.GCRA: _GCRA_SCRIPT,
+}
+
+
+class RateLimitRules:
+    """Rate limits of every tier, compiled into lookup tables.
+
+    Attributes
+    ----------
+    tiers: Dict[int, str]
+        Tier names by id.
+    limits: Dict[Tuple[int, str], Tuple[int, int]]
+        `(limit, period)` by tier id and sanitized path.
+    """
+
+    def __init__(self, tiers: dict[int, str], limits: dict[tuple[int, str], tuple[int, int]]) -> None:
+        self.tiers = tiers
+        self.limits = limits
+
+
+class LocalCounter:
+    """Requests counted by this worker in a fixed window, for approximate rate limiting.
+
+    Attributes
+    ----------
+    count: int
+        Global count of the window as of the last sync, plus the requests admitted locally since.
+    pending: int
+        Requests admitted locally and not yet flushed to Redis.
+    period_ms: int
+        Length of the window, in milliseconds.
+    reset_at: float
+        Time, on the monotonic clock, at which the window ends.
+    """
+
+    __slots__ = ("count", "pending", "period_ms", "reset_at")
+
+    def __init__(self, period_ms: int, reset_at: float) -> None:
+        self.count = 0
+        self.pending = 0
+        self.period_ms = period_ms
+        self.reset_at = reset_at
+
 
 class RateLimiter:
     _instance: Optional["RateLimiter"] = None
     pool: Optional[ConnectionPool] = None
     client: Optional[Redis] = None
+    pubsub_client: Redis | None = None
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW
+    approximate: bool = False
+    approximate_error: float = 0.1
+    failure_mode: RateLimitFailureMode = RateLimitFailureMode.LOCAL
+    breaker: CircuitBreaker = CircuitBreaker()
+    rules: RateLimitRules | None = None
+    rules_listener: asyncio.Task | None = None
+    sync_task: asyncio.Task | None = None
+    _rules_generation: int = 0
+    _rules_lock: asyncio.Lock
+    _script_shas: dict[str, str] = {}
+    _counters: dict[str, LocalCounter] = {}
+    _unsynced: set[str] = set()
+    _fallback_counters: dict[str, LocalCounter] = {}
+    _local_slots: Counter[str] = Counter()
 
     def __new__(cls) -> "RateLimiter":
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._rules_lock = asyncio.Lock()
         return cls._instance
 
     @classmethod
-    def initialize(cls, redis_url: str) -> None:
+    def initialize(
+        cls,
+        redis_url: str,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+        approximate: bool = False,
+        approximate_error: float = 0.1,
+        failure_mode: RateLimitFailureMode = RateLimitFailureMode.LOCAL,
+        timeout: float | None = None,
+        breaker_threshold: int = 5,
+        breaker_recovery: float = 30,
+    ) -> None:
         instance = cls()
+        instance.algorithm = algorithm
+        instance.approximate = approximate
+        instance.approximate_error = approximate_error
+        instance.failure_mode = failure_mode
+        instance.breaker = CircuitBreaker(failure_threshold=breaker_threshold, recovery_timeout=breaker_recovery)
+        # The lock binds to the event loop of its first contended use, which must be the one serving requests.
+        instance._rules_lock = asyncio.Lock()
         if instance.pool is None:
-            instance.pool = ConnectionPool.from_url(redis_url)
+            instance.pool = ConnectionPool.from_url(redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
             instance.client = Redis(connection_pool=instance.pool)
+            # Subscriptions block until a message arrives, so they must not share the timeout of the checks.
+            instance.pubsub_client = Redis.from_url(redis_url, socket_connect_timeout=timeout, socket_keepalive=True)
 
     @classmethod
     def get_client(cls) -> Redis:
@@ -35,27 +226,350 @@ class RateLimiter:
             raise Exception("Redis client is not initialized.")
         return instance.client
 
-    async def is_rate_limited(self, db: AsyncSession, user_id: int, path: str, limit: int, period: int) -> bool:
+    async def _eval_script(self, script: str, keys: list[str], args: list[Any]) -> Any:
+        """Run a Lua script by its SHA1 digest, sending its source only if Redis does not know it yet.
+
+        Calls go through the circuit breaker: while it is open, a `RedisError` is raised without calling Redis.
+        """
         client = self.get_client()
-        current_timestamp = int(datetime.now(UTC).timestamp())
-        window_start = current_timestamp - (current_timestamp % period)
+        sha = self._script_shas.get(script)
+        if sha is None:
+            sha = self._script_shas[script] = hashlib.sha1(script.encode()).hexdigest()
 
-        sanitized_path = sanitize_path(path)
-        key = f"ratelimit:{user_id}:{sanitized_path}:{window_start}"
+        if not self.breaker.allow_request():
+            raise RedisError("Rate limit circuit breaker is open.")
 
         try:
-            current_count = await client.incr(key)
-            if current_count == 1:
-                await client.expire(key, period)
+            try:
+                result = await client.evalsha(sha, len(keys), *keys, *args)  # type: ignore
+            except NoScriptError:
+                result = await client.eval(script, len(keys), *keys, *args)  # type: ignore
 
-            if current_count > limit:
-                return True
+        except RedisError as e:
+            if self.breaker.record_failure():
+                logger.error(
+                    f"Rate limit Redis unavailable, applying {self.failure_mode.value} mode for at least "
+                    f"{self.breaker.recovery_timeout}s: {e}"
+                )
+            raise
+
+        except BaseException:
+            # A trial call cancelled, e.g. by a client disconnecting, or failing otherwise must still settle the
+            # breaker, which would never let another call through. Outside of trials, such calls say nothing of Redis.
+            if self.breaker.is_open:
+                self.breaker.record_failure()
+            raise
+
+        if self.breaker.is_open:
+            logger.info("Rate limit Redis available again.")
+            self._fallback_counters.clear()
+        self.breaker.record_success()
+        return result
+
+    async def check(
+        self,
+        user_id: int | str,
+        path: str,
+        limit: int,
+        period: int,
+        algorithm: RateLimitAlgorithm | None = None,
+        approximate: bool | None = None,
+    ) -> RateLimitResult:
+        """Count a request against a quota, in a single atomic round trip to Redis.
+
+        If Redis fails, or failed repeatedly enough to open the circuit breaker, the request is decided by
+        `check_offline` instead of failing.
+
+        Parameters
+        ----------
+        user_id: int | str
+            The user, or the client's address for anonymous requests, the quota belongs to.
+        path: str
+            The requested path. Each path has its own quota.
+        limit: int
+            Number of requests allowed per period.
+        period: int
+            Length of the period, in seconds.
+        algorithm: RateLimitAlgorithm | None, optional
+            The algorithm to apply, defaulting to the one the limiter was initialized with:
+
+            - FIXED_WINDOW allows `limit` requests per window, starting with its first request. Cheapest, but a
+              client may send up to twice the limit across a window boundary.
+            - SLIDING_LOG allows `limit` requests in any `period` long interval. Exact, but stores one entry per
+              allowed request.
+            - GCRA allows bursts of up to `limit` requests, then spaces requests by `period / limit`. Exact, and
+              stores a single number.
+        approximate: bool | None, optional
+            Whether to count requests locally and sync them to Redis in batches, defaulting to the mode the limiter
+            was initialized with. See `check_locally`.
+
+        Returns
+        -------
+        RateLimitResult
+            Whether the request is limited, the remaining quota and when it resets.
+        """
+        approximate = self.approximate if approximate is None else approximate
+        algorithm = RateLimitAlgorithm.FIXED_WINDOW if approximate else algorithm or self.algorithm
+        key = f"ratelimit:{algorithm.value}:{user_id}:{sanitize_path(path)}"
+        args: list[Any] = [limit, period * 1000]
+        if algorithm == RateLimitAlgorithm.SLIDING_LOG:
+            args.append(uuid.uuid4().hex)
+
+        try:
+            if approximate:
+                return await self.check_locally(key, limit, period)
+
+            allowed, remaining, reset_after, retry_after = await self._eval_script(_SCRIPTS[algorithm], [key], args)
+
+        except RedisError as e:
+            if not self.breaker.is_open:
+                logger.warning(f"Error checking rate limit for user {user_id} on path {path}: {e}")
+            return self.check_offline(key, limit, period)
 
         except Exception as e:
             logger.exception(f"Error checking rate limit for user {user_id} on path {path}: {e}")
             raise e
 
-        return False
+        return RateLimitResult(
+            limited=not allowed,
+            limit=limit,
+            remaining=remaining,
+            reset_after=reset_after / 1000,
+            retry_after=retry_after / 1000,
+        )
+
+    async def check_locally(self, key: str, limit: int, period: int) -> RateLimitResult:
+        """Count a request against a fixed window quota in this worker's memory, syncing with Redis in batches.
+
+        Requests are admitted as long as the last known global count, plus the requests admitted locally since, stays
+        within the limit. Local counts are flushed to Redis, and global counts fetched in return, by `sync`: every
+        sync interval, and as soon as this worker has admitted `approximate_error * limit` requests since the last
+        sync, so a worker never exceeds the limit by more than that. With `n` workers, a client may thus send up to
+        `limit * (1 + n * approximate_error)` requests per window, and small limits, for which this budget is a single
+        request, stay exact.
+
+        Parameters
+        ----------
+        key: str
+            The Redis key of the fixed window counter.
+        limit: int
+            Number of requests allowed per period.
+        period: int
+            Length of the period, in seconds.
+
+        Returns
+        -------
+        RateLimitResult
+            Whether the request is limited, the remaining quota and when it resets, as known by this worker.
+        """
+        now = time.monotonic()
+        counter = self._counters.get(key)
+        if counter is None or counter.reset_at <= now:
+            counter = self._counters[key] = LocalCounter(period_ms=period * 1000, reset_at=now + period)
+
+        admitted = counter.count < limit
+        if admitted:
+            counter.count += 1
+            counter.pending += 1
+            self._unsynced.add(key)
+            if counter.pending >= max(1, int(limit * self.approximate_error)):
+                await self.sync()
+
+        # A sync may reveal that other workers used the rest of the quota in the meantime.
+        limited = not admitted or counter.count > limit
+        reset_after = max(counter.reset_at - time.monotonic(), 0)
+        return RateLimitResult(
+            limited=limited,
+            limit=limit,
+            remaining=max(limit - counter.count, 0),
+            reset_after=reset_after,
+            retry_after=reset_after if limited else 0,
+        )
+
+    def check_offline(self, key: str, limit: int, period: int) -> RateLimitResult:
+        """Decide on a request without Redis, according to the failure mode.
+
+        In `FAIL_OPEN` mode every request is allowed. In `LOCAL` mode requests are counted against fixed windows in
+        this worker's memory, so each worker enforces the limit on its own and a client may send up to `limit` requests
+        per window to every worker. Those counts are dropped once Redis is available again.
+        """
+        if self.failure_mode == RateLimitFailureMode.FAIL_OPEN:
+            return RateLimitResult(limited=False, limit=limit, remaining=limit, reset_after=period, retry_after=0)
+
+        now = time.monotonic()
+        counter = self._fallback_counters.get(key)
+        if counter is None or counter.reset_at <= now:
+            counter = self._fallback_counters[key] = LocalCounter(period_ms=period * 1000, reset_at=now + period)
+
+        counter.count += 1
+        limited = counter.count > limit
+        reset_after = counter.reset_at - now
+        return RateLimitResult(
+            limited=limited,
+            limit=limit,
+            remaining=max(limit - counter.count, 0),
+            reset_after=reset_after,
+            retry_after=reset_after if limited else 0,
+        )
+
+    async def acquire_slot(self, key: str, limit: int, timeout: int) -> str | None:
+        """Take one of the `limit` slots of requests in flight under `key`, shared by every worker.
+
+        Parameters
+        ----------
+        key: str
+            What the slots are shared by, e.g. "user:1" or "company:1".
+        limit: int
+            Number of requests allowed in flight at the same time.
+        timeout: int
+            Time (in seconds) after which a slot that was not released, e.g. by a worker that died, is freed.
+
+        Returns
+        -------
+        str | None
+            The token to pass to `release_slot`, or None if every slot is taken. While Redis is unavailable, slots
+            are counted by this worker only, according to the failure mode, and `LOCAL_SLOT` is returned.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self._eval_script(
+                _ACQUIRE_SLOT_SCRIPT, [f"concurrency:{key}"], [limit, timeout * 1000, token]
+            )
+
+        except RedisError as e:
+            if not self.breaker.is_open:
+                logger.warning(f"Error acquiring concurrency slot for {key}: {e}")
+
+            if self.failure_mode == RateLimitFailureMode.LOCAL and self._local_slots[key] >= limit:
+                return None
+            self._local_slots[key] += 1
+            return LOCAL_SLOT
+
+        return token if acquired else None
+
+    async def release_slot(self, key: str, token: str) -> None:
+        """Release a slot taken by `acquire_slot`. Slots that cannot be released expire after their timeout."""
+        if token == LOCAL_SLOT:
+            self._local_slots[key] -= 1
+            if self._local_slots[key] <= 0:
+                del self._local_slots[key]
+            return
+
+        if self.breaker.is_open:
+            return
+
+        try:
+            await self.get_client().zrem(f"concurrency:{key}", token)
+        except RedisError as e:
+            logger.warning(f"Error releasing concurrency slot for {key}: {e}")
+
+    async def sync(self) -> None:
+        """Flush the requests counted locally to Redis in a single call, and update the global counts in return."""
+        keys = [key for key in self._unsynced if key in self._counters]
+        self._unsynced.clear()
+        if not keys:
+            return
+
+        counters = [self._counters[key] for key in keys]
+        deltas = [counter.pending for counter in counters]
+        args: list[Any] = []
+        for counter, delta in zip(counters, deltas):
+            counter.pending = 0
+            args.extend([counter.period_ms, delta])
+
+        try:
+            results = await self._eval_script(_SYNC_SCRIPT, keys, args)
+
+        except Exception:
+            for key, counter, delta in zip(keys, counters, deltas):
+                counter.pending += delta
+                self._unsynced.add(key)
+            raise
+
+        now = time.monotonic()
+        for counter, (count, ttl) in zip(counters, results):
+            counter.count = count + counter.pending
+            counter.reset_at = now + ttl / 1000
+
+    async def run_sync(self, interval: float) -> None:
+        """Sync local counts with Redis every `interval` seconds and forget the windows that ended.
+
+        Meant to run as a background task for the lifetime of the worker when approximate rate limiting is enabled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # While Redis is unavailable, only requests make the breaker's trial calls.
+                if not self.breaker.is_open:
+                    await self.sync()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"Error syncing local rate limit counters: {e}")
+
+            now = time.monotonic()
+            for key in [key for key, counter in self._counters.items() if counter.reset_at <= now]:
+                if not self._counters[key].pending:
+                    del self._counters[key]
+
+    async def get_rules(self, db: AsyncSession) -> RateLimitRules:
+        """Return the rate limits of every tier, loading them from the database only if they are not in memory.
+
+        Rules stay in process memory until `invalidate_rules` is called by any worker, so rate limit checks cost no
+        query. Concurrent requests arriving while the rules are loaded share the same load.
+        """
+        if self.rules is not None:
+            return self.rules
+
+        async with self._rules_lock:
+            if self.rules is not None:
+                return self.rules
+
+            generation = self._rules_generation
+            tiers = await db.execute(select(Tier.id, Tier.name))
+            limits = await db.execute(select(RateLimit.tier_id, RateLimit.path, RateLimit.limit, RateLimit.period))
+            rules = RateLimitRules(
+                tiers={tier_id: name for tier_id, name in tiers.all()},  # noqa: C416  # Rows are not tuples to mypy
+                limits={(tier_id, path): (limit, period) for tier_id, path, limit, period in limits.all()},
+            )
+
+            # Rules invalidated while loading may have been read before the change, so they are not kept.
+            if generation == self._rules_generation:
+                self.rules = rules
+            return rules
+
+    def clear_rules(self) -> None:
+        """Drop the rules from the memory of this worker, so the next check reloads them."""
+        self.rules = None
+        self._rules_generation += 1
+
+    async def invalidate_rules(self) -> None:
+        """Drop the rules from the memory of this worker and notify every other worker to do the same.
+
+        Must be called after any write to tiers or rate limits. If the announcement fails, other workers keep their
+        rules until their subscription is lost and they resubscribe.
+        """
+        self.clear_rules()
+        try:
+            await self.get_client().publish(RULES_INVALIDATION_CHANNEL, "")
+        except RedisError as e:
+            logger.warning(f"Error announcing rate limit rules invalidation: {e}")
+
+    async def listen_for_rule_invalidations(self) -> None:
+        """Drop the rules of this worker when a tier or rate limit is written on any worker.
+
+        Subscribes with `pubsub_client`, since the checks' client times out reads after `RATE_LIMIT_REDIS_TIMEOUT_MS`.
+        """
+        if self.pubsub_client is None:
+            raise RedisError("Redis client is not initialized.")
+
+        await listen(self.pubsub_client, RULES_INVALIDATION_CHANNEL, lambda _: self.clear_rules(), self.clear_rules)
+
+    async def is_rate_limited(self, db: AsyncSession, user_id: int, path: str, limit: int, period: int) -> bool:
+        result = await self.check(user_id=user_id, path=path, limit=limit, period=period)
+        return result.limited
 
 
 rate_limiter = RateLimiter()
@@ -1,56 +1,147 @@
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from collections.abc import Callable
+from typing import Any
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class ClientCacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to set the `Cache-Control` header for client-side caching on all responses.
+from ..core.utils.etag import compute_etag, etag_matches
+
+CACHE_CONTROL_ATTRIBUTE = "cache_control_policy"
+NOT_MODIFIED_HEADERS = (b"etag", b"cache-control", b"vary", b"expires", b"date", b"content-location")
+
+
+def cache_control(policy: str) -> Callable:
+    """Set the `Cache-Control` policy of an endpoint's responses, whatever their method.
+
+    The policy is read by `ClientCacheMiddleware` and replaces its default for this route only. A `Cache-Control`
+    header set by the endpoint itself still takes precedence.
+
+    Parameters
+    ----------
+    policy: str
+        The `Cache-Control` header value, e.g. "no-store" for endpoints returning credentials.
+
+    Returns
+    -------
+    Callable
+        A decorator function that can be applied to FastAPI endpoint functions.
+
+    Example usage
+    -------------
+
+    ```python
+    @router.post("/login", response_model=Token)
+    @cache_control("no-store")
+    async def login_for_access_token(...): ...
+    ```
+    """
+
+    def wrapper(func: Callable) -> Callable:
+        setattr(func, CACHE_CONTROL_ATTRIBUTE, policy)
+        return func
+
+    return wrapper
+
+
+class ClientCacheMiddleware:
+    """Pure ASGI middleware to make GET responses cheaply revalidatable by clients.
+
+    Successful GET responses get a strong `ETag`, computed from their body unless the endpoint already set one, and a
+    private `Cache-Control` header. A request whose `If-None-Match` matches the ETag gets an empty
+    `304 Not Modified` instead of the body. Routes decorated with `cache_control` get their own policy instead, for
+    every method.
 
     Parameters
     ----------
-    app: FastAPI
-        The FastAPI application instance.
+    app: ASGIApp
+        The ASGI application to wrap.
     max_age: int, optional
-        Duration (in seconds) for which the response should be cached. Defaults to 60 seconds.
+        Duration (in seconds) for which clients may reuse a response without revalidating it. Defaults to 0, meaning
+        clients revalidate on every use.
 
     Attributes
     ----------
     max_age: int
-        Duration (in seconds) for which the response should be cached.
-
-    Methods
-    -------
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        Process the request and set the `Cache-Control` header in the response.
+        Duration (in seconds) for which clients may reuse a response without revalidating it.
+    default_policy: str
+        The `Cache-Control` header value set on GET responses of routes without a policy of their own.
 
     Note
     ----
-        - The `Cache-Control` header instructs clients (e.g., browsers)
-        to cache the response for the specified duration.
+        - Unlike `BaseHTTPMiddleware`, this middleware runs in the request's task and only wraps `send`, so it adds
+        no task or memory stream per request and never breaks streaming.
+        - Responses are `private` by default, since most of them depend on the authenticated user, and shared caches
+        must not store them.
+        - Only responses with a `Content-Length` are hashed, so streamed responses are never buffered.
+        - Endpoints cached with `cache(raw_response=True)` set their ETag from the cached body, and are answered
+        before any query or serialization.
     """
 
-    def __init__(self, app: FastAPI, max_age: int = 60) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, max_age: int = 0) -> None:
+        self.app = app
         self.max_age = max_age
+        self.default_policy = f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        is_get = scope["method"] == "GET"
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        buffered_start: Message | None = None
+        body_chunks: list[bytes] = []
+        discard_body = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal buffered_start, discard_body
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                policy = getattr(scope.get("endpoint"), CACHE_CONTROL_ATTRIBUTE, None)
+                if policy is None and is_get and message["status"] in (200, 304):
+                    policy = self.default_policy
+                if policy is not None and "cache-control" not in headers:
+                    headers["Cache-Control"] = policy
+
+                if is_get and message["status"] == 200:
+                    if "etag" not in headers and "content-length" in headers:
+                        buffered_start = message
+                        return
+
+                    if "etag" in headers and etag_matches(if_none_match, headers["etag"]):
+                        discard_body = True
+                        message = _not_modified(message)
+
+                await send(message)
+
+            elif discard_body:
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+
+            elif buffered_start is not None:
+                body_chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+
+                body = b"".join(body_chunks)
+                headers = MutableHeaders(scope=buffered_start)
+                encoding = headers.get("content-encoding")
+                headers["ETag"] = compute_etag(body, f"-{encoding}" if encoding else "")
+                if etag_matches(if_none_match, headers["etag"]):
+                    await send(_not_modified(buffered_start))
+                    await send({"type": "http.response.body", "body": b""})
+                else:
+                    await send(buffered_start)
+                    await send({"type": "http.response.body", "body": body})
+
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        """Process the request and set the `Cache-Control` header in the response.
-
-        Parameters
-        ----------
-        request: Request
-            The incoming request.
-        call_next: RequestResponseEndpoint
-            The next middleware or route handler in the processing chain.
-
-        Returns
-        -------
-        Response
-            The response object with the `Cache-Control` header set.
-
-        Note
-        ----
-            - This method is automatically called by Starlette for processing the request-response cycle.
-        """
-        response: Response = await call_next(request)
-        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
-        return response
+def _not_modified(start_message: Message) -> dict[str, Any]:
+    """Build the start of a 304 response, keeping only the headers a 304 may carry."""
+    headers = [(name, value) for name, value in start_message["headers"] if name.lower() in NOT_MODIFIED_HEADERS]
+    return {"type": "http.response.start", "status": 304, "headers": headers}
@@ -0,0 +1,41 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.db.database import READ_PRIMARY_COOKIE, SAFE_METHODS
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware pinning a client's reads to the primary for a while after it writes.
+
+    Successful responses to requests that are not reads set the `READ_PRIMARY_COOKIE` cookie for `window` seconds.
+    `async_get_db_readonly` reads from the primary while the cookie is present, so a client never reads from a
+    replica that has not replayed its own writes yet.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The ASGI application to wrap.
+    window: int
+        Duration (in seconds) of the cookie. It should exceed the replication lag tolerated for replicas.
+
+    Note
+    ----
+        Clients that do not keep cookies are not pinned, and may briefly read their writes from a replica as they
+        were before the write.
+    """
+
+    def __init__(self, app: ASGIApp, window: int) -> None:
+        self.app = app
+        self.cookie = f"{READ_PRIMARY_COOKIE}=1; Max-Age={window}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", self.cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, String, Integer, ForeignKey
+from sqlalchemy import DateTime, String, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ...core.db.database import Base
@@ -8,6 +8,8 @@ from ...core.db.database import Base
 
 class Variable(Base):
     __tablename__ = "variable"
+    # Keyset pagination of the variables of a connection, by name.
+    __table_args__ = (Index("ix_variable_connection_id_name_id", "connection_id", "name", "id"),)
 
     id: Mapped[int] = mapped_column("id", autoincrement=True, nullable=False, unique=True, primary_key=True, init=False)
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
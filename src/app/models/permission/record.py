@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, String, ForeignKey, Integer
+from sqlalchemy import DateTime, String, ForeignKey, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ...core.db.database import Base
@@ -8,6 +8,11 @@ from ...core.db.database import Base
 
 class Record(Base):
     __tablename__ = "record"
+    # Keyset pagination of records, newest first, overall and per license.
+    __table_args__ = (
+        Index("ix_record_created_at_id", "created_at", "id"),
+        Index("ix_record_license_id_created_at_id", "license_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column("id", autoincrement=True, nullable=False, unique=True, primary_key=True, init=False)
     type: Mapped[str] = mapped_column(String, nullable=False)
@@ -58,3 +58,17 @@ class RateLimitUpdateInternal(RateLimitUpdate):
 
 class RateLimitDelete(BaseModel):
     pass
+
+
+class RateLimitResult(BaseModel):
+    """Outcome of a rate limit check.
+
+    `reset_after` is the number of seconds until the full quota is available again, and `retry_after` the number of
+    seconds until the next request would be allowed, which is 0 unless the request was limited.
+    """
+
+    limited: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
@@ -0,0 +1,28 @@
+"""add keyset pagination indexes
+
+Revision ID: 3f6c2a9d4b71
+Revises: 8d14c63c7450
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d4b71'
+down_revision: str | None = '8d14c63c7450'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_variable_connection_id_name_id', 'variable', ['connection_id', 'name', 'id'], unique=False)
+    op.create_index('ix_record_created_at_id', 'record', ['created_at', 'id'], unique=False)
+    op.create_index('ix_record_license_id_created_at_id', 'record', ['license_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_record_license_id_created_at_id', table_name='record')
+    op.drop_index('ix_record_created_at_id', table_name='record')
+    op.drop_index('ix_variable_connection_id_name_id', table_name='variable')
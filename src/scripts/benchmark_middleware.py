@@ -0,0 +1,136 @@
+"""Measure the per-request overhead of the client cache middleware.
+
+Requests are sent straight to the ASGI application, without a server or network, so the figures only reflect the
+application stack. Three stacks serve the same endpoint:
+
+- "bare": no middleware.
+- "base_http": the previous `BaseHTTPMiddleware` implementation, which only set a `Cache-Control` header.
+- "asgi": the current pure ASGI `ClientCacheMiddleware`, which also computes an ETag.
+
+Each stack is first timed sequentially, which gives its CPU cost per request, then driven open-loop at a fixed
+rate, which gives its latency under load.
+
+Usage: python -m src.scripts.benchmark_middleware --rps 5000 --duration 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware import _MiddlewareFactory
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import ASGIApp, Message
+
+from ..app.middleware.client_cache_middleware import ClientCacheMiddleware
+
+PAYLOAD = {"data": [{"id": i, "name": f"variable_{i}", "address": f"DB1.DBW{i}"} for i in range(50)]}
+
+
+class BaseHTTPClientCacheMiddleware(BaseHTTPMiddleware):
+    """The middleware as it was before moving to pure ASGI."""
+
+    def __init__(self, app: ASGIApp, max_age: int = 60) -> None:
+        super().__init__(app)
+        self.max_age = max_age
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response: Response = await call_next(request)
+        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+def build_app(middleware: _MiddlewareFactory[[]] | None) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/variables")
+    async def read_variables() -> dict[str, Any]:
+        return PAYLOAD
+
+    return app
+
+
+async def call(app: ASGIApp) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/variables",
+        "raw_path": b"/variables",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def sequential(app: ASGIApp, requests: int) -> float:
+    """Return the mean time, in microseconds, to serve one request at a time."""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def open_loop(app: ASGIApp, rps: int, duration: float) -> list[float]:
+    """Send requests at a fixed rate, regardless of completions, and return their latencies in microseconds."""
+    latencies: list[float] = []
+
+    async def timed(scheduled: float) -> None:
+        await call(app)
+        latencies.append((time.perf_counter() - scheduled) * 1e6)
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed(scheduled)))
+
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def main(rps: int, duration: float, requests: int) -> None:
+    stacks = {
+        "bare": build_app(None),
+        "base_http": build_app(BaseHTTPClientCacheMiddleware),
+        "asgi": build_app(ClientCacheMiddleware),
+    }
+
+    for app in stacks.values():
+        await sequential(app, 1000)
+
+    baseline = await sequential(stacks["bare"], requests)
+    print(f"{'stack':<10} {'us/req':>8} {'overhead':>9} {'p50 us':>8} {'p99 us':>8}  (open loop at {rps} rps)")
+    for name, app in stacks.items():
+        mean = baseline if name == "bare" else await sequential(app, requests)
+        latencies = await open_loop(app, rps, duration)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{name:<10} {mean:>8.1f} {mean - baseline:>+9.1f} {quantiles[49]:>8.1f} {quantiles[98]:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=int, default=5000, help="Request rate of the open-loop run.")
+    parser.add_argument("--duration", type=float, default=5, help="Duration, in seconds, of the open-loop run.")
+    parser.add_argument("--requests", type=int, default=20000, help="Number of requests of the sequential run.")
+    args = parser.parse_args()
+    asyncio.run(main(args.rps, args.duration, args.requests))
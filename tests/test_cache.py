@@ -0,0 +1,562 @@
+"""Unit tests for the Redis cache decorator."""
+
+import asyncio
+import gzip
+from collections import Counter, defaultdict
+from typing import Annotated
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from redis.exceptions import NoScriptError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import QueryParams
+
+from src.app.core.db.database import async_get_db
+from src.app.core.utils import cache as cache_module
+from src.app.core.utils.cache import LocalCache, cache, get_cache_stats, invalidate_cache, warm_cache
+from src.app.core.utils.metrics import Histogram
+
+
+def _request(method: str = "GET") -> Mock:
+    request = Mock()
+    request.method = method
+    return request
+
+
+def _pipeline(*results) -> Mock:
+    pipe = Mock()
+    pipe.execute = AsyncMock(return_value=list(results))
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+    return pipe
+
+
+class TestLocalCache:
+    """Test the in-process LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted once full."""
+        local = LocalCache(max_size=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        assert local.get("a") == 1
+        assert local.get("b") is None
+        assert local.get("c") == 3
+
+    def test_expired_entry_is_dropped(self):
+        """Test that entries past their TTL are not returned."""
+        local = LocalCache(max_size=2, ttl=60)
+        with patch("src.app.core.utils.cache.time.monotonic", return_value=100.0):
+            local.set("a", 1, ttl=5)
+
+        with patch("src.app.core.utils.cache.time.monotonic", return_value=106.0):
+            assert local.get("a") is None
+        assert len(local) == 0
+
+    def test_delete_pattern(self):
+        """Test glob-style eviction."""
+        local = LocalCache(max_size=10, ttl=60)
+        local.set("john_posts:page_1:john", 1)
+        local.set("john_post_cache:1", 2)
+        local.delete_pattern("john_posts:*")
+
+        assert local.get("john_posts:page_1:john") is None
+        assert local.get("john_post_cache:1") == 2
+
+
+class TestCacheDecorator:
+    """Test the cache decorator with the in-process cache enabled."""
+
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_redis(self, mock_redis):
+        """Test that a second GET is served without touching Redis."""
+        endpoint = AsyncMock(return_value={"id": 1})
+
+        @cache(key_prefix="item", resource_id_name="id")
+        async def read_item(request, id: int):
+            return await endpoint(request, id=id)
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", LocalCache(max_size=10, ttl=60)),
+        ):
+            assert await read_item(_request(), id=1) == {"id": 1}
+            assert await read_item(_request(), id=1) == {"id": 1}
+
+        endpoint.assert_awaited_once()
+        mock_redis.get.assert_awaited_once_with("item:1")
+
+    @pytest.mark.asyncio
+    async def test_write_evicts_and_broadcasts(self, mock_redis):
+        """Test that a write evicts the local entry and notifies other workers."""
+        mock_redis.evalsha = AsyncMock(return_value=[b"item:1"])
+        local = LocalCache(max_size=10, ttl=60)
+        local.set("item:1", {"id": 1})
+
+        @cache(key_prefix="item", resource_id_name="id")
+        async def patch_item(request, id: int):
+            return {"message": "updated"}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", local):
+            await patch_item(_request("PATCH"), id=1)
+
+        assert local.get("item:1") is None
+        _, numkeys, key, count, channel = mock_redis.evalsha.await_args.args
+        assert (numkeys, key, count, channel) == (1, "item:1", 1, cache_module.INVALIDATION_CHANNEL)
+
+
+class TestCacheTags:
+    """Test tag-based registration and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_get_registers_entry_under_tags(self, mock_redis):
+        """Test that a filled entry is stored and added to each formatted tag set in one command."""
+        mock_redis.evalsha = AsyncMock()
+
+        @cache(key_prefix="{username}_posts", resource_id_name="username", tags=["{username}_posts"])
+        async def read_posts(request, username: str):
+            return {"data": []}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            await read_posts(_request(), username="john")
+
+        _, numkeys, cache_key, tag_key, body, expiration = mock_redis.evalsha.await_args.args
+        assert (numkeys, cache_key, tag_key, expiration) == (2, "john_posts:john", "cache:tag:john_posts", 3600)
+        assert body == b'{"data": []}'
+        mock_redis.set.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_tags_without_scan(self, mock_redis):
+        """Test that tag invalidation deletes registered keys and never scans."""
+        mock_redis.pipeline = Mock(return_value=_pipeline({b"john_posts:john"}))
+        mock_redis.evalsha = AsyncMock(return_value=[b"john_post_cache:1", b"john_posts:john"])
+        mock_redis.scan = AsyncMock()
+        local = LocalCache(max_size=10, ttl=60)
+        local.set("john_posts:john", {"data": []})
+
+        @cache(key_prefix="{username}_post_cache", resource_id_name="id", tags_to_invalidate=["{username}_posts"])
+        async def patch_post(request, username: str, id: int):
+            return {"message": "Post updated"}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", local):
+            await patch_post(_request("PATCH"), username="john", id=1)
+
+        mock_redis.scan.assert_not_called()
+        mock_redis.pipeline.return_value.smembers.assert_called_once_with("cache:tag:john_posts")
+        _, numkeys, *keys, count, channel = mock_redis.evalsha.await_args.args
+        assert (numkeys, count) == (3, 2)
+        assert keys == ["john_post_cache:1", "john_posts:john", "cache:tag:john_posts"]
+        mock_redis.evalsha.assert_awaited_once()
+        assert local.get("john_posts:john") is None
+
+
+class TestSingleFlight:
+    """Test request coalescing on cache misses."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_run_endpoint_once(self, mock_redis):
+        """Test that concurrent misses in one worker await a single computation."""
+        mock_redis.evalsha = AsyncMock()
+        calls = 0
+
+        @cache(key_prefix="item", resource_id_name="id", single_flight=True)
+        async def read_item(request, id: int):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": id}
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", None),
+            patch.dict(cache_module.coalesced_requests, {"local": Counter(), "remote": Counter()}),
+        ):
+            results = await asyncio.gather(*(read_item(_request(), id=1) for _ in range(5)))
+            coalesced = cache_module.coalesced_requests["local"]["item"]
+
+        assert results == [{"id": 1}] * 5
+        assert calls == 1
+        assert coalesced == 4
+
+    @pytest.mark.asyncio
+    async def test_waits_for_other_worker(self, mock_redis):
+        """Test that a miss waits for the worker holding the lock instead of computing."""
+        mock_redis.get = AsyncMock(side_effect=[None, b'{"id": 1}'])
+        mock_redis.set = AsyncMock(return_value=None)
+        endpoint = AsyncMock()
+
+        @cache(key_prefix="item", resource_id_name="id", single_flight=True)
+        async def read_item(request, id: int):
+            return await endpoint()
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", None),
+            patch.object(cache_module, "SINGLE_FLIGHT_POLL_INTERVAL", 0),
+        ):
+            assert await read_item(_request(), id=1) == {"id": 1}
+
+        endpoint.assert_not_awaited()
+
+
+class TestStaleWhileRevalidate:
+    """Test serving stale entries between the soft and hard expiration."""
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_and_refreshed_once(self, mock_redis):
+        """Test that a stale entry is returned immediately and refreshed by one background task."""
+        mock_redis.pipeline = Mock(return_value=_pipeline(b'{"version": 1}', 10))
+        mock_redis.evalsha = AsyncMock()
+        endpoint = AsyncMock(return_value={"version": 2})
+
+        @cache(key_prefix="items", resource_id_name="id", expiration=60, soft_expiration=30)
+        async def read_items(request, id: int):
+            return await endpoint()
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            first = await read_items(_request(), id=1)
+            second = await read_items(_request(), id=1)
+            await asyncio.gather(*cache_module._background_tasks)
+
+        assert first == second == {"version": 1}
+        endpoint.assert_awaited_once()
+        mock_redis.set.assert_any_await("items:1", b'{"version": 2}', ex=60)
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_not_refreshed(self, mock_redis):
+        """Test that an entry younger than the soft expiration is served as is."""
+        mock_redis.pipeline = Mock(return_value=_pipeline(b'{"version": 1}', 50))
+        endpoint = AsyncMock()
+
+        @cache(key_prefix="items", resource_id_name="id", expiration=60, soft_expiration=30)
+        async def read_items(request, id: int):
+            return await endpoint()
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            assert await read_items(_request(), id=1) == {"version": 1}
+
+        assert not cache_module._background_tasks
+        endpoint.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_refresh_evicts_other_workers_local_copy(self, mock_redis):
+        """Test that a refreshed entry is announced, so other workers stop serving their local copy."""
+        mock_redis.pipeline = Mock(return_value=_pipeline(b'{"version": 1}', 10))
+        mock_redis.evalsha = AsyncMock()
+        mock_redis.publish = AsyncMock()
+
+        @cache(key_prefix="items", resource_id_name="id", expiration=60, soft_expiration=30)
+        async def read_items(request, id: int):
+            return {"version": 2}
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", LocalCache(max_size=10, ttl=5)),
+        ):
+            await read_items(_request(), id=1)
+            await asyncio.gather(*cache_module._background_tasks)
+
+        mock_redis.publish.assert_awaited_once_with(cache_module.INVALIDATION_CHANNEL, '{"keys": ["items:1"]}')
+
+
+class TestRawResponse:
+    """Test returning stored response bodies without JSON round-tripping."""
+
+    @staticmethod
+    def _raw_request(accept_encoding: str = "") -> Mock:
+        request = _request()
+        request.scope = {}
+        request.headers = {"accept-encoding": accept_encoding}
+        return request
+
+    @pytest.mark.asyncio
+    async def test_hit_returns_stored_body(self, mock_redis):
+        """Test that a hit returns the stored bytes as a JSON response."""
+        mock_redis.get = AsyncMock(return_value=b'{"id":1}')
+
+        @cache(key_prefix="item", resource_id_name="id", raw_response=True)
+        async def read_item(request, id: int):
+            raise AssertionError("endpoint should not run on a hit")
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            response = await read_item(self._raw_request(), id=1)
+
+        assert response.body == b'{"id":1}'
+        assert response.media_type == "application/json"
+
+    @pytest.mark.asyncio
+    async def test_compressed_body_sent_to_gzip_clients(self, mock_redis):
+        """Test that large entries are stored gzipped and only decompressed for clients without gzip."""
+        payload = {"data": ["x" * 10] * 200}
+
+        @cache(key_prefix="items", resource_id_name="id", raw_response=True, compress=True)
+        async def read_items(request, id: int):
+            return payload
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            response = await read_items(self._raw_request("gzip, br"), id=1)
+            stored = mock_redis.set.await_args.args[1]
+            mock_redis.get = AsyncMock(return_value=stored)
+            plain = await read_items(self._raw_request(), id=1)
+
+        assert stored.startswith(cache_module.GZIP_MAGIC)
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == plain.body
+        assert "content-encoding" not in plain.headers
+
+    @pytest.mark.asyncio
+    async def test_matching_etag_returns_not_modified(self, mock_redis):
+        """Test that a conditional request matching the stored body's ETag gets an empty 304."""
+        mock_redis.get = AsyncMock(return_value=b'{"id":1}')
+
+        @cache(key_prefix="item", resource_id_name="id", raw_response=True)
+        async def read_item(request, id: int):
+            raise AssertionError("endpoint should not run on a hit")
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            response = await read_item(self._raw_request(), id=1)
+            request = self._raw_request()
+            request.headers["if-none-match"] = response.headers["etag"]
+            not_modified = await read_item(request, id=1)
+
+        assert not_modified.status_code == 304
+        assert not_modified.body == b""
+        assert not_modified.headers["etag"] == response.headers["etag"]
+
+
+class TestRoundTrips:
+    """Test that each decorator call costs a single Redis command."""
+
+    @pytest.mark.asyncio
+    async def test_fill_without_tags_uses_set_ex(self, mock_redis):
+        """Test that an untagged fill stores the entry and its expiration in one command."""
+        mock_redis.expire = AsyncMock()
+
+        @cache(key_prefix="item", resource_id_name="id", expiration=60)
+        async def read_item(request, id: int):
+            return {"id": id}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            await read_item(_request(), id=1)
+
+        mock_redis.set.assert_awaited_once_with("item:1", b'{"id": 1}', ex=60)
+        mock_redis.expire.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_extra_keys_deleted_in_one_command(self, mock_redis):
+        """Test that the resource key and extra keys are invalidated together."""
+        mock_redis.evalsha = AsyncMock(return_value=[])
+
+        @cache(key_prefix="item", resource_id_name="id", to_invalidate_extra={"owner_items": "{owner}"})
+        async def patch_item(request, id: int, owner: str):
+            return {"message": "updated"}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            await patch_item(_request("PATCH"), id=1, owner="john")
+
+        mock_redis.delete.assert_not_called()
+        _, numkeys, *keys, count, channel = mock_redis.evalsha.await_args.args
+        assert (numkeys, keys, count, channel) == (2, ["item:1", "owner_items:john"], 2, "")
+
+    @pytest.mark.asyncio
+    async def test_unknown_script_is_sent_once(self, mock_redis):
+        """Test the fallback to EVAL when Redis does not know a script yet."""
+        mock_redis.evalsha = AsyncMock(side_effect=NoScriptError)
+        mock_redis.eval = AsyncMock(return_value=[])
+
+        with patch.object(cache_module, "client", mock_redis):
+            await cache_module._eval_script(cache_module._RELEASE_LOCK_SCRIPT, ["lock"], ["token"])
+
+        mock_redis.eval.assert_awaited_once_with(cache_module._RELEASE_LOCK_SCRIPT, 1, "lock", "token")
+
+
+class TestEntityCaching:
+    """Test caching of list endpoints and entity-level invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_query_params_are_part_of_the_key(self, mock_redis):
+        """Test that list endpoints are cached per normalized query string."""
+        mock_redis.get = AsyncMock(return_value=None)
+
+        @cache(key_prefix="variables", include_query_params=True, expiration=60)
+        async def read_variables(request, page: int = 1):
+            return {"data": []}
+
+        request = _request()
+        request.query_params = QueryParams("page=2&name=temp")
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            await read_variables(request, page=2)
+
+        assert mock_redis.set.await_args.args[0] == "variables?name=temp&page=2"
+
+    @pytest.mark.asyncio
+    async def test_invalidate_cache_clears_entity_tags(self, mock_redis):
+        """Test that a successful write deletes every entry registered under its tags."""
+        mock_redis.pipeline = Mock(return_value=_pipeline({b"variables?page=1"}))
+        mock_redis.evalsha = AsyncMock(return_value=[b"variables?page=1"])
+
+        @invalidate_cache(tags=["group"])
+        async def patch_group(request, id: int):
+            return {"message": "Group updated"}
+
+        with patch.object(cache_module, "client", mock_redis), patch.object(cache_module, "local_cache", None):
+            await patch_group(_request("PATCH"), id=1)
+
+        _, numkeys, key, tag_key, count, channel = mock_redis.evalsha.await_args.args
+        assert (numkeys, key, tag_key, count, channel) == (2, "variables?page=1", "cache:tag:group", 1, "")
+
+
+class TestWarmCache:
+    """Test preloading cached endpoints on startup."""
+
+    @pytest.mark.asyncio
+    async def test_warms_endpoints_without_path_parameters(self, mock_redis):
+        """Test that opted-in collection endpoints are filled with a fresh session and default query values."""
+        app = FastAPI()
+
+        @app.get("/groups")
+        @cache(key_prefix="groups", include_query_params=True, warm=True)
+        async def read_groups(request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], name: str = ""):
+            return {"data": [], "db": db, "name": name}
+
+        @app.get("/group/{id}")
+        @cache(key_prefix="group", resource_id_name="id", warm=True)
+        async def read_group(request: Request, id: int):
+            return {"id": id}
+
+        session = Mock(spec=AsyncSession)
+        session.__aenter__ = AsyncMock(return_value="session")
+        session.__aexit__ = AsyncMock(return_value=None)
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", None),
+            patch.object(cache_module, "local_session", Mock(return_value=session)),
+        ):
+            await warm_cache(app.routes)
+
+        mock_redis.get.assert_not_called()
+        mock_redis.set.assert_awaited_once_with("groups?", b'{"data": [], "db": "session", "name": ""}', ex=3600)
+
+
+class TestCacheStats:
+    """Test the per-prefix cache statistics."""
+
+    @pytest.mark.asyncio
+    async def test_counts_events_per_key_prefix(self, mock_redis):
+        """Test that lookups, fills and invalidations are counted under the unformatted key prefix."""
+        mock_redis.get = AsyncMock(side_effect=[None, b'{"id": 1}'])
+        mock_redis.evalsha = AsyncMock(return_value=[b"item:1"])
+
+        @cache(key_prefix="{owner}_item", resource_id_name="id")
+        async def item(request, owner: str, id: int):
+            return {"id": id}
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", None),
+            patch.object(cache_module, "cache_events", defaultdict(Counter)),
+            patch.dict(cache_module.redis_latency, {"get": Histogram(), "set": Histogram()}),
+        ):
+            await item(_request(), owner="john", id=1)
+            await item(_request(), owner="jane", id=1)
+            await item(_request("PATCH"), owner="john", id=1)
+            stats = get_cache_stats()
+
+        prefix = stats["prefixes"]["{owner}_item"]
+        assert (prefix["hits"], prefix["misses"], prefix["hit_ratio"], prefix["fills"]) == (1, 1, 0.5, 1)
+        assert prefix["serialized_bytes"] == len(b'{"id": 1}')
+        assert (prefix["invalidations"], prefix["invalidated_keys"]) == (1, 1)
+        assert stats["redis_latency"]["get"]["count"] == 2
+        assert stats["redis_latency"]["set"]["count"] == 1
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that each bucket counts the observations lower than or equal to its bound."""
+        histogram = Histogram(buckets=(0.01, 0.1))
+        for value in (0.005, 0.01, 0.05, 2):
+            histogram.observe(value)
+
+        assert histogram.snapshot()["buckets"] == {"0.01": 2, "0.1": 3, "+Inf": 4}
+
+
+class TestClientTracking:
+    """Test Redis client tracking for the local cache."""
+
+    @pytest.mark.asyncio
+    async def test_connections_redirect_invalidations_in_bcast_mode(self):
+        """Test that pooled connections enable broadcast tracking for the configured prefixes."""
+        connection = Mock()
+        connection.on_connect = AsyncMock()
+        connection.send_command = AsyncMock()
+        connection.read_response = AsyncMock(return_value=b"OK")
+
+        with patch.object(cache_module, "tracking_client_id", 42):
+            await cache_module.tracking_connect_func(bcast=True, prefixes=["plc_types", "groups"])(connection)
+
+        connection.send_command.assert_awaited_once_with(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", 42, "NOLOOP", "BCAST", "PREFIX", "plc_types", "PREFIX", "groups"
+        )
+
+    def test_invalidation_messages_evict_local_entries(self):
+        """Test that announced keys are evicted and a flush clears the local cache."""
+        local = LocalCache(max_size=10, ttl=60)
+        local.set("groups?", {"data": []})
+        local.set("plc_types?", {"data": []})
+
+        with patch.object(cache_module, "local_cache", local):
+            cache_module._handle_tracking_message([b"message", b"__redis__:invalidate", [b"groups?"]])
+            assert (local.get("groups?"), len(local)) == (None, 1)
+
+            cache_module._handle_tracking_message([b"message", b"__redis__:invalidate", None])
+            assert len(local) == 0
+
+    def test_nothing_is_stored_locally_without_tracking_connection(self):
+        """Test that entries are not cached locally while invalidations cannot be received."""
+        local = LocalCache(max_size=10, ttl=60)
+
+        with (
+            patch.object(cache_module, "local_cache", local),
+            patch.object(cache_module, "tracking_enabled", True),
+            patch.object(cache_module, "tracking_client_id", None),
+        ):
+            cache_module._set_local("groups?", {"data": []}, None, 60)
+
+        assert len(local) == 0
+
+    @pytest.mark.asyncio
+    async def test_fills_are_only_stored_locally_once_read_back(self, mock_redis):
+        """Test that a written entry is not cached locally, since Redis does not track keys a connection only wrote."""
+        local = LocalCache(max_size=10, ttl=60)
+
+        with (
+            patch.object(cache_module, "client", mock_redis),
+            patch.object(cache_module, "local_cache", local),
+            patch.object(cache_module, "tracking_enabled", True),
+            patch.object(cache_module, "tracking_client_id", 42),
+        ):
+            await cache_module._set_cached("groups?", b"{}", {}, 60, [], None)
+            assert len(local) == 0
+
+            with patch.object(cache_module, "tracking_bcast", True):
+                await cache_module._set_cached("groups?", b"{}", {}, 60, [], None)
+            assert local.get("groups?") == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_connections_are_reset_when_checked_out(self):
+        """Test that a connection tracked for a previous invalidation connection is reconnected before reuse."""
+        pool = cache_module.TrackingConnectionPool()
+        connection = Mock(is_connected=True, tracking_client_id=41)
+        connection.disconnect = AsyncMock()
+        connection.connect = AsyncMock()
+        connection.can_read_destructive = AsyncMock(return_value=False)
+
+        with patch.object(cache_module, "tracking_client_id", 42):
+            await pool.ensure_connection(connection)
+            connection.disconnect.assert_awaited_once()
+
+            connection.tracking_client_id = 42
+            await pool.ensure_connection(connection)
+            connection.disconnect.assert_awaited_once()
@@ -0,0 +1,83 @@
+"""Unit tests for the client cache middleware."""
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.app.middleware.client_cache_middleware import ClientCacheMiddleware, cache_control
+
+app = FastAPI()
+app.add_middleware(ClientCacheMiddleware)
+
+
+@app.get("/items")
+async def read_items() -> dict[str, list[int]]:
+    return {"data": [1, 2, 3]}
+
+
+@app.get("/profile")
+async def read_profile(response: Response) -> dict[str, str]:
+    response.headers["Cache-Control"] = "no-store"
+    return {"name": "john"}
+
+
+@app.post("/login")
+@cache_control("no-store")
+async def login() -> dict[str, str]:
+    return {"access_token": "token"}
+
+
+@app.get("/stream")
+async def read_stream() -> StreamingResponse:
+    return StreamingResponse(iter([b"first", b"second"]))
+
+
+@app.post("/items")
+async def write_item() -> dict[str, str]:
+    return {"message": "created"}
+
+
+client = TestClient(app)
+
+
+class TestClientCacheMiddleware:
+    """Test ETag validation and Cache-Control headers."""
+
+    def test_get_responses_are_private_and_revalidated(self):
+        """Test that GET responses get an ETag and must be revalidated by private caches only."""
+        response = client.get("/items")
+
+        assert response.headers["cache-control"] == "private, no-cache"
+        assert response.headers["etag"].startswith('"')
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test that If-None-Match with the current ETag gets an empty 304, and a stale one the full body."""
+        etag = client.get("/items").headers["etag"]
+
+        not_modified = client.get("/items", headers={"If-None-Match": f'W/"stale", {etag}'})
+        modified = client.get("/items", headers={"If-None-Match": '"stale"'})
+
+        assert (not_modified.status_code, not_modified.content) == (304, b"")
+        assert not_modified.headers["etag"] == etag
+        assert modified.json() == {"data": [1, 2, 3]}
+
+    def test_endpoint_headers_are_kept(self):
+        """Test that a Cache-Control set by the endpoint is not overridden."""
+        assert client.get("/profile").headers["cache-control"] == "no-store"
+
+    def test_route_policy_applies_to_every_method(self):
+        """Test that a route's own policy replaces the default, even for non-GET responses."""
+        response = client.post("/login")
+
+        assert response.headers["cache-control"] == "no-store"
+        assert "etag" not in response.headers
+
+    def test_streams_and_writes_are_untouched(self):
+        """Test that streamed bodies are passed through and non-GET responses get no validators."""
+        stream = client.get("/stream")
+        write = client.post("/items")
+
+        assert stream.content == b"firstsecond"
+        assert "etag" not in stream.headers
+        assert "etag" not in write.headers
+        assert "cache-control" not in write.headers
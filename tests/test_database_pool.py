@@ -0,0 +1,46 @@
+"""Unit tests for the database connection pool."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from src.app.core import setup
+
+
+def _connection(error=None):
+    return Mock(start=AsyncMock(side_effect=error), close=AsyncMock())
+
+
+class TestWarmDatabasePool:
+    """Test the connections opened at startup."""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_opened_and_returned(self):
+        """Test that at most the pool size is opened, and every connection is returned to the pool."""
+        connections = [_connection() for _ in range(3)]
+        engine = Mock(connect=Mock(side_effect=connections))
+
+        with patch.object(setup, "engine", engine), patch.object(setup.settings, "DATABASE_POOL_SIZE", 3):
+            await setup.warm_database_pool(10)
+
+        assert engine.connect.call_count == 3
+        for connection in connections:
+            connection.start.assert_awaited_once()
+            connection.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_database_does_not_fail_startup(self):
+        """Test that connections failing to open are logged, and only the opened ones are closed."""
+        opened, failed = _connection(), _connection(error=OSError("connection refused"))
+        engine = Mock(connect=Mock(side_effect=[opened, failed]))
+
+        with (
+            patch.object(setup, "engine", engine),
+            patch.object(setup.settings, "DATABASE_POOL_SIZE", 2),
+            patch.object(setup, "logger") as mock_logger,
+        ):
+            await setup.warm_database_pool(2)
+
+        opened.close.assert_awaited_once()
+        failed.close.assert_not_awaited()
+        mock_logger.warning.assert_called_once()
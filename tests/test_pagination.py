@@ -0,0 +1,117 @@
+"""Unit tests for cursor pagination and count modes."""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from sqlalchemy import select
+
+from src.app.core.exceptions.http_exceptions import BadRequestException
+from src.app.core.utils.pagination import (
+    CountMode,
+    count_mode_limit,
+    count_mode_response,
+    decode_cursor,
+    encode_cursor,
+    paginate_by_cursor,
+)
+from src.app.models.permission.record import Record
+
+CREATED_AT = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _crud(ids):
+    return Mock(
+        model=Record,
+        select=AsyncMock(return_value=select(Record)),
+        get_multi=AsyncMock(return_value={"data": [{"id": id} for id in ids]}),
+    )
+
+
+class TestCursor:
+    """Test the encoding of cursors."""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes to the position it was made from."""
+        cursor = encode_cursor("next", CREATED_AT, 42)
+
+        assert decode_cursor(cursor, datetime) == ("next", CREATED_AT, 42)
+
+    @pytest.mark.parametrize("cursor", ["garbage!", encode_cursor("sideways", "a", 1), encode_cursor("next", 3, 1)])
+    def test_invalid_cursor_is_rejected(self, cursor):
+        """Test that malformed cursors, unknown directions and mistyped values are rejected."""
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, str)
+
+
+class TestPaginateByCursor:
+    """Test the pages located by cursor."""
+
+    @pytest.mark.asyncio
+    async def test_first_page(self, mock_db):
+        """Test that the first page has a next cursor when more rows exist, and no previous cursor."""
+        mock_db.execute = AsyncMock(
+            return_value=Mock(all=Mock(return_value=[(CREATED_AT, 9), (CREATED_AT, 8), (CREATED_AT, 7)]))
+        )
+        crud = _crud([8, 9])
+
+        page = await paginate_by_cursor(crud, mock_db, "", 2, sort_column="created_at", descending=True)
+
+        assert [item["id"] for item in page["data"]] == [9, 8]
+        assert page["prev_cursor"] is None
+        assert decode_cursor(page["next_cursor"], datetime) == ("next", CREATED_AT, 8)
+
+    @pytest.mark.asyncio
+    async def test_previous_page_is_returned_in_listing_order(self, mock_db):
+        """Test that a page before the cursor is scanned backwards but returned in the listing's order."""
+        mock_db.execute = AsyncMock(return_value=Mock(all=Mock(return_value=[(CREATED_AT, 7), (CREATED_AT, 8)])))
+        crud = _crud([7, 8])
+
+        cursor = encode_cursor("prev", CREATED_AT, 6)
+        page = await paginate_by_cursor(crud, mock_db, cursor, 2, sort_column="created_at", descending=True)
+
+        assert [item["id"] for item in page["data"]] == [8, 7]
+        assert page["prev_cursor"] is None
+        assert decode_cursor(page["next_cursor"], datetime) == ("next", CREATED_AT, 7)
+        statement = str(mock_db.execute.await_args.args[0])
+        assert "(record.created_at, record.id) >" in statement
+
+
+class TestCountMode:
+    """Test the responses of listings that are not counted exactly."""
+
+    @pytest.mark.asyncio
+    async def test_none_derives_has_more_from_an_extra_row(self, mock_db):
+        """Test that the extra row fetched is dropped, tells there are more rows, and nothing is counted."""
+        rows = {"data": [{"id": id} for id in range(count_mode_limit(2, CountMode.NONE))]}
+
+        response = await count_mode_response(_crud([]), mock_db, rows, 1, 2, CountMode.NONE)
+
+        assert [item["id"] for item in response["data"]] == [0, 1]
+        assert response["has_more"] is True
+        assert response["total_count"] is None
+        mock_db.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_estimated_count_is_capped(self, mock_db):
+        """Test that counts above the cap are reported as the cap, flagged as a lower bound."""
+        mock_db.execute = AsyncMock(return_value=Mock(scalar_one=Mock(return_value=101)))
+        rows = {"data": [{"id": id} for id in range(3)]}
+
+        with patch("src.app.core.utils.pagination.settings.PAGINATION_COUNT_CAP", 100):
+            response = await count_mode_response(_crud([]), mock_db, rows, 1, 2, CountMode.ESTIMATED)
+
+        assert response["total_count"] == 100
+        assert response["total_count_capped"] is True
+        assert "LIMIT" in str(mock_db.execute.await_args.args[0])
+
+    @pytest.mark.asyncio
+    async def test_estimated_count_of_the_last_page_is_exact(self, mock_db):
+        """Test that the last page gives the exact count without counting."""
+        rows = {"data": [{"id": id} for id in range(1)]}
+
+        response = await count_mode_response(_crud([]), mock_db, rows, 3, 2, CountMode.ESTIMATED)
+
+        assert response["total_count"] == 5
+        assert response["total_count_capped"] is False
+        mock_db.execute.assert_not_called()
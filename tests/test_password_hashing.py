@@ -0,0 +1,56 @@
+"""Unit tests for the password hashing pool."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.app.core.exceptions.http_exceptions import CustomException
+from src.app.core.security import hash_password, verify_password
+from src.app.core.utils import password_hashing
+
+
+class TestPasswordHashing:
+    """Test password work running off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_password_is_hashed_and_verified_in_pool(self):
+        """Test that a hashed password verifies, with every bcrypt call timed by the pool."""
+        hashed = await hash_password("Str1ngst!")
+
+        assert await verify_password("Str1ngst!", hashed)
+        assert not await verify_password("wrong", hashed)
+        assert password_hashing.get_password_hashing_stats()["run_time"]["count"] >= 3
+
+    @pytest.mark.asyncio
+    async def test_calls_wait_for_a_free_thread(self):
+        """Test that calls beyond the number of threads are counted as queued until a thread is free."""
+        release = threading.Event()
+
+        with patch.object(password_hashing, "_slots", asyncio.Semaphore(1)):
+            first = asyncio.create_task(password_hashing.run(release.wait))
+            second = asyncio.create_task(password_hashing.run(lambda: "done"))
+            await asyncio.sleep(0.01)
+
+            assert password_hashing.queue_depth == 1
+
+            release.set()
+            await first
+
+            assert await second == "done"
+            assert password_hashing.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected(self):
+        """Test that calls are rejected with a 503 once too many are waiting."""
+        with (
+            patch.object(password_hashing.settings, "PASSWORD_HASH_MAX_QUEUE", 2),
+            patch.object(password_hashing, "queue_depth", 2),
+            patch.object(password_hashing, "rejected", 0),
+        ):
+            with pytest.raises(CustomException) as exc_info:
+                await password_hashing.run(lambda: True)
+
+            assert exc_info.value.status_code == 503
+            assert password_hashing.rejected == 1
@@ -0,0 +1,95 @@
+"""Unit tests for the effective permission engine."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.app.api.dependencies import require_permission
+from src.app.core.exceptions.http_exceptions import ForbiddenException
+from src.app.core.utils import permissions
+from src.app.core.utils.cache import LocalCache
+
+
+def _scalars(values):
+    return Mock(scalars=Mock(return_value=Mock(all=Mock(return_value=list(values)))))
+
+
+def _tuples(values):
+    return Mock(tuples=Mock(return_value=Mock(all=Mock(return_value=list(values)))))
+
+
+RESOURCES = [(1, "equipment", None), (2, "equipment.read", 1), (3, "equipment.write", 1), (4, "collect", None)]
+PRINCIPAL = {"id": 7, "company_id": 2, "is_superuser": False, "role_ids": [5]}
+
+
+class TestResourceIndex:
+    """Test the compilation of resources into bitsets."""
+
+    def test_grant_covers_descendants(self):
+        """Test that granting a resource grants its subtree and nothing else."""
+        index = permissions.ResourceIndex(RESOURCES)
+        granted = index.expand([1])
+
+        assert index.allows(granted, "equipment")
+        assert index.allows(granted, "equipment.write")
+        assert not index.allows(granted, "collect")
+        assert not index.allows(granted, "unknown")
+
+    def test_cycle_does_not_loop(self):
+        """Test that a cycle in parent ids is tolerated."""
+        index = permissions.ResourceIndex([(1, "a", 2), (2, "b", 1)])
+
+        assert index.allows(index.expand([1]), "b")
+
+
+class TestRequirePermission:
+    """Test the permission dependency."""
+
+    @pytest.mark.asyncio
+    async def test_role_and_company_grants_are_intersected(self, mock_db):
+        """Test that only resources granted to both a role and the company are allowed, and are compiled once."""
+        mock_db.execute = AsyncMock(side_effect=[_tuples(RESOURCES), _scalars([1, 4]), _scalars([2])])
+
+        with (
+            patch.object(permissions, "local_cache", LocalCache(ttl=300)),
+            patch.object(permissions, "resource_index", None),
+        ):
+            assert await require_permission("equipment.read")(PRINCIPAL, mock_db) is PRINCIPAL
+            with pytest.raises(ForbiddenException):
+                await require_permission("collect")(PRINCIPAL, mock_db)
+            with pytest.raises(ForbiddenException):
+                await require_permission("equipment.write")(PRINCIPAL, mock_db)
+
+        assert mock_db.execute.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_announced(self, mock_redis):
+        """Test that invalidating drops the permissions of this worker and notifies the others."""
+        mock_redis.publish = AsyncMock(return_value=1)
+        local_cache = LocalCache(ttl=300)
+        local_cache.set("7", 0b101)
+
+        with (
+            patch.object(permissions, "local_cache", local_cache),
+            patch.object(permissions, "resource_index", permissions.ResourceIndex(RESOURCES)),
+            patch.object(permissions, "client", mock_redis),
+        ):
+            await permissions.invalidate_permissions()
+
+            assert permissions.resource_index is None
+
+        assert local_cache.get("7") is None
+        mock_redis.publish.assert_awaited_once_with(permissions.PERMISSION_INVALIDATION_CHANNEL, "")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_survives_redis_errors(self, mock_redis):
+        """Test that a failed announcement does not fail the write that invalidated the permissions."""
+        mock_redis.publish = AsyncMock(side_effect=RedisConnectionError("down"))
+        local_cache = LocalCache(ttl=300)
+        local_cache.set("7", 0b101)
+
+        with patch.object(permissions, "local_cache", local_cache), patch.object(permissions, "client", mock_redis):
+            await permissions.invalidate_permissions()
+
+        assert local_cache.get("7") is None
@@ -0,0 +1,64 @@
+"""Unit tests for the principal cache."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.app.core.utils import principals
+from src.app.core.utils.cache import LocalCache
+
+
+def _result(first=None, scalars=()):
+    return Mock(first=Mock(return_value=first), scalars=Mock(return_value=Mock(all=Mock(return_value=list(scalars)))))
+
+
+class TestPrincipalCache:
+    """Test the principals kept in memory."""
+
+    @pytest.mark.asyncio
+    async def test_principal_is_loaded_once(self, mock_db):
+        """Test that a principal is loaded on first use and then served without any query."""
+        user = Mock(id=1, username="userson", email="user.userson@example.com", company_id=2, is_superuser=False)
+        mock_db.execute = AsyncMock(side_effect=[_result(first=user), _result(scalars=[5, 3])])
+
+        with patch.object(principals, "local_cache", LocalCache(ttl=30)):
+            first = await principals.get_principal("userson", mock_db)
+            second = await principals.get_principal("userson", mock_db)
+
+        assert first is second
+        assert first == {
+            "id": 1,
+            "username": "userson",
+            "email": "user.userson@example.com",
+            "company_id": 2,
+            "is_superuser": False,
+            "tier_id": None,
+            "role_ids": [3, 5],
+        }
+        assert mock_db.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_announced(self, mock_redis):
+        """Test that invalidating drops the principals of this worker and notifies the others."""
+        mock_redis.publish = AsyncMock(return_value=1)
+        local_cache = LocalCache(ttl=30)
+        local_cache.set("userson", {"id": 1})
+
+        with patch.object(principals, "local_cache", local_cache), patch.object(principals, "client", mock_redis):
+            await principals.invalidate_principals()
+
+        assert local_cache.get("userson") is None
+        mock_redis.publish.assert_awaited_once_with(principals.PRINCIPAL_INVALIDATION_CHANNEL, "")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_survives_redis_errors(self, mock_redis):
+        """Test that a failed announcement does not fail the write that invalidated the principals."""
+        mock_redis.publish = AsyncMock(side_effect=RedisConnectionError("down"))
+        local_cache = LocalCache(ttl=30)
+        local_cache.set("userson", {"id": 1})
+
+        with patch.object(principals, "local_cache", local_cache), patch.object(principals, "client", mock_redis):
+            await principals.invalidate_principals()
+
+        assert local_cache.get("userson") is None
@@ -0,0 +1,71 @@
+"""Unit tests for the pub/sub listener shared by the in-memory caches."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.app.core.utils import pubsub
+
+
+def _subscription(*messages, error=None):
+    async def listen():
+        for message in messages:
+            yield message
+        if error is not None:
+            raise error
+        await asyncio.Event().wait()
+
+    return Mock(subscribe=AsyncMock(), listen=listen, aclose=AsyncMock())
+
+
+class TestListen:
+    """Test the subscription loop."""
+
+    @pytest.mark.asyncio
+    async def test_message_data_is_passed_on(self):
+        """Test that only published messages reach the callback, with their data."""
+        received = []
+        subscription = _subscription({"type": "subscribe", "data": 1}, {"type": "message", "data": b"key"})
+        client = Mock(pubsub=Mock(return_value=subscription))
+
+        task = asyncio.create_task(pubsub.listen(client, "channel", received.append, Mock()))
+        await asyncio.sleep(0)
+        await pubsub.cancel_task(task)
+
+        subscription.subscribe.assert_awaited_once_with("channel")
+        subscription.aclose.assert_awaited_once()
+        assert received == [b"key"]
+
+    @pytest.mark.asyncio
+    async def test_lost_subscription_resets_and_resubscribes(self):
+        """Test that the state is reset when the subscription is lost and rebuilt once subscribed again."""
+        on_reset = Mock()
+        on_subscribe = AsyncMock()
+        subscriptions = [_subscription(error=RedisConnectionError("Connection lost")), _subscription()]
+        client = Mock(pubsub=Mock(side_effect=subscriptions))
+
+        with patch.object(pubsub, "RECONNECT_DELAY", 0):
+            task = asyncio.create_task(pubsub.listen(client, "channel", Mock(), on_reset, on_subscribe=on_subscribe))
+            for _ in range(5):
+                await asyncio.sleep(0)
+            await pubsub.cancel_task(task)
+
+        on_reset.assert_called_once_with()
+        assert on_subscribe.await_count == 2
+        assert all(subscription.aclose.await_count == 1 for subscription in subscriptions)
+
+
+class TestCancelTask:
+    """Test the teardown of background tasks."""
+
+    @pytest.mark.asyncio
+    async def test_task_is_cancelled_and_awaited(self):
+        """Test that the task is done once cancelled, and that no task is a no-op."""
+        task = asyncio.create_task(asyncio.Event().wait())
+
+        await pubsub.cancel_task(task)
+        await pubsub.cancel_task(None)
+
+        assert task.cancelled()
@@ -0,0 +1,268 @@
+"""Unit tests for the Redis rate limiter."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import NoScriptError
+
+from src.app.api import dependencies
+from src.app.core.config import RateLimitAlgorithm, RateLimitFailureMode
+from src.app.core.exceptions.http_exceptions import RateLimitException
+from src.app.core.utils.circuit_breaker import CircuitBreaker
+from src.app.core.utils.rate_limit import _GCRA_SCRIPT, RULES_INVALIDATION_CHANNEL, RateLimiter
+
+
+class TestRateLimiter:
+    """Test the rate limit checks."""
+
+    @pytest.mark.asyncio
+    async def test_check_is_a_single_script_call(self, mock_redis):
+        """Test that a check costs one round trip and reports the remaining quota and reset time."""
+        mock_redis.evalsha = AsyncMock(return_value=[1, 4, 1500, 0])
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "client", mock_redis):
+            result = await limiter.check(
+                user_id=1, path="/api/v1/users/", limit=5, period=60, algorithm=RateLimitAlgorithm.GCRA
+            )
+
+        _, numkeys, key, limit, period = mock_redis.evalsha.await_args.args
+        assert (numkeys, key, limit, period) == (1, "ratelimit:gcra:1:api_v1_users", 5, 60000)
+        assert not result.limited
+        assert (result.remaining, result.reset_after, result.retry_after) == (4, 1.5, 0)
+        mock_redis.incr.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_limited_request_reports_retry_after(self, mock_redis):
+        """Test that a rejected request reports when the next one would be allowed."""
+        mock_redis.evalsha = AsyncMock(return_value=[0, 0, 60000, 12000])
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "algorithm", RateLimitAlgorithm.GCRA):
+            assert await limiter.is_rate_limited(db=None, user_id=1, path="users", limit=5, period=60)
+            result = await limiter.check(user_id=1, path="users", limit=5, period=60)
+
+        assert (result.limited, result.remaining, result.retry_after) == (True, 0, 12)
+
+    @pytest.mark.asyncio
+    async def test_unknown_script_is_sent_once(self, mock_redis):
+        """Test the fallback to EVAL when Redis does not know the script yet."""
+        mock_redis.evalsha = AsyncMock(side_effect=NoScriptError)
+        mock_redis.eval = AsyncMock(return_value=[1, 4, 12000, 0])
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "client", mock_redis):
+            await limiter.check(user_id=1, path="users", limit=5, period=60, algorithm=RateLimitAlgorithm.GCRA)
+
+        assert mock_redis.eval.await_args.args[0] == _GCRA_SCRIPT
+
+
+class TestRateLimitRules:
+    """Test the in-memory rate limit rules."""
+
+    @pytest.mark.asyncio
+    async def test_rules_are_loaded_once(self, mock_db):
+        """Test that rules are compiled from the database on first use and then served from memory."""
+        mock_db.execute = AsyncMock(
+            side_effect=[Mock(all=Mock(return_value=[(1, "free")])), Mock(all=Mock(return_value=[(1, "users", 5, 60)]))]
+        )
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "rules", None):
+            first = await limiter.get_rules(mock_db)
+            second = await limiter.get_rules(mock_db)
+
+        assert first is second
+        assert first.tiers == {1: "free"}
+        assert first.limits == {(1, "users"): (5, 60)}
+        assert mock_db.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_announced(self, mock_redis):
+        """Test that invalidating drops the rules of this worker and notifies the others."""
+        mock_redis.publish = AsyncMock(return_value=1)
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "rules", Mock()):
+            await limiter.invalidate_rules()
+            assert limiter.rules is None
+
+        mock_redis.publish.assert_awaited_once_with(RULES_INVALIDATION_CHANNEL, "")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_survives_redis_errors(self, mock_redis):
+        """Test that a failed announcement does not fail the write that invalidated the rules."""
+        mock_redis.publish = AsyncMock(side_effect=RedisConnectionError("down"))
+        limiter = RateLimiter()
+
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "rules", Mock()):
+            await limiter.invalidate_rules()
+            assert limiter.rules is None
+
+    def test_subscription_has_no_read_timeout(self):
+        """Test that the rules subscription waits for messages without timing out, unlike the checks."""
+        limiter = RateLimiter()
+
+        with (
+            patch.object(limiter, "pool", None),
+            patch.object(limiter, "client", None),
+            patch.object(limiter, "pubsub_client", None),
+            patch.object(limiter, "breaker", limiter.breaker),
+        ):
+            limiter.initialize("redis://localhost:6379", timeout=0.25)
+
+            assert limiter.pool.connection_kwargs["socket_timeout"] == 0.25
+            assert limiter.pubsub_client.connection_pool.connection_kwargs.get("socket_timeout") is None
+
+
+class TestApproximateRateLimiting:
+    """Test the local counting of requests."""
+
+    @pytest.mark.asyncio
+    async def test_requests_are_synced_in_batches(self, mock_redis):
+        """Test that requests within the error budget make no Redis call, and the budget triggers a single sync."""
+        mock_redis.evalsha = AsyncMock(return_value=[[10, 59000]])
+        limiter = RateLimiter()
+
+        with (
+            patch.object(limiter, "client", mock_redis),
+            patch.object(limiter, "approximate_error", 0.1),
+            patch.object(limiter, "_counters", {}),
+            patch.object(limiter, "_unsynced", set()),
+        ):
+            for _ in range(9):
+                await limiter.check(user_id=1, path="users", limit=100, period=60, approximate=True)
+            mock_redis.evalsha.assert_not_called()
+
+            result = await limiter.check(user_id=1, path="users", limit=100, period=60, approximate=True)
+
+        _, numkeys, key, period, delta = mock_redis.evalsha.await_args.args
+        assert (numkeys, key, period, delta) == (1, "ratelimit:fixed_window:1:users", 60000, 10)
+        assert not result.limited
+        assert result.remaining == 90
+
+    @pytest.mark.asyncio
+    async def test_quota_used_by_other_workers_limits(self, mock_redis):
+        """Test that requests are limited once a sync reveals the global count exceeds the limit."""
+        mock_redis.evalsha = AsyncMock(return_value=[[105, 30000]])
+        limiter = RateLimiter()
+
+        with (
+            patch.object(limiter, "client", mock_redis),
+            patch.object(limiter, "approximate_error", 0.01),
+            patch.object(limiter, "_counters", {}),
+            patch.object(limiter, "_unsynced", set()),
+        ):
+            first = await limiter.check(user_id=1, path="users", limit=100, period=60, approximate=True)
+            second = await limiter.check(user_id=1, path="users", limit=100, period=60, approximate=True)
+
+        assert first.limited and second.limited
+        assert mock_redis.evalsha.await_count == 1
+        assert 29 < second.retry_after <= 30
+
+
+class TestDegradedMode:
+    """Test rate limiting while Redis is unavailable."""
+
+    @pytest.mark.asyncio
+    async def test_local_fallback_and_circuit_breaker(self, mock_redis):
+        """Test that failures are counted locally, and that Redis is no longer called once the breaker opens."""
+        mock_redis.evalsha = AsyncMock(side_effect=RedisConnectionError)
+        limiter = RateLimiter()
+
+        with (
+            patch.object(limiter, "client", mock_redis),
+            patch.object(limiter, "failure_mode", RateLimitFailureMode.LOCAL),
+            patch.object(limiter, "breaker", CircuitBreaker(failure_threshold=2, recovery_timeout=30)),
+            patch.object(limiter, "_fallback_counters", {}),
+        ):
+            results = [await limiter.check(user_id=1, path="users", limit=3, period=60) for _ in range(4)]
+            assert limiter.breaker.is_open
+
+        assert [result.limited for result in results] == [False, False, False, True]
+        assert mock_redis.evalsha.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_fail_open(self, mock_redis):
+        """Test that every request is allowed in fail-open mode."""
+        mock_redis.evalsha = AsyncMock(side_effect=RedisConnectionError)
+        limiter = RateLimiter()
+
+        with (
+            patch.object(limiter, "client", mock_redis),
+            patch.object(limiter, "failure_mode", RateLimitFailureMode.FAIL_OPEN),
+            patch.object(limiter, "breaker", CircuitBreaker()),
+        ):
+            results = [await limiter.check(user_id=1, path="users", limit=1, period=60) for _ in range(3)]
+
+        assert not any(result.limited for result in results)
+
+    def test_breaker_lets_a_single_trial_through(self):
+        """Test that an open breaker lets one call through after the recovery timeout, and closes if it succeeds."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+
+        assert breaker.record_failure()
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert not breaker.is_open
+        assert breaker.allow_request()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_trial_does_not_block_the_breaker(self, mock_redis):
+        """Test that a trial call cancelled midway lets another trial through after the recovery timeout."""
+        mock_redis.evalsha = AsyncMock(side_effect=asyncio.CancelledError)
+        limiter = RateLimiter()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "breaker", breaker):
+            with pytest.raises(asyncio.CancelledError):
+                await limiter.check(user_id=1, path="users", limit=5, period=60)
+
+            assert breaker.is_open
+            assert breaker.allow_request()
+
+
+class TestConcurrencyLimiter:
+    """Test the limit of requests in flight."""
+
+    @pytest.mark.asyncio
+    async def test_slots_are_held_during_the_request(self):
+        """Test that user and company slots are taken before the request and released after it."""
+        user = {"id": 1, "company_id": 2}
+
+        with (
+            patch.object(dependencies, "CONCURRENCY_LIMIT_PER_USER", 2),
+            patch.object(dependencies, "CONCURRENCY_LIMIT_PER_COMPANY", 10),
+            patch.object(dependencies.rate_limiter, "acquire_slot", AsyncMock(side_effect=["a", "b"])) as acquire,
+            patch.object(dependencies.rate_limiter, "release_slot", AsyncMock()) as release,
+        ):
+            dependency = dependencies.concurrency_limiter_dependency(Mock(), user=user)
+            await anext(dependency)
+            release.assert_not_called()
+
+            with pytest.raises(StopAsyncIteration):
+                await anext(dependency)
+
+        assert [call.args[:2] for call in acquire.await_args_list] == [("user:1", 2), ("company:2", 10)]
+        assert [call.args for call in release.await_args_list] == [("user:1", "a"), ("company:2", "b")]
+
+    @pytest.mark.asyncio
+    async def test_busy_company_is_rejected(self):
+        """Test that a request is rejected when its company has no free slot, releasing the user slot."""
+        user = {"id": 1, "company_id": 2}
+
+        with (
+            patch.object(dependencies, "CONCURRENCY_LIMIT_PER_USER", 2),
+            patch.object(dependencies, "CONCURRENCY_LIMIT_PER_COMPANY", 10),
+            patch.object(dependencies.rate_limiter, "acquire_slot", AsyncMock(side_effect=["a", None])),
+            patch.object(dependencies.rate_limiter, "release_slot", AsyncMock()) as release,
+        ):
+            with pytest.raises(RateLimitException):
+                await anext(dependencies.concurrency_limiter_dependency(Mock(), user=user))
+
+        release.assert_awaited_once_with("user:1", "a")
@@ -0,0 +1,94 @@
+"""Unit tests for the token blacklist."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.app.core.utils import blacklist
+from src.app.core.utils.bloom_filter import BloomFilter
+
+
+class TestBloomFilter:
+    """Test the Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Test that every added item is reported as present, and the false positive rate stays near its target."""
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom_filter.add(f"token-{i}")
+
+        assert all(f"token-{i}" in bloom_filter for i in range(1000))
+        assert sum(f"other-{i}" in bloom_filter for i in range(1000)) < 30
+
+    def test_item_added_twice_is_counted_once(self):
+        """Test that a token announced back to the worker that blacklisted it does not count towards a rebuild."""
+        bloom_filter = BloomFilter(capacity=100)
+        bloom_filter.add("token")
+        bloom_filter.add("token")
+
+        assert bloom_filter.count == 1
+
+
+class TestTokenBlacklist:
+    """Test the blacklist lookups."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_token_costs_no_io(self, mock_db, mock_redis):
+        """Test that a token absent from the Bloom filter is not looked up in Redis nor in the database."""
+        mock_redis.exists = AsyncMock()
+
+        with (
+            patch.object(blacklist, "client", mock_redis),
+            patch.object(blacklist, "bloom_filter", BloomFilter(capacity=100)),
+            patch.object(blacklist.crud_token_blacklist, "exists", AsyncMock()) as db_exists,
+        ):
+            assert not await blacklist.contains("token", mock_db)
+
+        mock_redis.exists.assert_not_called()
+        db_exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_blacklisted_token_is_found_in_redis(self, mock_db, mock_redis):
+        """Test that a blacklisted token is announced, and then found in Redis without querying the database."""
+        mock_redis.exists = AsyncMock(return_value=1)
+        mock_redis.publish = AsyncMock()
+        token_hash = blacklist.hash_token("token")
+
+        with (
+            patch.object(blacklist, "client", mock_redis),
+            patch.object(blacklist, "bloom_filter", BloomFilter(capacity=100)),
+            patch.object(blacklist.crud_token_blacklist, "exists", AsyncMock()) as db_exists,
+            patch("src.app.core.utils.blacklist.time.time", return_value=1000),
+        ):
+            await blacklist.add("token", expires_at=1600)
+            assert await blacklist.contains("token", mock_db)
+
+        mock_redis.set.assert_awaited_once_with(f"{blacklist.BLACKLIST_KEY_PREFIX}{token_hash}", 1, ex=601)
+        mock_redis.publish.assert_awaited_once_with(blacklist.BLACKLIST_CHANNEL, token_hash)
+        db_exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_database_is_checked_without_filter(self, mock_db):
+        """Test that the database is still checked until the Bloom filter is loaded."""
+        with (
+            patch.object(blacklist, "client", None),
+            patch.object(blacklist, "bloom_filter", None),
+            patch.object(blacklist.crud_token_blacklist, "exists", AsyncMock(return_value=True)) as db_exists,
+        ):
+            assert await blacklist.contains("token", mock_db)
+
+        db_exists.assert_awaited_once_with(mock_db, token="token")
+
+    @pytest.mark.asyncio
+    async def test_failed_announcement_is_raised(self, mock_redis):
+        """Test that a token other workers could not learn about fails the blacklisting instead of being ignored."""
+        mock_redis.publish = AsyncMock(side_effect=RedisConnectionError("down"))
+
+        with (
+            patch.object(blacklist, "client", mock_redis),
+            patch.object(blacklist, "bloom_filter", None),
+            patch("src.app.core.utils.blacklist.time.time", return_value=1000),
+            pytest.raises(RedisConnectionError),
+        ):
+            await blacklist.add("token", expires_at=1600)
@@ -23,7 +23,7 @@ class TestWriteUser:
             mock_crud.create = AsyncMock(return_value=Mock(id=1))
             mock_crud.get = AsyncMock(return_value=sample_user_read)
 
-            with patch("src.app.api.v1.users.get_password_hash") as mock_hash:
+            with patch("src.app.api.v1.users.hash_password", new_callable=AsyncMock) as mock_hash:
                 mock_hash.return_value = "hashed_password"
 
                 result = await write_user(Mock(), user_create, mock_db)